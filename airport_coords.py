@@ -1,3 +1,9 @@
+import math
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from substring_index import SubstringAutomaton
+
 # 机场坐标数据
 AIRPORT_COORDS = {
     # 中国主要机场
@@ -384,22 +390,143 @@ AIRPORT_COORDS = {
     "瓦茨拉夫哈维尔": [50.1008, 14.2632]  # 布拉格瓦茨拉夫·哈维尔机场
 }
 
+# 机场名称/别名到城市的映射（别名层，优先于模糊匹配）
+AIRPORT_ALIASES = {
+    '首都': '北京', '大兴': '北京', '北京首都': '北京', '北京大兴': '北京',
+    '虹桥': '上海', '上海虹桥': '上海',
+    '白云': '广州', '广州白云': '广州',
+    '宝安': '深圳', '深圳宝安': '深圳',
+    '双流': '成都', '成都双流': '成都', '天府': '成都', '成都天府': '成都',
+    '萧山': '杭州', '天河': '武汉', '武汉天河': '武汉',
+    '江北': '重庆', '重庆江北': '重庆',
+    '长水': '昆明', '禄口': '南京', '南京禄口': '南京',
+    '流亭': '青岛', '胶东': '青岛', '高崎': '厦门',
+    '周水子': '大连', '桃仙': '沈阳', '沈阳桃仙': '沈阳',
+    '黄花': '长沙', '新郑': '郑州', '郑州新郑': '郑州',
+    '滨海': '天津', '天津滨海': '天津', '咸阳': '西安', '西安咸阳': '西安',
+    '地窝堡': '乌鲁木齐', '花湖': '鄂州', '鄂州花湖': '鄂州',
+    '希思罗': '伦敦', '戴高乐': '巴黎', '巴黎戴高乐': '巴黎', '史基浦': '阿姆斯特丹',
+    '成田': '东京', '羽田': '东京', '仁川': '首尔', '樟宜': '新加坡',
+    '肯尼迪': '纽约', '奥黑尔': '芝加哥',
+}
+
+
+class AirportResolver:
+    """机场坐标解析器
+
+    按三层顺序解析城市名/机场名/IATA代码：
+    1. 精确匹配 AIRPORT_COORDS
+    2. 别名匹配（IATA代码大小写、机场名称、CITY_NAME_MAPPING 中的名称映射）
+    3. 模糊匹配：与原线性扫描语义一致，返回 AIRPORT_COORDS 中第一个
+       "查询词包含关键词" 或 "关键词包含查询词" 的条目，由 Aho-Corasick 自动机完成
+    解析结果（包括未命中）缓存在有界的 LRU 表中。
+    """
+
+    def __init__(self, coords: dict = None, aliases: dict = None, memo_size: int = 4096):
+        self.coords = AIRPORT_COORDS if coords is None else coords
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._keys = list(self.coords.keys())
+        self._automaton = SubstringAutomaton(self._keys)
+        self._aliases = self._build_aliases(AIRPORT_ALIASES if aliases is None else aliases)
+        self.stats = {'exact': 0, 'alias': 0, 'fuzzy': 0, 'miss': 0, 'memo_hits': 0}
+
+    def _build_aliases(self, aliases: dict) -> dict:
+        """构建别名表：只保留目标能精确命中坐标表的别名"""
+        alias_map = {}
+        try:
+            from data_cleaner import CITY_NAME_MAPPING
+        except ImportError:
+            CITY_NAME_MAPPING = {}
+
+        for name, city in list(CITY_NAME_MAPPING.items()) + list(aliases.items()):
+            if name not in self.coords and city in self.coords:
+                alias_map[name] = city
+
+        # IATA代码不区分大小写
+        for key in self._keys:
+            if len(key) == 3 and key.isascii() and key.isupper():
+                alias_map.setdefault(key.lower(), key)
+        return alias_map
+
+    def _lookup(self, name: str):
+        """不经过缓存的三层解析，返回 (坐标, 命中层级)"""
+        if name in self.coords:
+            return self.coords[name], 'exact'
+
+        alias = self._aliases.get(name)
+        if alias is not None:
+            return self.coords[alias], 'alias'
+
+        candidates = [
+            index for index in (self._automaton.first_match(name),
+                                self._automaton.first_superstring(name))
+            if index is not None
+        ]
+        if candidates:
+            return self.coords[self._keys[min(candidates)]], 'fuzzy'
+
+        return None, 'miss'
+
+    def resolve(self, city_or_iata):
+        """解析单个名称，返回 [lat, lon] 或 None"""
+        if city_or_iata is None or (isinstance(city_or_iata, float) and math.isnan(city_or_iata)):
+            return None
+
+        name = str(city_or_iata).strip()
+        if not name:
+            return None
+
+        if name in self._memo:
+            self._memo.move_to_end(name)
+            self.stats['memo_hits'] += 1
+            return self._memo[name]
+
+        coords, tier = self._lookup(name)
+        self.stats[tier] += 1
+        if coords is None:
+            # 未命中结果同样缓存，警告只输出一次
+            print(f"警告: 未找到城市 '{name}' 的坐标信息")
+
+        self._memo[name] = coords
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return coords
+
+    def resolve_many(self, names):
+        """批量解析一列名称，每个唯一值只解析一次
+
+        Returns:
+            (lat数组, lon数组, 缺失掩码)，缺失坐标为 NaN
+        """
+        codes, uniques = pd.factorize(pd.Series(names), use_na_sentinel=True)
+        unique_lat = np.full(len(uniques) + 1, np.nan)
+        unique_lon = np.full(len(uniques) + 1, np.nan)
+
+        for i, name in enumerate(uniques):
+            coords = self.resolve(name)
+            if coords and len(coords) == 2:
+                lat, lon = coords
+                if (isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and
+                        math.isfinite(lat) and math.isfinite(lon) and
+                        -90 <= lat <= 90 and -180 <= lon <= 180):
+                    unique_lat[i] = lat
+                    unique_lon[i] = lon
+
+        # 缺失值的编码为 -1，正好落在末尾的 NaN 槽位
+        lat = unique_lat[codes]
+        lon = unique_lon[codes]
+        return lat, lon, np.isnan(lat)
+
+    def clear(self):
+        """清空解析缓存"""
+        self._memo.clear()
+
+
+# 创建全局实例
+airport_resolver = AirportResolver()
+
+
 def get_airport_coords(city_or_iata):
     """根据城市名或IATA代码获取机场坐标"""
-    if not city_or_iata:
-        return None
-    
-    city_or_iata = str(city_or_iata).strip()
-    
-    # 直接查找
-    if city_or_iata in AIRPORT_COORDS:
-        return AIRPORT_COORDS[city_or_iata]
-    
-    # 模糊匹配城市名
-    for key, coords in AIRPORT_COORDS.items():
-        if city_or_iata in key or key in city_or_iata:
-            return coords
-    
-    # 如果找不到，记录警告并返回None
-    print(f"警告: 未找到城市 '{city_or_iata}' 的坐标信息")
-    return None
\ No newline at end of file
+    return airport_resolver.resolve(city_or_iata)
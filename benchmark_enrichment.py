@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+航线距离/时间补全性能对比：逐行循环 vs 向量化批量计算
+用法: python benchmark_enrichment.py [放大倍数...]
+"""
+
+import sys
+import time
+import pandas as pd
+from fix_parser import parse_excel_route_data
+from data_cleaner import clean_route_data
+from airport_coords import get_airport_coords
+from route_enrichment import calculate_flight_distance, calculate_flight_time, enrich_routes
+
+
+def legacy_enrich(routes_df):
+    """原 web_app.py 中的逐行补全逻辑（仅用于性能对比）"""
+    for idx, row in routes_df.iterrows():
+        origin_coords = get_airport_coords(row['origin'])
+        dest_coords = get_airport_coords(row['destination'])
+
+        if origin_coords and dest_coords:
+            if pd.isna(row['flight_distance']) or str(row['flight_distance']).strip() == '':
+                distance = calculate_flight_distance(origin_coords, dest_coords)
+                if distance:
+                    routes_df.at[idx, 'flight_distance'] = f"{int(distance)}公里"
+
+        if pd.isna(row['flight_time']) or str(row['flight_time']).strip() == '':
+            distance_km = None
+            distance_str = str(routes_df.at[idx, 'flight_distance'])
+            if '公里' in distance_str:
+                try:
+                    distance_km = float(distance_str.replace('公里', '').strip())
+                except ValueError:
+                    pass
+
+            if distance_km:
+                flight_time = calculate_flight_time(distance_km, row['aircraft'])
+                if flight_time:
+                    routes_df.at[idx, 'flight_time'] = flight_time
+    return routes_df
+
+
+def load_base_routes():
+    """加载并清理示例数据，补齐空的距离/时间列"""
+    routes_df = parse_excel_route_data('data/大陆航司全货机航线.xlsx')
+    routes_df = clean_route_data(routes_df, enable_deduplication=False)
+    routes_df['flight_distance'] = ''
+    routes_df['flight_time'] = ''
+    routes_df['speed'] = ''
+    return routes_df.reset_index(drop=True)
+
+
+def run_benchmark(scales):
+    base_df = load_base_routes()
+    print(f"\n{'行数':>8} | {'逐行(行/秒)':>12} | {'向量化(行/秒)':>14} | {'加速比':>6}")
+    print("-" * 52)
+
+    for scale in scales:
+        df = pd.concat([base_df] * scale, ignore_index=True)
+
+        start = time.perf_counter()
+        legacy_enrich(df.copy())
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        enrich_routes(df)
+        vector_seconds = time.perf_counter() - start
+
+        legacy_rate = len(df) / legacy_seconds
+        vector_rate = len(df) / vector_seconds
+        print(f"{len(df):>8} | {legacy_rate:>12,.0f} | {vector_rate:>14,.0f} | {legacy_rate and vector_rate / legacy_rate:>5.1f}x")
+
+
+if __name__ == "__main__":
+    scales = [int(arg) for arg in sys.argv[1:]] or [1, 5, 20]
+    run_benchmark(scales)
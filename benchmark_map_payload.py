@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+2D地图页面大小和渲染耗时对比：逐条绘制（folium对象） vs 矢量图层（GeoJSON）
+在合成的航线数据（默认 100 / 1000 / 10000 条唯一航线）上比较：
+- 构建耗时：生成 folium 地图对象
+- 渲染耗时：生成完整 HTML（即 st_folium 发送给浏览器的内容）
+- 页面大小和地图对象数（逐条绘制时每个对象对应浏览器端的一个图层/DOM 节点）
+用法: python benchmark_map_payload.py [唯一航线数...]
+"""
+
+import contextlib
+import io
+import random
+import sys
+import time
+import pandas as pd
+from airport_coords import AIRPORT_COORDS
+from route_aggregation import build_route_aggregate
+from map_builder import build_route_map, build_geojson_route_map
+
+AIRLINES = ['国货航', '东航物流', '南航物流', '顺丰航空', '中原龙浩', '天津货航', '邮政航空', '圆通航空']
+AIRCRAFT = ['B777F', 'B747-400F', 'A330-200P2F', 'B757-200F', 'B767-300F', 'B737-800BCF']
+
+
+def make_routes(route_count: int, seed: int = 42) -> pd.DataFrame:
+    """生成指定唯一航线数的合成数据（城市均有坐标，每条航线 1~6 条记录）"""
+    rng = random.Random(seed)
+    cities = [city for city in AIRPORT_COORDS if not city.isascii()]
+    pairs = [(o, d) for o in cities for d in cities if o != d]
+    rng.shuffle(pairs)
+    if route_count > len(pairs):
+        raise ValueError(f"最多可生成 {len(pairs)} 条唯一航线")
+
+    rows = []
+    for origin, destination in pairs[:route_count]:
+        for _ in range(rng.randint(1, 6)):
+            rows.append({
+                'airline': rng.choice(AIRLINES),
+                'aircraft': rng.choice(AIRCRAFT),
+                'origin': origin,
+                'destination': destination,
+                'direction': rng.choice(['出口', '进口']),
+            })
+    return pd.DataFrame(rows)
+
+
+def count_elements(element) -> int:
+    """地图对象树中的元素数（不含地图本身）"""
+    return sum(1 + count_elements(child) for child in element._children.values())
+
+
+def measure(builder, filtered, routes) -> dict:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        m, _ = builder(filtered, routes)
+    built = time.perf_counter()
+    html = m.get_root().render()
+    rendered = time.perf_counter()
+    return {
+        'build': built - start,
+        'render': rendered - built,
+        'bytes': len(html.encode('utf-8')),
+        'elements': count_elements(m),
+    }
+
+
+def run_benchmark(route_counts):
+    print(f"\n{'航线数':>7} | {'模式':<8} | {'构建(s)':>8} | {'渲染(s)':>8} | {'页面大小(KB)':>12} | {'地图对象':>8}")
+    print("-" * 70)
+    for route_count in route_counts:
+        filtered = make_routes(route_count)
+        routes = build_route_aggregate(filtered)
+        results = {
+            '逐条绘制': measure(lambda f, r: build_route_map(f, r, animation_enabled=True), filtered, routes),
+            '矢量图层': measure(build_geojson_route_map, filtered, routes),
+        }
+        for mode, result in results.items():
+            print(f"{route_count:>7} | {mode:<8} | {result['build']:>8.2f} | {result['render']:>8.2f} | "
+                  f"{result['bytes'] / 1024:>12,.0f} | {result['elements']:>8,}")
+        legacy, vector = results['逐条绘制'], results['矢量图层']
+        print(f"{'':>7}   页面缩小 {legacy['bytes'] / vector['bytes']:.1f}x，"
+              f"总耗时缩短 {(legacy['build'] + legacy['render']) / (vector['build'] + vector['render']):.1f}x")
+
+
+if __name__ == "__main__":
+    route_counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    run_benchmark(route_counts)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通用解析器航线提取性能对比：逐行 iterrows vs 按列批量提取
+在合成的航司工作簿（默认 10 万行）上比较两种实现的吞吐量，并核对结果一致。
+用法: python benchmark_parser.py [行数...]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import pandas as pd
+from openpyxl import Workbook
+from excel_stream import iter_excel_chunks
+from parser import (detect_table_structure, clean_and_normalize_data, extract_route_info,
+                    extract_file_frame, parse_route_text)
+
+CITIES = ['上海浦东(PVG)', '北京首都(PEK)', '深圳', '鄂州花湖', '郑州新郑(CGO)', '成都双流',
+          '安克雷奇(ANC)', '芝加哥(ORD)', '法兰克福(FRA)', '列日', '阿姆斯特丹', '首尔仁川(ICN)',
+          '大阪', '达卡', '洛杉矶(LAX)', '迪拜']
+AIRLINES = ['国货航', '东航物流', '南航物流', '顺丰航空', '中原龙浩', '天津货航', '邮政航空']
+AIRCRAFT = ['B777F', 'B747-400F', 'A330-200P2F', 'B757-200F', 'B767-300F', 'B737-800BCF']
+
+
+def legacy_extract_records(df_clean, structure, airline_name):
+    """原 load_data 中的逐行提取逻辑（仅用于性能对比和一致性检查）"""
+    all_rows = []
+    for idx, row in df_clean.iterrows():
+        airline_value = None
+        if structure['airline_col'] and structure['airline_col'] in row.index:
+            airline_value = row[structure['airline_col']]
+        if pd.isna(airline_value) or str(airline_value).strip() == '':
+            airline_value = airline_name
+        if pd.isna(airline_value) or str(airline_value).strip() == '':
+            continue
+
+        routes = extract_route_info(row, structure)
+        if not routes:
+            for col in df_clean.columns:
+                if col not in [structure.get(k) for k in structure.keys() if k.endswith('_col')]:
+                    col_value = row[col]
+                    if pd.notna(col_value) and '-' in str(col_value):
+                        segments = parse_route_text(str(col_value))
+                        for origin_info, dest_info in segments:
+                            routes.append({
+                                'origin': origin_info['name'],
+                                'destination': dest_info['name'],
+                                'direction': '出口',
+                                'origin_iata': origin_info['iata'],
+                                'dest_iata': dest_info['iata']
+                            })
+                        break
+
+        for route_info in routes:
+            reg_value = ''
+            if structure['reg_col'] and structure['reg_col'] in row.index:
+                reg_value = row[structure['reg_col']] if pd.notna(row[structure['reg_col']]) else ''
+            aircraft_value = ''
+            if structure['aircraft_col'] and structure['aircraft_col'] in row.index:
+                aircraft_value = row[structure['aircraft_col']] if pd.notna(row[structure['aircraft_col']]) else ''
+            age_value = ''
+            if structure['age_col'] and structure['age_col'] in row.index:
+                age_value = row[structure['age_col']] if pd.notna(row[structure['age_col']]) else ''
+            flight_number_value = ''
+            if structure['flight_number_col'] and structure['flight_number_col'] in row.index:
+                flight_number_value = row[structure['flight_number_col']] if pd.notna(row[structure['flight_number_col']]) else ''
+            frequency_value = '正常运营'
+            if structure['frequency_col'] and structure['frequency_col'] in row.index:
+                frequency_value = row[structure['frequency_col']] if pd.notna(row[structure['frequency_col']]) else '正常运营'
+            special_value = ''
+            if structure['special_col'] and structure['special_col'] in row.index:
+                special_value = row[structure['special_col']] if pd.notna(row[structure['special_col']]) else ''
+
+            flight_time_value = ''
+            flight_distance_value = ''
+            for time_col in structure['flight_time_cols']:
+                if time_col in row.index and pd.notna(row[time_col]):
+                    flight_time_value = str(row[time_col])
+                    break
+            for dist_col in structure['flight_distance_cols']:
+                if dist_col in row.index and pd.notna(row[dist_col]):
+                    flight_distance_value = str(row[dist_col])
+                    break
+
+            all_rows.append({
+                "direction": route_info.get('direction', '出口'),
+                "airline": str(airline_value).strip(),
+                "reg": str(reg_value).strip(),
+                "aircraft": str(aircraft_value).strip(),
+                "age": str(age_value).strip(),
+                "origin": route_info['origin'],
+                "origin_iata": route_info.get('origin_iata', ''),
+                "destination": route_info['destination'],
+                "dest_iata": route_info.get('dest_iata', ''),
+                "flight_time": str(flight_time_value).strip(),
+                "flight_distance": str(flight_distance_value).strip(),
+                "special": str(special_value or frequency_value).strip(),
+                "flight_number": str(flight_number_value).strip()
+            })
+    return pd.DataFrame(all_rows)
+
+
+def make_synthetic_workbook(path, rows, seed=0):
+    """生成合成的航司工作簿：分组航司（合并单元格）、单段/多段航线、缺失值和未识别列中的航线"""
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['航司', '注册号', '机型', '机龄', '航线', '航班号', '班期', '飞行时长', '飞行距离', '备注', '补充'])
+    for i in range(rows):
+        # 每组 4~12 行，只有组内第一行写航司信息
+        if i == 0 or rng.random() < 0.12:
+            group = [rng.choice(AIRLINES), f"B-{rng.randint(1000, 9999)}", rng.choice(AIRCRAFT), rng.choice([8, 12.5, '15'])]
+        else:
+            group = [None, None, None, None]
+
+        legs = rng.choice([2, 2, 2, 3, 4])
+        route = rng.choice(['-', '—', '→']).join(rng.sample(CITIES, legs))
+        extra = None
+        if rng.random() < 0.05:
+            route, extra = None, '-'.join(rng.sample(CITIES, 2))
+        elif rng.random() < 0.02:
+            route = '停场维修'
+
+        sheet.append(group + [
+            route,
+            f"CK{rng.randint(100, 999)}" if rng.random() < 0.7 else None,
+            rng.choice(['每周3班', '每日', None]),
+            f"{rng.randint(2, 14)}h{rng.randint(0, 59)}m" if rng.random() < 0.5 else None,
+            rng.randint(800, 12000) if rng.random() < 0.5 else None,
+            rng.choice([None, None, '包机', 0]),
+            extra,
+        ])
+    workbook.save(path)
+
+
+def prepare_chunk(path):
+    """读取并清理整张合成工作表（两种实现共用同一输入）"""
+    df = pd.concat(iter_excel_chunks(path), ignore_index=True)
+    structure = detect_table_structure(df)
+    return clean_and_normalize_data(df, structure), structure
+
+
+def run_benchmark(sizes):
+    work_dir = tempfile.mkdtemp()
+    print(f"\n{'行数':>8} | {'逐行(行/秒)':>12} | {'按列(行/秒)':>12} | {'加速比':>6} | 结果一致")
+    print("-" * 62)
+    for size in sizes:
+        path = os.path.join(work_dir, f"synthetic_{size}.xlsx")
+        make_synthetic_workbook(path, size)
+        df_clean, structure = prepare_chunk(path)
+
+        start = time.perf_counter()
+        legacy = legacy_extract_records(df_clean, structure, 'synthetic')
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = extract_file_frame(df_clean, structure, 'synthetic')
+        vector_seconds = time.perf_counter() - start
+
+        same = legacy.equals(vectorized)
+        legacy_rate = size / legacy_seconds
+        vector_rate = size / vector_seconds
+        print(f"{size:>8} | {legacy_rate:>12,.0f} | {vector_rate:>12,.0f} | {vector_rate / legacy_rate:>5.1f}x | {'是' if same else '否'}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    run_benchmark(sizes)
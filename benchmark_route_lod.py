@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+航线路径细节层次（LOD）报告：各缩放级别的顶点数、矢量图层页面大小和最大几何误差
+在合成的航线数据（默认 1000 / 10000 条唯一航线）上比较完整路径与各级简化路径
+用法: python benchmark_route_lod.py [唯一航线数...]
+"""
+
+import contextlib
+import io
+import sys
+import time
+import numpy as np
+from airport_coords import airport_resolver
+from route_aggregation import build_route_aggregate
+from route_geometry import LOD_LEVELS, RouteGeometry
+from geojson_layer import build_route_features, dump_features
+from benchmark_map_payload import make_routes
+
+
+def unwrapped_points(path) -> np.ndarray:
+    """把切开的路径拼回一条经度连续的折线"""
+    points = np.vstack(path)
+    points[:, 1] = np.degrees(np.unwrap(np.radians(points[:, 1])))
+    return points
+
+
+def max_deviation(full_path, simplified_path) -> float:
+    """完整路径上各点到简化折线的最大平面距离（度）"""
+    points, line = unwrapped_points(full_path), unwrapped_points(simplified_path)
+    a, b = line[:-1], line[1:]
+    d = b - a
+    length2 = np.maximum((d ** 2).sum(axis=1), 1e-18)
+    t = np.clip(((points[:, None, :] - a[None]) * d[None]).sum(axis=2) / length2, 0, 1)
+    nearest = a[None] + t[..., None] * d[None]
+    return float(np.sqrt(((points[:, None, :] - nearest) ** 2).sum(axis=2)).min(axis=1).max())
+
+
+def run_report(route_counts):
+    levels = [(f"缩放≤{zoom}", tolerance) for zoom, tolerance in LOD_LEVELS] + [("完整路径", 0.0)]
+    print(f"\n{'航线数':>7} | {'细节层次':<8} | {'容差(度)':>8} | {'顶点数':>9} | {'节省':>6} | "
+          f"{'页面(KB)':>9} | {'最大误差(度)':>11} | {'生成(s)':>7}")
+    print("-" * 90)
+    for route_count in route_counts:
+        routes = build_route_aggregate(make_routes(route_count))
+        keys = list(routes.routes)
+        origin_lat, origin_lon, _ = airport_resolver.resolve_many([o for o, _ in keys])
+        dest_lat, dest_lon, _ = airport_resolver.resolve_many([d for _, d in keys])
+        geometry = RouteGeometry()
+        full_paths = geometry.paths(origin_lat, origin_lon, dest_lat, dest_lon)
+        full_vertices = sum(len(segment) for path in full_paths for segment in path)
+
+        for name, tolerance in levels:
+            start = time.perf_counter()
+            paths = geometry.paths(origin_lat, origin_lon, dest_lat, dest_lon, tolerance)
+            elapsed = time.perf_counter() - start
+            vertices = sum(len(segment) for path in paths for segment in path)
+            error = max(max_deviation(f, s) for f, s in zip(full_paths, paths))
+            with contextlib.redirect_stdout(io.StringIO()):
+                collection, _ = build_route_features(routes, lod_tolerance=tolerance)
+            size = len(dump_features(collection).encode('utf-8')) / 1024
+            print(f"{route_count:>7} | {name:<8} | {tolerance:>8} | {vertices:>9,} | "
+                  f"{1 - vertices / full_vertices:>6.0%} | {size:>9,.0f} | {error:>11.4f} | {elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    route_counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    run_report(route_counts)
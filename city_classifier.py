@@ -0,0 +1,148 @@
+# D:\flight_tool\city_classifier.py
+"""国内/国际城市分类（共用的关键词表和 Aho-Corasick 自动机，按名称缓存分类结果）"""
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from substring_index import SubstringAutomaton
+
+# 中国主要城市列表（包括港澳台）
+CHINESE_CITIES = [
+    # 直辖市
+    '北京', '上海', '天津', '重庆',
+    # 省会城市
+    '广州', '深圳', '杭州', '南京', '武汉', '成都', '西安', '郑州', '济南', '沈阳',
+    '长春', '哈尔滨', '石家庄', '太原', '呼和浩特', '兰州', '西宁', '银川', '乌鲁木齐',
+    '合肥', '福州', '南昌', '长沙', '海口', '南宁', '贵阳', '昆明', '拉萨',
+    # 其他重要城市
+    '苏州', '无锡', '常州', '南通', '徐州', '扬州', '镇江', '泰州', '盐城', '淮安', '宿迁', '连云港',
+    '宁波', '温州', '嘉兴', '湖州', '绍兴', '金华', '衢州', '舟山', '台州', '丽水',
+    '青岛', '烟台', '潍坊', '临沂', '淄博', '济宁', '泰安', '威海', '日照', '滨州',
+    '东营', '聊城', '德州', '菏泽', '枣庄', '莱芜',
+    '大连', '鞍山', '抚顺', '本溪', '丹东', '锦州', '营口', '阜新', '辽阳', '盘锦',
+    '铁岭', '朝阳', '葫芦岛',
+    '吉林', '四平', '辽源', '通化', '白山', '松原', '白城', '延边',
+    '齐齐哈尔', '鸡西', '鹤岗', '双鸭山', '大庆', '伊春', '佳木斯', '七台河',
+    '牡丹江', '黑河', '绥化', '大兴安岭',
+    '厦门', '泉州', '漳州', '莆田', '三明', '龙岩', '南平', '宁德',
+    '景德镇', '萍乡', '九江', '新余', '鹰潭', '赣州', '吉安', '宜春', '抚州', '上饶',
+    '珠海', '汕头', '佛山', '韶关', '湛江', '肇庆', '江门', '茂名', '惠州', '梅州',
+    '汕尾', '河源', '阳江', '清远', '东莞', '中山', '潮州', '揭阳', '云浮',
+    '柳州', '桂林', '梧州', '北海', '防城港', '钦州', '贵港', '玉林', '百色', '贺州',
+    '河池', '来宾', '崇左',
+    '三亚', '三沙', '儋州',
+    '遵义', '六盘水', '安顺', '毕节', '铜仁', '黔西南', '黔东南', '黔南',
+    '曲靖', '玉溪', '保山', '昭通', '丽江', '普洱', '临沧', '楚雄', '红河', '文山',
+    '西双版纳', '大理', '德宏', '怒江', '迪庆',
+    '日喀则', '昌都', '林芝', '山南', '那曲', '阿里',
+    '宝鸡', '咸阳', '铜川', '渭南', '延安', '榆林', '汉中', '安康', '商洛',
+    '洛阳', '开封', '平顶山', '安阳', '鹤壁', '新乡', '焦作', '濮阳', '许昌', '漯河',
+    '三门峡', '南阳', '商丘', '信阳', '周口', '驻马店', '济源',
+    '株洲', '湘潭', '衡阳', '邵阳', '岳阳', '常德', '张家界', '益阳', '郴州', '永州',
+    '怀化', '娄底', '湘西',
+    '芜湖', '蚌埠', '淮南', '马鞍山', '淮北', '铜陵', '安庆', '黄山', '滁州', '阜阳',
+    '宿州', '六安', '亳州', '池州', '宣城',
+    '唐山', '秦皇岛', '邯郸', '邢台', '保定', '张家口', '承德', '沧州', '廊坊', '衡水',
+    '大同', '阳泉', '长治', '晋城', '朔州', '晋中', '运城', '忻州', '临汾', '吕梁',
+    '包头', '乌海', '赤峰', '通辽', '鄂尔多斯', '呼伦贝尔', '巴彦淖尔', '乌兰察布',
+    '兴安盟', '锡林郭勒盟', '阿拉善盟',
+    '金昌', '白银', '天水', '武威', '张掖', '平凉', '酒泉', '庆阳', '定西', '陇南',
+    '临夏', '甘南',
+    '海东', '海北', '黄南', '海南', '果洛', '玉树', '海西',
+    '石嘴山', '吴忠', '固原', '中卫',
+    '克拉玛依', '吐鲁番', '哈密', '昌吉', '博尔塔拉', '巴音郭楞', '阿克苏', '克孜勒苏',
+    '喀什', '和田', '伊犁', '塔城', '阿勒泰',
+    # 港澳台
+    '香港', '澳门', '台北', '高雄', '台中', '台南', '桃园', '新竹', '基隆', '嘉义',
+    '台东', '花莲', '宜兰', '苗栗', '彰化', '南投', '云林', '屏东', '澎湖', '金门', '马祖',
+    # 其他常见城市
+    '鄂州', '二连浩特', '义乌',
+]
+
+# 机场简称（数据中常单独出现，如 “浦东”、“白云”）
+AIRPORT_NICKNAMES = [
+    '浦东', '首都', '双流', '桃仙', '白云', '宝安', '萧山', '禄口', '天河',
+    '滨海', '流亭', '周水子', '高崎', '栎社', '新郑', '黄花', '太平', '遥墙',
+    '长乐', '正定', '武宿', '骆岗', '昌北', '长水', '龙洞堡', '中川', '河东', '曹家堡',
+    '地窝堡', '贡嘎', '美兰', '凤凰', '白塔',
+]
+
+# 含国内关键词的国外地名，优先判为国际
+INTERNATIONAL_OVERRIDES = ['凤凰城']
+
+# 匹配前从名称中去掉的后缀
+STRIP_WORDS = ['机场', '国际机场', 'Airport']
+
+DOMESTIC = '国内'
+INTERNATIONAL = '国际'
+
+
+class CityClassifier:
+    """基于关键词自动机的国内/国际分类器，按名称记忆化"""
+
+    def __init__(self, keywords=None, overrides=None, memo_size: int = 65536):
+        keywords = CHINESE_CITIES + AIRPORT_NICKNAMES if keywords is None else list(keywords)
+        self.keywords = list(dict.fromkeys(keywords))
+        self._automaton = SubstringAutomaton(self.keywords)
+        self._overrides = SubstringAutomaton(INTERNATIONAL_OVERRIDES if overrides is None else overrides)
+        self.memo_size = memo_size
+        self._memo: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def clean(city_name) -> str:
+        """清理城市名称（去除可能的机场后缀）"""
+        text = str(city_name)
+        for word in STRIP_WORDS:
+            text = text.replace(word, '')
+        return text.strip()
+
+    def is_domestic(self, city_name) -> bool:
+        """名称中是否包含国内城市或机场关键词"""
+        if city_name is None or (isinstance(city_name, float) and np.isnan(city_name)):
+            return False
+        key = str(city_name)
+        cached = self._memo.get(key)
+        if cached is not None:
+            self._memo.move_to_end(key)
+            return cached
+
+        text = self.clean(key)
+        result = self._automaton.contains_any(text) and not self._overrides.contains_any(text)
+        self._memo[key] = result
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return result
+
+    def categorize(self, city_name, international: str = INTERNATIONAL) -> str:
+        return DOMESTIC if self.is_domestic(city_name) else international
+
+    def is_domestic_many(self, cities) -> np.ndarray:
+        """批量判断，每个不同的名称只分类一次"""
+        codes, uniques = pd.factorize(pd.Series(cities, dtype=object), use_na_sentinel=True)
+        flags = np.array([self.is_domestic(city) for city in uniques] + [False], dtype=bool)
+        return flags[codes]
+
+    def classify(self, cities: pd.Series, international: str = INTERNATIONAL) -> pd.Series:
+        """向量化分类：返回与输入索引对齐的 '国内' / '国际' 序列"""
+        cities = pd.Series(cities)
+        labels = np.where(self.is_domestic_many(cities.to_numpy()), DOMESTIC, international)
+        return pd.Series(labels, index=cities.index, dtype=object)
+
+    def clear(self):
+        self._memo.clear()
+
+
+# 创建全局实例
+city_classifier = CityClassifier()
+
+
+def categorize_city(city_name) -> str:
+    """判断城市是国内还是国外（'国内' / '国际'）"""
+    return city_classifier.categorize(city_name)
+
+
+def is_domestic(city_name) -> bool:
+    return city_classifier.is_domestic(city_name)
+
+
+def classify(cities: pd.Series, international: str = INTERNATIONAL) -> pd.Series:
+    return city_classifier.classify(cities, international)
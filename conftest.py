@@ -0,0 +1,55 @@
+# D:\flight_tool\conftest.py
+"""测试共用的示例数据：示例工作簿在一次测试会话中只解析一次"""
+import io
+import contextlib
+import pytest
+from fix_parser import parse_excel_route_data
+from data_cleaner import clean_route_data
+from route_enrichment import enrich_routes
+from route_store import RouteStore
+
+SAMPLE_WORKBOOK = 'data/大陆航司全货机航线.xlsx'
+
+
+def load_sample_routes(stage: str = 'clean'):
+    """解析示例工作簿（供 fixture 和各测试文件的 __main__ 使用）
+
+    Args:
+        stage: 'raw' 只解析，'clean' 清理（不去重），'enrich' 再补全距离/时长，'store' 再经 RouteStore 往返
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        routes_df = parse_excel_route_data(SAMPLE_WORKBOOK)
+        if stage == 'raw':
+            return routes_df
+        routes_df = clean_route_data(routes_df, enable_deduplication=False)
+        if stage == 'clean':
+            return routes_df
+        routes_df = enrich_routes(routes_df)
+        if stage == 'enrich':
+            return routes_df
+        return RouteStore.from_frame(routes_df).to_frame()
+
+
+@pytest.fixture(scope='session')
+def raw_routes_df():
+    """解析后的示例数据（各测试只读，不要修改）"""
+    return load_sample_routes('raw')
+
+
+@pytest.fixture(scope='session')
+def routes_df(raw_routes_df):
+    """清理后（不去重）的示例数据"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return clean_route_data(raw_routes_df, enable_deduplication=False)
+
+
+@pytest.fixture(scope='session')
+def enriched_routes_df(routes_df):
+    """补全距离/时长/速度后的示例数据"""
+    return enrich_routes(routes_df)
+
+
+@pytest.fixture(scope='session')
+def stored_routes_df(enriched_routes_df):
+    """经 RouteStore 编码后还原的示例数据（分类列）"""
+    return RouteStore.from_frame(enriched_routes_df).to_frame()
@@ -1,8 +1,12 @@
 # D:\flight_tool\data_cleaner.py
+import numpy as np
 import pandas as pd
 import re
 from typing import List, Dict, Set
 
+# 清理逻辑版本号：修改清理结果时递增，使解析缓存失效
+CLEANER_VERSION = 2
+
 # 定义有效的城市名称映射和清理规则
 CITY_NAME_MAPPING = {
     # 机场名称到城市名称的映射（确保映射后的城市在相应列表中存在）
@@ -207,6 +211,14 @@ INTERNATIONAL_CITIES = {
     '长水', '南阳', '晋江', '兴东'
 }
 
+# 预编译的无效模式和有效城市全集（模块加载时构建一次）
+INVALID_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in INVALID_PATTERNS), re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+VALID_CITIES = frozenset(DOMESTIC_CITIES | INTERNATIONAL_CITIES)
+
+# 城市分类取值
+CITY_CATEGORIES = ['国内', '国际', '未知']
+
 def is_valid_city(city_name: str) -> bool:
     """检查是否为有效的城市名称"""
     if not city_name or pd.isna(city_name):
@@ -215,13 +227,11 @@ def is_valid_city(city_name: str) -> bool:
     city_str = str(city_name).strip()
     
     # 检查无效模式
-    for pattern in INVALID_PATTERNS:
-        if re.match(pattern, city_str, re.IGNORECASE):
-            return False
+    if INVALID_RE.match(city_str):
+        return False
     
     # 检查是否在有效城市列表中
-    normalized_city = normalize_city_name(city_str)
-    return normalized_city in (DOMESTIC_CITIES | INTERNATIONAL_CITIES)
+    return normalize_city_name(city_str) in VALID_CITIES
 
 def normalize_city_name(city_name: str) -> str:
     """标准化城市名称"""
@@ -231,7 +241,7 @@ def normalize_city_name(city_name: str) -> str:
     city_str = str(city_name).strip()
     
     # 去除多余空格
-    city_str = re.sub(r'\s+', '', city_str)
+    city_str = WHITESPACE_RE.sub('', city_str)
     
     # 应用映射
     if city_str in CITY_NAME_MAPPING:
@@ -301,30 +311,52 @@ def clean_route_data(df: pd.DataFrame, enable_deduplication: bool = True) -> pd.
     else:
         print(f"📊 保留原始数据：共 {len(df_clean)} 条记录（未去重）")
     
-    # 清理始发地
-    if 'origin' in df_clean.columns:
-        # 标准化城市名称
-        df_clean['origin'] = df_clean['origin'].apply(normalize_city_name)
-        # 过滤无效城市
-        df_clean = df_clean[df_clean['origin'].apply(is_valid_city)]
-        # 添加始发地分类
-        df_clean['origin_category'] = df_clean['origin'].apply(categorize_city)
-    
-    # 清理目的地
-    if 'destination' in df_clean.columns:
-        # 标准化城市名称
-        df_clean['destination'] = df_clean['destination'].apply(normalize_city_name)
-        # 过滤无效城市
-        df_clean = df_clean[df_clean['destination'].apply(is_valid_city)]
-        # 添加目的地分类
-        df_clean['destination_category'] = df_clean['destination'].apply(categorize_city)
-    
+    # 清理始发地和目的地：每个不同的城市只标准化、校验和分类一次
+    city_columns = [col for col in ['origin', 'destination'] if col in df_clean.columns]
+    if not city_columns:
+        return df_clean
+
+    columns = {col: _clean_city_column(df_clean[col]) for col in city_columns}
+
+    keep = np.ones(len(df_clean), dtype=bool)
+    for codes, names, valid, categories in columns.values():
+        keep &= valid[codes]
+
     # 移除始发地和目的地相同的记录
-    if 'origin' in df_clean.columns and 'destination' in df_clean.columns:
-        df_clean = df_clean[df_clean['origin'] != df_clean['destination']]
+    if len(columns) == 2:
+        origin_codes, origin_names = columns['origin'][:2]
+        dest_codes, dest_names = columns['destination'][:2]
+        keep &= origin_names[origin_codes] != dest_names[dest_codes]
+
+    df_clean = df_clean[keep].copy()
+
+    # 按编码映射回各行，输出为分类列（类别只包含保留下来的取值）
+    for col, (codes, names, valid, categories) in columns.items():
+        kept = codes[keep]
+        city_index = pd.Index(names)
+        city_names = city_index.unique()
+        df_clean[col] = pd.Categorical.from_codes(
+            city_names.get_indexer(city_index)[kept], categories=city_names
+        ).remove_unused_categories()
+        df_clean[f'{col}_category'] = pd.Categorical.from_codes(
+            pd.Index(CITY_CATEGORIES).get_indexer(categories)[kept], categories=CITY_CATEGORIES
+        ).remove_unused_categories()
     
     return df_clean
 
+def _clean_city_column(series: pd.Series):
+    """按不同取值标准化、校验和分类城市列
+
+    Returns:
+        (行编码, 各取值标准化后的名称, 是否有效, 城市分类)；取值数组末尾多一项对应空值（编码 -1）
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    normalized = [normalize_city_name(city) for city in uniques]
+    names = np.array(normalized + [''], dtype=object)
+    valid = np.array([is_valid_city(city) for city in normalized] + [False], dtype=bool)
+    categories = np.array([categorize_city(city) for city in normalized] + ['未知'], dtype=object)
+    return codes, names, valid, categories
+
 def get_sorted_cities(df: pd.DataFrame, column: str) -> List[str]:
     """获取排序后的城市列表，国内城市在前，国际城市在后"""
     if column not in df.columns:
@@ -0,0 +1,266 @@
+# D:\flight_tool\detail_table.py
+"""分页航线明细表：服务端搜索、排序，按页计算派生列并缓存"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from route_store import display_strings
+from transit_analysis import TransitNetwork
+from display_columns import DISPLAY_COLUMNS, add_display_columns
+
+# 明细表模式
+PAGED_TABLE_MODE = '分页（按需计算）'
+FULL_TABLE_MODE = '完整表格'
+
+DEFAULT_PAGE_SIZE = 50
+PAGE_SIZES = [25, 50, 100, 200]
+
+# 每个明细表最多缓存的页数
+PAGE_CACHE_SIZE = 32
+
+# 服务端搜索的列
+SEARCH_COLUMNS = ['airline', 'reg', 'aircraft', 'origin', 'destination', 'direction', 'remarks', 'full_route']
+
+# 明细表列名（数据列 -> 显示列）
+COLUMN_LABELS = {
+    'airline': '✈️ 航空公司',
+    'reg': '🏷️ 注册号',
+    'aircraft': '🛩️ 机型',
+    'age': '📅 机龄',
+    '航线类型': '🌍 航线类型',
+    'direction': '📍 方向',
+    'origin': '🛫 始发地',
+    '中转站': '🔄 中转站',
+    'destination': '🛬 目的地',
+    'flight_time': '⏱️ 飞行时长',
+    'flight_distance': '📏 飞行距离',
+    'speed': '🚀 飞行速度',
+    '中转地分析': '🔀 中转地分析',
+    'remarks': '📝 备注',
+    'city_route': '🏙️ 城市航线',
+    'airport_route': '🛫 机场航线',
+    'iata_route': '✈️ 机场代码',
+    'weekly_frequency': '📊 每周班次',
+    '进出口类型': '📊 进出口类型',
+    '每周往返班次': '🔄 每周往返班次'
+}
+
+# 明细表显示列的顺序
+DISPLAY_ORDER = [
+    '✈️ 航空公司', '🏷️ 注册号', '🛩️ 机型', '📅 机龄', '🌍 航线类型', '📍 方向', '🛫 始发地',
+    '🔄 中转站', '🛬 目的地', '⏱️ 飞行时长', '📏 飞行距离', '🚀 飞行速度', '🔀 中转地分析', '📝 备注'
+]
+
+# 按数值排序的显示列（补全阶段生成的数值列）
+NUMERIC_SORT_COLUMNS = {
+    '⏱️ 飞行时长': 'flight_minutes',
+    '📏 飞行距离': 'distance_km',
+    '🚀 飞行速度': 'speed_kmh',
+}
+
+# 速度已带单位时不再追加
+SPEED_UNITS = ['km/h', 'mph', 'knots', '节', '公里/小时']
+
+
+def format_speed(speed) -> str:
+    """格式化速度数据显示"""
+    if pd.isna(speed) or str(speed).strip() == '':
+        return '未知'
+
+    speed_str = str(speed).strip()
+
+    # 如果已经包含单位，直接返回
+    if any(unit in speed_str.lower() for unit in SPEED_UNITS):
+        return speed_str
+
+    # 如果是纯数字，添加km/h单位
+    if speed_str.replace('.', '').replace(',', '').isdigit():
+        return speed_str + ' km/h'
+
+    return speed_str
+
+
+class DetailTable:
+    """筛选结果的分页明细表（每个筛选结果一个实例，取页结果缓存在实例上）
+
+    Args:
+        routes: 筛选后的航线数据（建表后不应再修改）
+        cache_size: 最多缓存的页数
+    """
+
+    def __init__(self, routes: pd.DataFrame, cache_size: int = PAGE_CACHE_SIZE):
+        if not set(DISPLAY_COLUMNS).issubset(routes.columns):
+            routes = add_display_columns(routes)
+        self.routes = routes
+        self.size = len(routes)
+        self.cache_size = cache_size
+        self._network: Optional[TransitNetwork] = None
+        self._pair_codes: Optional[np.ndarray] = None
+        self._pairs: Optional[pd.DataFrame] = None
+        self._transit_labels: Optional[np.ndarray] = None
+        self._queries: OrderedDict = OrderedDict()
+        self._pages: OrderedDict = OrderedDict()
+        self.stats = {'page_hits': 0, 'page_misses': 0}
+
+    @property
+    def network(self) -> TransitNetwork:
+        """整个筛选结果的航线网络（首次需要中转地分析时构建）"""
+        if self._network is None:
+            self._network = TransitNetwork(self.routes)
+        return self._network
+
+    def _text_array(self, column: str) -> np.ndarray:
+        return self.routes[column].astype(str).to_numpy()
+
+    def _unique_pairs(self):
+        """(始发地, 目的地) 去重后的编码：派生列按航线对计算"""
+        if self._pair_codes is None:
+            pairs = pd.DataFrame({'origin': self._text_array('origin'), 'destination': self._text_array('destination')})
+            codes, uniques = pd.MultiIndex.from_frame(pairs).factorize()
+            self._pair_codes = codes
+            self._pairs = uniques.to_frame(index=False, name=['origin', 'destination'])
+        return self._pair_codes, self._pairs
+
+    def transit_labels(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """中转地分析标签；指定行时只计算这些行涉及的航线对"""
+        codes, pairs = self._unique_pairs()
+        if self._transit_labels is None:
+            self._transit_labels = np.full(len(pairs), None, dtype=object)
+        needed = np.unique(codes if rows is None else codes[rows])
+        labels = self._transit_labels
+        for code in needed[pd.isna(labels[needed])]:
+            labels[code] = self.network.label(pairs.at[code, 'origin'], pairs.at[code, 'destination'])
+        return labels[codes if rows is None else codes[rows]]
+
+    def label_counts(self, column: str) -> pd.Series:
+        """派生列在全部行上的取值计数（中转地分析按航线对计算后加权）"""
+        codes, pairs = self._unique_pairs()
+        if column == '中转地分析':
+            self.transit_labels()
+            values = self._transit_labels
+        elif column in DISPLAY_COLUMNS:
+            return self.routes[column].value_counts()
+        else:
+            raise KeyError(column)
+        weights = np.bincount(codes, minlength=len(pairs))
+        return pd.Series(weights, index=values).groupby(level=0, sort=False).sum().sort_values(ascending=False, kind='stable')
+
+    def summary(self) -> Dict[str, int]:
+        """明细表顶部的汇总指标"""
+        direction = self.routes['direction'] if 'direction' in self.routes.columns else pd.Series([], dtype=object)
+        transit = self.label_counts('中转地分析')
+        transit_count = int(transit[transit.index.str.contains('🔀', na=False)].sum())
+        return {
+            'records': self.size,
+            'airlines': int(self.routes['airline'].nunique()),
+            'aircrafts': int(self.routes['aircraft'].nunique()),
+            'exports': int((direction == '出口').sum()),
+            'imports': int((direction == '进口').sum()),
+            'transit': transit_count,
+            'direct': self.size - transit_count,
+        }
+
+    def search_rows(self, search: str) -> np.ndarray:
+        """包含搜索文本（不区分大小写）的行号；每列的不同取值只匹配一次"""
+        if not search:
+            return np.arange(self.size)
+        mask = np.zeros(self.size, dtype=bool)
+        for column in SEARCH_COLUMNS:
+            if column not in self.routes.columns:
+                continue
+            codes, uniques = pd.factorize(self.routes[column])
+            matched = pd.Series(display_strings(uniques), dtype=object).str.contains(search, case=False, regex=False).to_numpy(dtype=bool)
+            mask |= np.append(matched, False)[codes]
+        return np.flatnonzero(mask)
+
+    def sort_key(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """排序键：(数值键, 是否缺失)。数值列按数值，文本列按取值的字符串顺序"""
+        source = NUMERIC_SORT_COLUMNS.get(column)
+        if source in self.routes.columns:
+            values = self.routes[source].to_numpy(dtype=float, na_value=np.nan)
+            return np.nan_to_num(values), np.isnan(values)
+        column = next((key for key, label in COLUMN_LABELS.items() if label == column), column)
+        if column == '中转地分析':
+            values = pd.Series(self.transit_labels(), dtype=object)
+        elif column in self.routes.columns:
+            values = self.routes[column]
+        else:
+            return np.zeros(self.size), np.zeros(self.size, dtype=bool)
+        codes, uniques = pd.factorize(pd.Series(values).reset_index(drop=True))
+        labels = display_strings(uniques)
+        ranks = np.empty(len(labels) + 1, dtype=np.int64)
+        ranks[np.argsort(labels.astype(str), kind='stable')] = np.arange(len(labels))
+        ranks[-1] = 0
+        return ranks[codes].astype(float), (codes < 0) | (np.append(labels, '')[codes] == '')
+
+    def query(self, search: str = '', sort_by: Optional[str] = None, ascending: bool = True) -> np.ndarray:
+        """搜索并排序后的行号（缓存最近的查询）"""
+        key = (search, sort_by, ascending)
+        if key in self._queries:
+            self._queries.move_to_end(key)
+            return self._queries[key]
+
+        rows = self.search_rows(search)
+        if sort_by:
+            values, missing = self.sort_key(sort_by)
+            values, missing = values[rows], missing[rows]
+            # 缺失值始终排在最后，相同键保持原顺序
+            order = np.lexsort((np.arange(len(rows)), values if ascending else -values, missing))
+            rows = rows[order]
+
+        self._queries[key] = rows
+        if len(self._queries) > self.cache_size:
+            self._queries.popitem(last=False)
+        return rows
+
+    def build_page(self, rows: np.ndarray) -> pd.DataFrame:
+        """取出指定行的显示列并转成字符串，补充中转地分析，列名和顺序与完整明细表一致"""
+        page = self.routes.iloc[rows]
+        frame = pd.DataFrame(index=page.index)
+        for column in [col for col in page.columns if COLUMN_LABELS.get(col) in DISPLAY_ORDER]:
+            frame[column] = display_strings(page[column].to_numpy(dtype=object))
+        frame['中转地分析'] = self.transit_labels(rows)
+        if 'speed' in page.columns:
+            frame['speed'] = [format_speed(v) for v in page['speed'].to_numpy(dtype=object)]
+        if 'flight_distance' in frame.columns:
+            frame['flight_distance'] = frame['flight_distance'].replace(['', ' '], '未知')
+
+        frame = frame.rename(columns=COLUMN_LABELS)
+        return frame[[label for label in DISPLAY_ORDER if label in frame.columns]]
+
+    def page(self, page_number: int, page_size: int = DEFAULT_PAGE_SIZE, search: str = '',
+             sort_by: Optional[str] = None, ascending: bool = True) -> Tuple[pd.DataFrame, dict]:
+        """取一页明细
+
+        Args:
+            page_number: 页码（从 1 开始，超出范围时取最后一页）
+
+        Returns:
+            (当前页的显示表, {'total', 'pages', 'page', 'seconds', 'cached'})
+        """
+        start = time.perf_counter()
+        rows = self.query(search, sort_by, ascending)
+        pages = max(1, -(-len(rows) // page_size))
+        page_number = min(max(1, int(page_number)), pages)
+
+        key = (search, sort_by, ascending, page_number, page_size)
+        cached = key in self._pages
+        if cached:
+            self._pages.move_to_end(key)
+            self.stats['page_hits'] += 1
+            frame = self._pages[key]
+        else:
+            self.stats['page_misses'] += 1
+            frame = self.build_page(rows[(page_number - 1) * page_size:page_number * page_size])
+            self._pages[key] = frame
+            if len(self._pages) > self.cache_size:
+                self._pages.popitem(last=False)
+
+        return frame, {
+            'total': len(rows),
+            'pages': pages,
+            'page': page_number,
+            'seconds': time.perf_counter() - start,
+            'cached': cached,
+        }
@@ -0,0 +1,119 @@
+# D:\flight_tool\display_columns.py
+"""明细表派生列：航线类型、中转站、进出口类型和每周往返班次的向量化计算"""
+import re
+from typing import List
+import numpy as np
+import pandas as pd
+from transit_analysis import TRANSIT_SEPARATORS
+
+# 任一中转分隔符
+TRANSIT_SEPARATOR_RE = '|'.join(re.escape(sep) for sep in TRANSIT_SEPARATORS)
+
+DIRECT = '✈️ 直飞'
+TRANSIT = '🔄 中转'
+
+# 派生列（全部保存为分类列）
+DISPLAY_COLUMNS = ['航线范围', '航线类型', '中转站', '进出口类型', 'route_count', '每周往返班次']
+
+
+def route_scope(origin_category: pd.Series, destination_category: pd.Series) -> np.ndarray:
+    """国内航线 / 国际航线 / 未分类（任一端未知时为未分类）"""
+    origin_category = origin_category.astype(object).to_numpy()
+    destination_category = destination_category.astype(object).to_numpy()
+    unknown = (origin_category == '未知') | (destination_category == '未知')
+    return np.select(
+        [unknown,
+         (origin_category == '国内') & (destination_category == '国内'),
+         (origin_category == '国际') | (destination_category == '国际')],
+        ['未分类', '国内航线', '国际航线'],
+        default='未分类'
+    ).astype(object)
+
+
+def _split_transits(names: pd.Series, keep: slice) -> List[List[str]]:
+    """按第一个出现的分隔符（按 TRANSIT_SEPARATORS 优先级）拆分，返回保留部分中非空的站点"""
+    names = names.astype(str)
+    has_sep = [names.str.contains(sep, regex=False).to_numpy(dtype=bool) for sep in TRANSIT_SEPARATORS]
+    chosen = np.select(has_sep, TRANSIT_SEPARATORS, default='')
+
+    stations: List[List[str]] = [[] for _ in range(len(names))]
+    for sep in TRANSIT_SEPARATORS:
+        positions = np.flatnonzero(chosen == sep)
+        if len(positions) == 0:
+            continue
+        parts = names.iloc[positions].str.split(sep, regex=False)
+        for position, pieces in zip(positions, parts):
+            if len(pieces) > 1:
+                stations[position] = [piece.strip() for piece in pieces[keep] if piece.strip()]
+    return stations
+
+
+def transit_stations(origins: pd.Series, destinations: pd.Series) -> np.ndarray:
+    """中转站：目的地中除最后一段外的各段，加上始发地中除第一段外的各段（去重保序）"""
+    destination_stations = _split_transits(destinations.str.strip(), slice(None, -1))
+    origin_stations = _split_transits(origins.str.strip(), slice(1, None))
+    return np.array([
+        ', '.join(dict.fromkeys(dest + origin))
+        for dest, origin in zip(destination_stations, origin_stations)
+    ], dtype=object)
+
+
+def route_kinds(origins: pd.Series, destinations: pd.Series) -> np.ndarray:
+    """直飞 / 中转：始发地或目的地中含任一分隔符即为中转"""
+    has_transit = (origins.str.contains(TRANSIT_SEPARATOR_RE, regex=True).to_numpy(dtype=bool)
+                   | destinations.str.contains(TRANSIT_SEPARATOR_RE, regex=True).to_numpy(dtype=bool))
+    return np.where(has_transit, TRANSIT, DIRECT).astype(object)
+
+
+def weekly_roundtrip_labels(counts: np.ndarray) -> np.ndarray:
+    """每周往返班次：每条记录按单程计，往返数为记录数的一半"""
+    counts = np.asarray(counts, dtype=float)
+    unique_counts, inverse = np.unique(counts, return_inverse=True)
+    roundtrips = unique_counts / 2
+    text = np.array([f"{value:.1f}" for value in roundtrips], dtype=object)
+    labels = np.select(
+        [roundtrips < 1, roundtrips == 1, roundtrips <= 7],
+        ['每周不足1往返', '每周1往返', '每周' + text + '往返'],
+        default='高频(' + text + '往返/周)'
+    ).astype(object)
+    return labels[inverse.ravel()]
+
+
+def add_display_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """为整个数据集补充明细表派生列（返回新表，派生列为分类类型）"""
+    result = df.copy()
+    if df.empty or 'origin' not in df.columns or 'destination' not in df.columns:
+        return result
+
+    # 城市相关的列只在不同的 (始发地, 目的地) 组合上计算
+    pairs = pd.DataFrame({
+        'origin': df['origin'].astype(str).to_numpy(),
+        'destination': df['destination'].astype(str).to_numpy(),
+    })
+    pair_codes, unique_pairs = pd.MultiIndex.from_frame(pairs).factorize()
+    unique_pairs = unique_pairs.to_frame(index=False, name=['origin', 'destination'])
+    origins, destinations = unique_pairs['origin'], unique_pairs['destination']
+
+    if 'origin_category' in df.columns and 'destination_category' in df.columns:
+        result['航线范围'] = pd.Categorical(route_scope(df['origin_category'], df['destination_category']))
+    else:
+        result['航线范围'] = pd.Categorical(np.full(len(df), '未分类', dtype=object))
+
+    kinds = route_kinds(origins, destinations)[pair_codes]
+    result['航线类型'] = pd.Categorical(kinds)
+    result['中转站'] = pd.Categorical(transit_stations(origins, destinations)[pair_codes])
+
+    if 'direction' in df.columns:
+        # 方向只有少数几个取值，按不同取值转字符串（缺失值与原实现一样显示为 'nan'）
+        direction_codes, directions = pd.factorize(df['direction'])
+        direction = np.array([str(value) for value in directions] + ['nan'], dtype=object)[direction_codes]
+    else:
+        direction = np.full(len(df), 'nan', dtype=object)
+    kind_text = np.where(kinds == TRANSIT, '中转', '直飞').astype(object)
+    result['进出口类型'] = pd.Categorical(direction + ' (' + kind_text + ')')
+
+    # 航线频次：相同 (始发地, 目的地) 的记录数
+    route_count = np.bincount(pair_codes, minlength=len(unique_pairs))[pair_codes]
+    result['route_count'] = route_count
+    result['每周往返班次'] = pd.Categorical(weekly_roundtrip_labels(route_count))
+    return result
@@ -0,0 +1,80 @@
+# D:\flight_tool\excel_stream.py
+"""Excel 流式分块读取（openpyxl 只读模式，按块产出 DataFrame）"""
+import os
+from typing import Iterator, List, Optional
+import pandas as pd
+
+# 默认每块行数
+DEFAULT_CHUNK_ROWS = 5000
+
+# openpyxl 只读模式支持的扩展名
+STREAMING_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def make_column_names(header) -> List[str]:
+    """表头转列名：空表头命名为 'Unnamed: i'，重复列名追加 '.1'、'.2'（与 pd.read_excel 一致）"""
+    names = []
+    seen = {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None or str(value).strip() == '' else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _frame(rows, columns) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=columns, dtype=object)
+
+
+def iter_excel_chunks(file_path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                      sheet_name: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """按块读取工作表（第一行为表头），依次产出 DataFrame 块
+
+    块的行索引在整张表中连续编号（与整表读取时的行号一致）。
+    """
+    if not file_path.lower().endswith(STREAMING_EXTENSIONS):
+        df = pd.read_excel(file_path, sheet_name=sheet_name or 0)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = make_column_names(header)
+        width = len(columns)
+
+        start = 0
+        buffer = []
+        for row in rows:
+            # 只读模式下各行长度可能不一致，按表头宽度截断/补齐
+            if len(row) != width:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                chunk = _frame(buffer, columns)
+                chunk.index = pd.RangeIndex(start, start + len(buffer))
+                start += len(buffer)
+                buffer = []
+                yield chunk
+        if buffer:
+            chunk = _frame(buffer, columns)
+            chunk.index = pd.RangeIndex(start, start + len(buffer))
+            yield chunk
+    finally:
+        # 只读模式需要显式关闭以释放文件句柄
+        workbook.close()
+
+
+def is_streamable(file_path: str) -> bool:
+    """是否可以用 openpyxl 只读模式流式读取"""
+    return os.path.splitext(file_path)[1].lower() in STREAMING_EXTENSIONS
@@ -0,0 +1,162 @@
+# D:\flight_tool\filter_engine.py
+"""列式筛选引擎：按取值预先生成位图，按位与筛选并统计分面计数"""
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+# 按取值筛选的列：筛选键 -> 数据列
+VALUE_FILTERS = {
+    'airline': 'airline',
+    'origin': 'origin',
+    'destination': 'destination',
+    'aircraft': 'aircraft',
+    'direction': 'direction',
+}
+
+# 组合条件筛选（由城市分类和方向推导）
+DERIVED_FILTERS = ('route_type', 'advanced_filter')
+
+ALL_VALUE = '全部'
+
+
+class FilterIndex:
+    """航线表的筛选索引
+
+    Args:
+        routes_df: 航线数据（建索引后不应再修改）
+    """
+
+    def __init__(self, routes_df: pd.DataFrame):
+        self.routes_df = routes_df
+        self.size = len(routes_df)
+        self._all = np.ones(self.size, dtype=bool)
+        self._codes: Dict[str, np.ndarray] = {}
+        self._values: Dict[str, pd.Index] = {}
+        self._bitmaps: Dict[str, Dict[object, np.ndarray]] = {}
+
+        for key, column in VALUE_FILTERS.items():
+            if column in routes_df.columns:
+                self._index_column(key, routes_df[column])
+
+        self._bitmaps.update(self._derived_bitmaps(routes_df))
+
+    def _index_column(self, key: str, series: pd.Series):
+        """分解为整数编码（空值为 -1），并为每个取值生成位图"""
+        codes, values = pd.factorize(series, sort=False)
+        codes = codes.astype(np.int32, copy=False)
+        self._codes[key] = codes
+        self._values[key] = pd.Index(values)
+
+        # 按编码排序后切分，一次得到每个取值的行号
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        bitmaps = {}
+        for code, value in enumerate(values):
+            bitmap = np.zeros(self.size, dtype=bool)
+            bitmap[order[bounds[code]:bounds[code + 1]]] = True
+            bitmaps[value] = bitmap
+        self._bitmaps[key] = bitmaps
+
+    def _derived_bitmaps(self, routes_df: pd.DataFrame) -> dict:
+        """航线类型和高级筛选（进出口 + 航线类型组合）的位图"""
+        def equals(column, value):
+            if column not in routes_df.columns:
+                return np.zeros(self.size, dtype=bool)
+            return (routes_df[column] == value).to_numpy(dtype=bool, na_value=False)
+
+        origin_domestic = equals('origin_category', '国内')
+        origin_international = equals('origin_category', '国际')
+        dest_domestic = equals('destination_category', '国内')
+        dest_international = equals('destination_category', '国际')
+        export = equals('direction', '出口')
+        import_ = equals('direction', '进口')
+
+        return {
+            'route_type': {
+                # 国内航线：起点和终点都是国内城市；国际航线：至少一端是国际城市
+                '国内航线': origin_domestic & dest_domestic,
+                '国际航线': origin_international | dest_international,
+            },
+            'advanced_filter': {
+                '国际出口航线': origin_domestic & dest_international & export,
+                '国际进口航线': origin_international & dest_domestic & import_,
+                '国内出口航线': origin_domestic & dest_domestic & export,
+                '国际中转航线': origin_international & dest_international,
+            },
+        }
+
+    def bitmap(self, key: str, value) -> np.ndarray:
+        """单个条件的位图；'全部' 返回全选，未知取值返回空集"""
+        if value is None or value == ALL_VALUE:
+            return self._all
+        bitmaps = self._bitmaps.get(key)
+        if bitmaps is None:
+            return self._all
+        bitmap = bitmaps.get(value)
+        if bitmap is None:
+            return np.zeros(self.size, dtype=bool)
+        return bitmap
+
+    def normalize_selection(self, selection: dict) -> dict:
+        """把分组标题和当前数据集中不存在的取值替换为 '全部'"""
+        normalized = {}
+        for key, value in selection.items():
+            known = value in self._bitmaps.get(key, {}) if value is not None else False
+            normalized[key] = value if known else ALL_VALUE
+        return normalized
+
+    def mask(self, selection: dict, exclude: Optional[str] = None) -> np.ndarray:
+        """所有选中条件按位与后的行掩码（可排除某一个筛选键）"""
+        result = None
+        for key, value in selection.items():
+            if key == exclude or value is None or value == ALL_VALUE:
+                continue
+            bitmap = self.bitmap(key, value)
+            result = bitmap.copy() if result is None else np.logical_and(result, bitmap, out=result)
+        return self._all.copy() if result is None else result
+
+    def positions(self, selection: dict) -> np.ndarray:
+        """满足筛选条件的行号"""
+        return np.flatnonzero(self.mask(selection))
+
+    def select(self, selection: dict) -> pd.DataFrame:
+        """按行号一次性取出筛选结果"""
+        if all(value in (None, ALL_VALUE) for value in selection.values()):
+            return self.routes_df
+        return self.routes_df.iloc[self.positions(selection)]
+
+    def facet_counts(self, selection: dict, keys: Optional[List[str]] = None) -> Dict[str, Dict[object, int]]:
+        """分面计数：每个筛选键的各取值在“其余条件”下的行数
+
+        返回 {筛选键: {取值: 行数, '全部': 行数}}。
+        """
+        keys = keys or list(self._bitmaps.keys())
+        facets = {}
+        for key in keys:
+            others = self.mask(selection, exclude=key)
+            counts = {ALL_VALUE: int(others.sum())}
+            if key in self._codes:
+                codes = self._codes[key][others]
+                tally = np.bincount(codes[codes >= 0], minlength=len(self._values[key]))
+                counts.update(zip(self._values[key], tally.tolist()))
+            else:
+                for value, bitmap in self._bitmaps.get(key, {}).items():
+                    counts[value] = int(np.count_nonzero(others & bitmap))
+            facets[key] = counts
+        return facets
+
+    def memory_bytes(self) -> int:
+        """索引占用的内存（字节）"""
+        total = sum(codes.nbytes for codes in self._codes.values())
+        for bitmaps in self._bitmaps.values():
+            total += sum(bitmap.nbytes for bitmap in bitmaps.values())
+        return total
+
+
+def format_option(counts: dict):
+    """生成 selectbox 的 format_func：在选项后显示剩余行数"""
+    def format_func(option):
+        if isinstance(option, str) and option.startswith('---'):
+            return option
+        return f"{option} ({counts.get(option, 0)})"
+    return format_func
@@ -1,132 +1,136 @@
 import pandas as pd
-import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+from excel_stream import iter_excel_chunks, DEFAULT_CHUNK_ROWS
+from route_tokenizer import split_route, clean_city_name as tokenizer_clean_city_name
+from city_classifier import city_classifier
 
-def parse_excel_route_data(file_path: str) -> pd.DataFrame:
-    """专门解析大陆航司全货机航线.xlsx文件的函数"""
-    try:
-        # 读取Excel文件
-        df = pd.read_excel(file_path)
-        print(f"原始数据形状: {df.shape}")
-        print(f"列名: {list(df.columns)}")
-        
-        all_routes = []
-        
-        # 统计信息
-        unique_airlines = df['航司'].dropna().unique()
-        total_airlines = len(unique_airlines)
-        airlines_with_routes_set = set()
-        
-        # 遍历每一行，处理分组数据结构
-        current_airline = None
-        current_reg_no = None
-        current_aircraft = None
-        current_age = None
-        
-        for idx, row in df.iterrows():
+# 解析逻辑版本号：修改解析结果时递增，使解析缓存失效
+PARSER_VERSION = 3
+
+# 空航线的占位文本
+EMPTY_ROUTE_TEXTS = ['无近一个月的飞行记录', '停场维修', '']
+
+
+def _route_records(route_text, direction: str, base: dict) -> List[Dict[str, Any]]:
+    """把一个航线单元格解析为航线记录列表"""
+    if not (pd.notna(route_text) and str(route_text).strip() and str(route_text) != 'nan'):
+        return []
+    route_str = str(route_text).strip()
+    if route_str in EMPTY_ROUTE_TEXTS:
+        return []
+
+    records = []
+    for route_info in parse_route_string(route_str):
+        if len(route_info) == 3:  # 多段航线
+            origin, destination, full_route = route_info
+        else:  # 单段航线也保存完整信息
+            origin, destination = route_info
+            full_route = f"{origin}—{destination}"
+        records.append({
+            'airline': base['airline'],
+            'reg': base['reg'],
+            'aircraft': base['aircraft'],
+            'age': base['age'],
+            'origin': origin,
+            'destination': destination,
+            'full_route': full_route,  # 保存完整航线信息
+            'direction': direction,
+            'remarks': base['remarks'],
+        })
+    return records
+
+
+def iter_route_records(file_path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                       stats: Optional[dict] = None) -> Iterator[Dict[str, Any]]:
+    """流式读取工作簿，逐条产出航线记录
+
+    工作表按块读取，分组结构中的当前航司/注册号/机型/机龄在块之间延续。
+
+    Args:
+        stats: 可选的统计字典，读取过程中填充 rows（原始行数）、columns（列名）、
+            airlines（出现过的航司）、airlines_with_routes（有航线的航司）
+    """
+    if stats is None:
+        stats = {}
+    stats.update({'rows': 0, 'columns': [], 'airlines': set(), 'airlines_with_routes': set()})
+
+    # 遍历每一行，处理分组数据结构（状态跨块保留）
+    current_airline = None
+    current_reg_no = None
+    current_aircraft = None
+    current_age = None
+
+    for chunk in iter_excel_chunks(file_path, chunk_rows):
+        if not stats['columns']:
+            stats['columns'] = list(chunk.columns)
+        stats['rows'] += len(chunk)
+        if '航司' in chunk.columns:
+            stats['airlines'].update(chunk['航司'].dropna().unique())
+
+        for row in chunk.to_dict('records'):
             airline = row.get('航司', '')
             reg_no = row.get('注册号', '')
             aircraft = row.get('机型', '')
             age = row.get('机龄', '')
-            export_routes = row.get('出口航线', '')
-            import_routes = row.get('进口航线', '')
             remarks = row.get('备注', '')
-            
+
             # 如果航司不为空，更新当前航司信息
             if pd.notna(airline) and str(airline).strip() != '':
                 current_airline = str(airline).strip()
                 current_reg_no = str(reg_no).strip() if pd.notna(reg_no) else ''
                 current_aircraft = str(aircraft).strip() if pd.notna(aircraft) else ''
                 current_age = str(age).strip() if pd.notna(age) else ''
-            
+
             # 如果没有当前航司信息，跳过
             if not current_airline:
                 continue
-            
-            has_routes = False
-            
-            # 处理出口航线
-            if pd.notna(export_routes) and str(export_routes).strip() and str(export_routes) != 'nan':
-                export_route_str = str(export_routes).strip()
-                if export_route_str and export_route_str not in ['无近一个月的飞行记录', '停场维修', '']:
-                    # 解析航线字符串
-                    routes = parse_route_string(export_route_str)
-                    for route_info in routes:
-                        if len(route_info) == 3:  # 多段航线
-                            origin, destination, full_route = route_info
-                            all_routes.append({
-                                'airline': current_airline,
-                                'reg': current_reg_no,
-                                'aircraft': current_aircraft,
-                                'age': current_age,
-                                'origin': origin,
-                                'destination': destination,
-                                'full_route': full_route,  # 保存完整航线信息
-                                'direction': '出口',
-                                'remarks': str(remarks).strip() if pd.notna(remarks) else ''
-                            })
-                        else:  # 单段航线
-                            origin, destination = route_info
-                            all_routes.append({
-                                'airline': current_airline,
-                                'reg': current_reg_no,
-                                'aircraft': current_aircraft,
-                                'age': current_age,
-                                'origin': origin,
-                                'destination': destination,
-                                'full_route': f"{origin}—{destination}",  # 单段航线也保存完整信息
-                                'direction': '出口',
-                                'remarks': str(remarks).strip() if pd.notna(remarks) else ''
-                            })
-                        has_routes = True
-            
-            # 处理进口航线
-            if pd.notna(import_routes) and str(import_routes).strip() and str(import_routes) != 'nan':
-                import_route_str = str(import_routes).strip()
-                if import_route_str and import_route_str not in ['无近一个月的飞行记录', '停场维修', '']:
-                    # 解析航线字符串
-                    routes = parse_route_string(import_route_str)
-                    for route_info in routes:
-                        if len(route_info) == 3:  # 多段航线
-                            origin, destination, full_route = route_info
-                            all_routes.append({
-                                'airline': current_airline,
-                                'reg': current_reg_no,
-                                'aircraft': current_aircraft,
-                                'age': current_age,
-                                'origin': origin,
-                                'destination': destination,
-                                'full_route': full_route,  # 保存完整航线信息
-                                'direction': '进口',
-                                'remarks': str(remarks).strip() if pd.notna(remarks) else ''
-                            })
-                        else:  # 单段航线
-                            origin, destination = route_info
-                            all_routes.append({
-                                'airline': current_airline,
-                                'reg': current_reg_no,
-                                'aircraft': current_aircraft,
-                                'age': current_age,
-                                'origin': origin,
-                                'destination': destination,
-                                'full_route': f"{origin}—{destination}",  # 单段航线也保存完整信息
-                                'direction': '进口',
-                                'remarks': str(remarks).strip() if pd.notna(remarks) else ''
-                            })
-                        has_routes = True
-            
+
+            base = {
+                'airline': current_airline,
+                'reg': current_reg_no,
+                'aircraft': current_aircraft,
+                'age': current_age,
+                'remarks': str(remarks).strip() if pd.notna(remarks) else '',
+            }
+            records = (_route_records(row.get('出口航线', ''), '出口', base) +
+                       _route_records(row.get('进口航线', ''), '进口', base))
+
             # 记录有航线的航司
-            if has_routes:
-                airlines_with_routes_set.add(current_airline)
+            if records:
+                stats['airlines_with_routes'].add(current_airline)
+            yield from records
+
+
+def parse_excel_route_data(file_path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+    """专门解析大陆航司全货机航线.xlsx文件的函数
+
+    工作簿按块流式读取，航线记录每 chunk_rows 条转换为一个 DataFrame 块，最后合并。
+    """
+    try:
+        stats = {}
+        frames = []
+        batch = []
+        for record in iter_route_records(file_path, chunk_rows, stats):
+            batch.append(record)
+            if len(batch) >= chunk_rows:
+                frames.append(pd.DataFrame(batch))
+                batch = []
+        if batch:
+            frames.append(pd.DataFrame(batch))
+
+        print(f"原始数据形状: ({stats['rows']}, {len(stats['columns'])})")
+        print(f"列名: {stats['columns']}")
+
+        total_airlines = len(stats['airlines'])
+        airlines_with_routes_set = stats['airlines_with_routes']
+        result_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
         
         # 计算最终统计
         airlines_with_routes = len(airlines_with_routes_set)
         airlines_without_routes = total_airlines - airlines_with_routes
         
-        result_df = pd.DataFrame(all_routes)
-        
         print(f"\n=== 数据解析完整报告 ===")
-        print(f"总记录数: {len(df)}")
+        print(f"总记录数: {stats['rows']}")
         print(f"总航司数: {total_airlines}")
         print(f"有航线数据的航司: {airlines_with_routes}")
         print(f"无航线数据的航司: {airlines_without_routes}")
@@ -174,76 +178,19 @@ def parse_excel_route_data(file_path: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 def parse_route_string(route_str: str) -> List[tuple]:
-    """解析航线字符串，保持多段航线的完整性"""
-    routes = []
-    
-    # 清理字符串
-    route_str = route_str.strip()
-    
-    # 常见的分隔符
-    separators = ['—', '-', '→', '->', '至', '到']
-    
-    # 尝试用不同分隔符分割
-    for sep in separators:
-        if sep in route_str:
-            parts = route_str.split(sep)
-            if len(parts) >= 2:
-                # 不管是两段还是多段，都保持完整的航线
-                origin = clean_city_name(parts[0].strip())
-                destination = clean_city_name(parts[-1].strip())  # 取最后一个作为终点
-                
-                # 如果是多段航线，保留完整的航线描述
-                if len(parts) > 2:
-                    # 构建完整的多段航线描述
-                    cleaned_parts = [clean_city_name(part.strip()) for part in parts if clean_city_name(part.strip())]
-                    if len(cleaned_parts) >= 2:
-                        full_route = sep.join(cleaned_parts)
-                        routes.append((origin, destination, full_route))  # 添加完整航线信息
-                else:
-                    if origin and destination:
-                        routes.append((origin, destination))
-                break
-    
-    return routes
+    """解析航线字符串，保持多段航线的完整性
+
+    分隔符选择、城市名清理和结果由 route_tokenizer 按不同字符串缓存。
+    """
+    return list(split_route(route_str))
 
 def clean_city_name(city_name: str) -> str:
     """清理城市名称"""
-    if not city_name:
-        return ''
-    
-    # 移除常见的后缀
-    suffixes_to_remove = ['机场', '国际机场', '空港', 'Airport', 'International']
-    
-    cleaned = city_name.strip()
-    
-    for suffix in suffixes_to_remove:
-        if cleaned.endswith(suffix):
-            cleaned = cleaned[:-len(suffix)].strip()
-    
-    # 移除括号及其内容
-    cleaned = re.sub(r'\([^)]*\)', '', cleaned).strip()
-    
-    return cleaned
+    return tokenizer_clean_city_name(city_name)
 
 def is_domestic_city(city_name: str) -> bool:
     """判断是否为国内城市"""
-    domestic_cities = {
-        '北京', '上海', '广州', '深圳', '成都', '重庆', '杭州', '南京', '武汉', '西安',
-        '天津', '青岛', '大连', '厦门', '宁波', '郑州', '长沙', '哈尔滨', '沈阳', '济南',
-        '福州', '石家庄', '太原', '合肥', '南昌', '昆明', '贵阳', '兰州', '银川', '西宁',
-        '乌鲁木齐', '拉萨', '海口', '三亚', '呼和浩特', '长春', '大庆', '包头', '鄂州',
-        '浦东', '首都', '双流', '桃仙', '白云', '宝安', '萧山', '禄口', '天河', '咸阳',
-        '滨海', '流亭', '周水子', '高崎', '栎社', '新郑', '黄花', '太平', '桃仙', '遥墙',
-        '长乐', '正定', '武宿', '骆岗', '昌北', '长水', '龙洞堡', '中川', '河东', '曹家堡',
-        '地窝堡', '贡嘎', '美兰', '凤凰', '白塔', '二连浩特', '芜湖'
-    }
-    
-    # 检查城市名称是否包含国内城市关键词
-    for domestic_city in domestic_cities:
-        if domestic_city in city_name:
-            return True
-    
-    return False
+    return city_classifier.is_domestic(city_name)
 
 if __name__ == "__main__":
     # 测试解析函数
@@ -0,0 +1,160 @@
+# D:\flight_tool\flow_layer.py
+"""航线流动动画图层：在一个 Canvas 动画循环中绘制所有高频航线的流动虚线和脉冲点"""
+import json
+from typing import List
+import numpy as np
+from jinja2 import Template
+from branca.element import MacroElement
+from geojson_layer import COORD_DECIMALS
+
+# 频次达到该值的航线绘制流动动画
+FLOW_MIN_FREQUENCY = 5
+
+# 频次达到该值的航线在中点绘制脉冲
+PULSE_MIN_FREQUENCY = 8
+
+# 流动虚线：线段长度和间隔（像素）；每 animation_speed 毫秒前进一个周期，与原 AntPath 的 delay 含义一致
+FLOW_DASH = [15, 25]
+
+# 脉冲周期（毫秒），与原脉冲标记的 CSS 动画一致
+PULSE_PERIOD_MS = 4000
+
+
+def flow_speed(frequency: int) -> float:
+    """流动速度倍数：频次越高流动越快（5班为1倍，20班及以上为2倍）"""
+    return round(1.0 + min(max(frequency - FLOW_MIN_FREQUENCY, 0), 15) / 15, 2)
+
+
+def pulse_radius(frequency: int) -> float:
+    """脉冲点半径（像素），与原脉冲标记的大小一致"""
+    return max(4, min(12, frequency // 2)) / 2
+
+
+class FlowAnimationLayer(MacroElement):
+    """单个画布图层：在一个动画循环中绘制所有航线的流动虚线和脉冲点
+
+    Args:
+        animation_speed: 虚线前进一个周期所需的毫秒数（侧边栏的动画速度设置）
+    """
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function () {
+            var data = {{ this.payload }};
+            var FlowLayer = L.Layer.extend({
+                onAdd: function (map) {
+                    if (!map.getPane('flowPane')) {
+                        var pane = map.createPane('flowPane');
+                        pane.style.zIndex = 450;
+                        pane.style.pointerEvents = 'none';
+                    }
+                    this._canvas = L.DomUtil.create('canvas', 'leaflet-zoom-hide', map.getPane('flowPane'));
+                    this._ctx = this._canvas.getContext('2d');
+                    map.on('moveend zoomend resize', this._reset, this);
+                    this._reset();
+                    this._frame = L.Util.requestAnimFrame(this._draw, this);
+                    return this;
+                },
+                onRemove: function (map) {
+                    L.Util.cancelAnimFrame(this._frame);
+                    map.off('moveend zoomend resize', this._reset, this);
+                    L.DomUtil.remove(this._canvas);
+                    return this;
+                },
+                _reset: function () {
+                    var map = this._map, size = map.getSize(), ratio = window.devicePixelRatio || 1;
+                    var origin = map.containerPointToLayerPoint([0, 0]);
+                    L.DomUtil.setPosition(this._canvas, origin);
+                    this._canvas.width = size.x * ratio;
+                    this._canvas.height = size.y * ratio;
+                    this._canvas.style.width = size.x + 'px';
+                    this._canvas.style.height = size.y + 'px';
+                    this._ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+                    this._size = size;
+                    // 当前缩放级别下的屏幕坐标和包围盒（用于跳过视野外的航线）
+                    this._projected = data.f.map(function (flow) {
+                        var minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+                        var lines = flow[5].map(function (coords) {
+                            var points = [];
+                            for (var i = 0; i < coords.length; i += 2) {
+                                var p = map.latLngToLayerPoint([coords[i], coords[i + 1]]).subtract(origin);
+                                points.push(p);
+                                minX = Math.min(minX, p.x); maxX = Math.max(maxX, p.x);
+                                minY = Math.min(minY, p.y); maxY = Math.max(maxY, p.y);
+                            }
+                            return points;
+                        });
+                        var all = [].concat.apply([], lines);
+                        return {lines: lines, mid: all[Math.floor(all.length / 2)],
+                                box: [minX - 20, minY - 20, maxX + 20, maxY + 20]};
+                    });
+                },
+                _draw: function (time) {
+                    var ctx = this._ctx, size = this._size, period = data.d[0] + data.d[1];
+                    var pulse = 0.5 - 0.5 * Math.cos(2 * Math.PI * (time % data.p) / data.p);
+                    ctx.clearRect(0, 0, size.x, size.y);
+                    ctx.lineCap = 'round';
+                    for (var i = 0; i < data.f.length; i++) {
+                        var flow = data.f[i], shape = this._projected[i], box = shape.box;
+                        if (box[2] < 0 || box[3] < 0 || box[0] > size.x || box[1] > size.y) { continue; }
+                        ctx.strokeStyle = ctx.fillStyle = data.c[flow[0]];
+                        ctx.lineWidth = flow[1];
+                        ctx.globalAlpha = flow[2];
+                        ctx.setLineDash(data.d);
+                        ctx.lineDashOffset = -((time * flow[3] / data.s * period) % period);
+                        ctx.beginPath();
+                        shape.lines.forEach(function (points) {
+                            ctx.moveTo(points[0].x, points[0].y);
+                            for (var j = 1; j < points.length; j++) { ctx.lineTo(points[j].x, points[j].y); }
+                        });
+                        ctx.stroke();
+                        if (flow[4] > 0) {
+                            ctx.globalAlpha = 0.8 - 0.4 * pulse;
+                            ctx.beginPath();
+                            ctx.arc(shape.mid.x, shape.mid.y, flow[4] * (0.8 + 0.3 * pulse), 0, 2 * Math.PI);
+                            ctx.fill();
+                        }
+                    }
+                    this._frame = L.Util.requestAnimFrame(this._draw, this);
+                }
+            });
+            return new FlowLayer().addTo({{ this._parent.get_name() }});
+        })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, animation_speed: int = 2000):
+        super().__init__()
+        self._name = 'FlowAnimationLayer'
+        self.animation_speed = max(int(animation_speed), 1)
+        self.colors: List[str] = []
+        self.flows: List[list] = []
+
+    def __len__(self):
+        return len(self.flows)
+
+    def add_flow(self, locations: list, color: str, weight: float, opacity: float, frequency: int):
+        """添加一条航线的流动动画
+
+        Args:
+            locations: folium 折线坐标（单段 [[纬度, 经度], ...] 或多段）
+            color, weight, opacity: 流动虚线的样式
+            frequency: 航班频次（决定流动速度和是否绘制脉冲）
+        """
+        segments = locations if locations and isinstance(locations[0][0], (list, tuple)) else [locations]
+        if color not in self.colors:
+            self.colors.append(color)
+        self.flows.append([
+            self.colors.index(color),
+            weight,
+            round(opacity, 2),
+            flow_speed(frequency),
+            pulse_radius(frequency) if frequency >= PULSE_MIN_FREQUENCY else 0,
+            [np.round(np.asarray(segment, dtype=float), COORD_DECIMALS).ravel().tolist() for segment in segments],
+        ])
+
+    @property
+    def payload(self) -> str:
+        text = json.dumps({'c': self.colors, 's': self.animation_speed, 'd': FLOW_DASH, 'p': PULSE_PERIOD_MS,
+                           'f': self.flows}, separators=(',', ':'))
+        return text.replace('</', '<\\/')
@@ -0,0 +1,247 @@
+# D:\flight_tool\geojson_layer.py
+"""GeoJSON 航线图层：航线和机场输出为一个 FeatureCollection，样式和弹窗在浏览器端生成"""
+import json
+from collections import Counter
+from typing import Dict, List, Tuple
+import numpy as np
+from jinja2 import Template
+from branca.element import MacroElement
+from airport_coords import airport_resolver
+from route_aggregation import RouteAggregate
+from route_geometry import route_geometry
+
+# 机场等级：(最少航班数, 等级名称, 颜色, 图标大小, 影响范围半径米)，矢量图层和逐条绘制模式共用
+AIRPORT_TIERS = [
+    (30, '超级枢纽', '#8B0000', 18, 50000),
+    (20, '主要枢纽', '#FF4500', 15, 35000),
+    (10, '区域枢纽', '#FFD700', 12, 25000),
+    (5, '重要机场', '#4169E1', 10, 15000),
+    (0, '一般机场', '#32CD32', 8, 8000),
+]
+
+# 起降机场标记的样式：角色 -> (图标, 颜色, 名称)
+ENDPOINT_STYLES = {
+    'origin': ('🛫', '#28a745', '始发地'),
+    'destination': ('🛬', '#dc3545', '目的地'),
+    'both': ('⇅', '#6f42c1', '始发地/目的地'),
+}
+
+# 坐标保留的小数位（约 10 米精度）
+COORD_DECIMALS = 4
+
+# 机场弹窗中显示的航司数
+TOP_AIRLINES = 5
+
+
+def _rounded(values: np.ndarray) -> List[float]:
+    return np.round(values, COORD_DECIMALS).tolist()
+
+
+def _line_geometry(path) -> dict:
+    """航线大圆路径 -> GeoJSON 几何（跨越180度经线切开的路径为 MultiLineString）"""
+    lines = [np.round(segment[:, ::-1], COORD_DECIMALS).tolist() for segment in path]
+    if len(lines) == 1:
+        return {'type': 'LineString', 'coordinates': lines[0]}
+    return {'type': 'MultiLineString', 'coordinates': lines}
+
+
+def build_route_features(routes: RouteAggregate, airline_color=None, lod_tolerance: float = 0.0) -> Tuple[dict, dict]:
+    """由航线汇总生成 GeoJSON FeatureCollection
+
+    Args:
+        routes: 筛选结果的航线汇总
+        airline_color: 航司配色函数（机场弹窗中的航司色块）
+        lod_tolerance: 航线路径简化容差（度），0 为完整路径
+
+    Returns:
+        (FeatureCollection, 显示统计字典)
+    """
+    keys = list(routes.routes)
+    origin_lat, origin_lon, origin_missing = airport_resolver.resolve_many([o for o, _ in keys])
+    dest_lat, dest_lon, dest_missing = airport_resolver.resolve_many([d for _, d in keys])
+    valid = ~(origin_missing | dest_missing)
+    valid_index = np.flatnonzero(valid)
+    paths = dict(zip(valid_index.tolist(), route_geometry.paths(
+        origin_lat[valid_index], origin_lon[valid_index], dest_lat[valid_index], dest_lon[valid_index],
+        lod_tolerance)))
+    origin_lat, origin_lon, dest_lat, dest_lon = (
+        _rounded(values) for values in (origin_lat, origin_lon, dest_lat, dest_lon))
+
+    route_features = []
+    airports: Dict[str, dict] = {}
+    routes_without_coords = 0
+    for i, key in enumerate(keys):
+        route = routes.routes[key]
+        if not valid[i]:
+            routes_without_coords += route['count']
+            continue
+        origin, destination = key
+        directions = [str(d) for d in route['directions']]
+        airlines = [str(a) for a in route['airlines']]
+        route_features.append({
+            'type': 'Feature',
+            'geometry': _line_geometry(paths[i]),
+            'properties': {
+                'o': str(origin),
+                'd': str(destination),
+                'n': route['count'],
+                'imp': int(bool(directions) and directions[0] == '进口'),
+                'rt': int(route['is_round_trip']),
+                'tr': int(route['has_transit']),
+                'dir': ' + '.join(directions),
+                'ind': '⇄' if '出口' in directions and '进口' in directions else ('→' if '出口' in directions else '←'),
+                'a': str(route['main_airline']),
+                'al': ', '.join(airlines[:3]) + ('...' if len(airlines) > 3 else ''),
+                'ac': str(route['aircraft'][0]) if route['aircraft'] else '',
+            },
+        })
+
+        # 机场按首次出现顺序记录（始发地在前），航班数为两端记录数之和
+        for city, lat, lon in ((origin, origin_lat[i], origin_lon[i]), (destination, dest_lat[i], dest_lon[i])):
+            airport = airports.setdefault(city, {'lat': lat, 'lon': lon, 'n': 0,
+                                                 'airlines': Counter(), 'aircraft': set()})
+            airport['n'] += route['count']
+            airport['airlines'].update(route['airline_counts'])
+            airport['aircraft'].update(route['aircraft'])
+
+    endpoints = routes.endpoints({key for i, key in enumerate(keys) if valid[i]})
+    airport_features = []
+    for city, airport in airports.items():
+        endpoint = endpoints[city]
+        top = airport['airlines'].most_common(TOP_AIRLINES)
+        airport_features.append({
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Point',
+                'coordinates': [airport['lon'], airport['lat']],
+            },
+            'properties': {
+                'name': str(city),
+                'n': airport['n'],
+                'al': len(airport['airlines']),
+                'ac': len(airport['aircraft']),
+                'role': endpoint['role'],
+                'out': endpoint['outbound_routes'],
+                'in': endpoint['inbound_routes'],
+                'top': [[str(a), int(c), airline_color(str(a)) if airline_color else '#888888'] for a, c in top],
+            },
+        })
+
+    collection = {'type': 'FeatureCollection', 'features': route_features + airport_features}
+    return collection, {
+        'unique_routes_displayed': len(route_features),
+        'routes_without_coords': routes_without_coords,
+        'total_route_records': routes.total_records,
+        'airports_displayed': len(airport_features),
+        'vertices': sum(len(segment) for i in paths for segment in paths[i]),
+    }
+
+
+def dump_features(collection: dict) -> str:
+    """紧凑的 JSON 文本（可直接嵌入 <script>）"""
+    text = json.dumps(collection, ensure_ascii=False, separators=(',', ':'))
+    return text.replace('</', '<\\/')
+
+
+class RouteGeoJson(MacroElement):
+    """单个 GeoJSON 图层：样式、机场标记和弹窗都在浏览器端按要素属性生成"""
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function () {
+            var tiers = {{ this.tiers }};
+            var roles = {{ this.roles }};
+            function esc(value) {
+                return String(value).replace(/[&<>"']/g, function (c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                });
+            }
+            function airportTier(n) {
+                for (var i = 0; i < tiers.length; i++) {
+                    if (n >= tiers[i][0]) { return tiers[i]; }
+                }
+                return tiers[tiers.length - 1];
+            }
+            function routeColor(p) { return p.imp ? '#4CAF50' : '#FFC107'; }
+            function routeKind(p) { return (p.imp ? '🌍 国际进口' : '🌍 国际出口') + (p.tr ? ' (含中转)' : ''); }
+            function routeStyle(p) {
+                var weight = p.n >= 10 ? 6 : p.n >= 5 ? 5 : p.n >= 2 ? 4 : 3;
+                var opacity = p.n >= 10 ? 0.9 : p.n >= 5 ? 0.8 : p.n >= 2 ? 0.7 : 0.6;
+                if (p.rt) {
+                    opacity = Math.min(opacity + 0.1, 1.0);
+                    weight = Math.min(weight + 1, 8);
+                }
+                return {color: routeColor(p), weight: Math.max(1, weight - 1), opacity: opacity * 0.5};
+            }
+            function routePopup(p) {
+                var color = routeColor(p);
+                return "<div style='width: 350px; font-family: Arial, sans-serif; line-height: 1.4;'>" +
+                    "<h3 style='margin: 0; color: " + color + "; border-bottom: 2px solid " + color + "; padding-bottom: 5px;'>✈️ " +
+                    esc(p.o) + " " + p.ind + " " + esc(p.d) + "</h3><div style='margin: 10px 0;'>" +
+                    "<div style='margin: 3px 0; padding: 3px 8px; background: " + color + "20; border-radius: 5px; border-left: 3px solid " + color + ";'><strong>" +
+                    esc(routeKind(p)) + "</strong></div>" +
+                    "<p style='margin: 3px 0;'><b>🏢 主要航司:</b> <span style='color: " + color + ";'>" + esc(p.a) + "</span></p>" +
+                    "<p style='margin: 3px 0;'><b>📊 航班频次:</b> <span style='background: " + color + "; color: white; padding: 2px 6px; border-radius: 3px;'>" + p.n + " 班</span></p>" +
+                    "<p style='margin: 3px 0;'><b>🔄 运营方向:</b> " + esc(p.dir) + "</p>" +
+                    "<p style='margin: 3px 0;'><b>🛫 服务航司:</b> " + esc(p.al) + "</p>" +
+                    "<p style='margin: 3px 0;'><b>✈️ 机型:</b> " + esc(p.ac) + "</p></div></div>";
+            }
+            function airportPopup(p) {
+                var tier = airportTier(p.n), color = tier[2];
+                var html = "<div style='width: 320px; font-family: Arial, sans-serif; line-height: 1.4;'>" +
+                    "<h3 style='margin: 0; color: " + color + "; border-bottom: 2px solid " + color + "; padding-bottom: 5px;'>🛫 " + esc(p.name) + " 机场</h3>" +
+                    "<div style='margin: 10px 0; background: #f8f9fa; padding: 8px; border-radius: 5px;'>" +
+                    "<p style='margin: 3px 0;'><b>🏷️ 机场等级:</b> <span style='color: " + color + "; font-weight: bold;'>" + tier[1] + "</span></p>" +
+                    "<p style='margin: 3px 0;'><b>📊 航班总数:</b> <span style='background: " + color + "; color: white; padding: 1px 5px; border-radius: 3px;'>" + p.n + " 班</span></p>" +
+                    "<p style='margin: 3px 0;'><b>🏢 服务航司:</b> " + p.al + " 家</p>" +
+                    "<p style='margin: 3px 0;'><b>✈️ 机型种类:</b> " + p.ac + " 种</p>" +
+                    "<p style='margin: 3px 0;'><b>🧭 起降角色:</b> " + roles[p.role] + "（出港 " + p.out + " 条 / 进港 " + p.in + " 条航线）</p></div>" +
+                    "<div style='margin: 10px 0;'><h4 style='margin: 5px 0; color: #666; font-size: 13px;'>📈 航司分布:</h4>";
+                p.top.forEach(function (item) {
+                    html += "<div style='margin: 2px 0; display: flex; align-items: center;'>" +
+                        "<div style='width: 12px; height: 12px; background-color: " + item[2] + "; border-radius: 2px; margin-right: 6px;'></div>" +
+                        "<span style='font-size: 11px;'>" + esc(item[0]) + ": " + item[1] + "班 (" + (item[1] / p.n * 100).toFixed(1) + "%)</span></div>";
+                });
+                if (p.al > p.top.length) {
+                    html += "<div style='font-size: 10px; color: #888; margin-top: 3px;'>...还有" + (p.al - p.top.length) + "家航司</div>";
+                }
+                return html + "</div></div>";
+            }
+            return L.geoJSON({{ this.payload }}, {
+                style: function (feature) { return routeStyle(feature.properties); },
+                pointToLayer: function (feature, latlng) {
+                    var tier = airportTier(feature.properties.n);
+                    var marker = L.circleMarker(latlng, {
+                        radius: tier[3] / 2 + 1, color: 'white', weight: 2, fillColor: tier[2], fillOpacity: 0.95
+                    });
+                    if (feature.properties.n < 10) { return marker; }
+                    var area = L.circle(latlng, {
+                        radius: tier[4], color: tier[2], fillColor: tier[2], fillOpacity: 0.08,
+                        weight: 1, opacity: 0.3, interactive: false
+                    });
+                    return L.featureGroup([area, marker]);
+                },
+                onEachFeature: function (feature, layer) {
+                    var p = feature.properties;
+                    if (feature.geometry.type === 'Point') {
+                        layer.bindTooltip(esc(p.name), {permanent: true, direction: 'bottom', offset: [0, 6]});
+                        layer.bindPopup(function () { return airportPopup(p); }, {maxWidth: 370});
+                    } else {
+                        layer.bindTooltip(function () {
+                            return esc(routeKind(p) + ' - ' + p.o + ' → ' + p.d + ' (' + p.n + '班)');
+                        }, {sticky: true});
+                        layer.bindPopup(function () { return routePopup(p); }, {maxWidth: 350});
+                    }
+                }
+            }).addTo({{ this._parent.get_name() }});
+        })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, collection: dict):
+        super().__init__()
+        self._name = 'RouteGeoJson'
+        self.payload = dump_features(collection)
+        self.tiers = json.dumps([list(tier) for tier in AIRPORT_TIERS], ensure_ascii=False)
+        self.roles = json.dumps({role: f'{icon} {name}' for role, (icon, _, name) in ENDPOINT_STYLES.items()},
+                                ensure_ascii=False)
@@ -0,0 +1,73 @@
+# D:\flight_tool\map3d_payload.py
+"""3D地图数据：由航线汇总生成每条有向航线一条的航线列表、数据指纹和统计"""
+import hashlib
+import json
+from typing import Optional, Set, Tuple
+import numpy as np
+from airport_coords import airport_resolver
+from route_aggregation import RouteAggregate
+
+
+def build_map3d_payload(routes: RouteAggregate, bidirectional_pairs: Optional[Set[Tuple]] = None) -> dict:
+    """由航线汇总生成3D地图数据
+
+    Args:
+        routes: 筛选结果的航线汇总
+        bidirectional_pairs: 往返航线视图中有双向数据的城市对（排序后的二元组）；
+            为 None 时按航线汇总判断是否存在反向航线
+
+    Returns:
+        {'routes': 航线对象列表（字段与原 route_data_3d 一致）, 'fingerprint': 数据指纹, 'stats': 统计}
+    """
+    keys = list(routes.routes)
+    origin_lat, origin_lon, origin_missing = airport_resolver.resolve_many([o for o, _ in keys])
+    dest_lat, dest_lon, dest_missing = airport_resolver.resolve_many([d for _, d in keys])
+    missing = origin_missing | dest_missing
+    skipped_records = sum(routes.routes[keys[i]]['count'] for i in np.flatnonzero(missing))
+
+    route_data_3d = []
+    rows = []
+    for i in np.flatnonzero(~missing):
+        route = routes.routes[keys[i]]
+        origin, destination = str(route['origin']), str(route['destination'])
+        if bidirectional_pairs is None:
+            bidirectional = bool(route['is_round_trip'])
+        else:
+            bidirectional = tuple(sorted((route['origin'], route['destination']))) in bidirectional_pairs
+        airline = str(route['main_airline'])
+        aircraft = str(route['aircraft'][0]) if route['aircraft'] else ''
+        direction = str(route['directions'][0]) if route['directions'] else '出口'
+        start = [float(origin_lat[i]), float(origin_lon[i])]
+        end = [float(dest_lat[i]), float(dest_lon[i])]
+        route_data_3d.append({
+            'id': f"route_{len(route_data_3d)}",
+            'start_airport': origin, 'end_airport': destination,
+            'start_airport_name': origin, 'end_airport_name': destination,
+            'origin': origin, 'destination': destination,
+            'start_lat': start[0], 'start_lng': start[1],
+            'end_lat': end[0], 'end_lng': end[1],
+            'frequency': int(route['count']),
+            'airline': airline,
+            'aircraft_type': aircraft,
+            'route_type': 'international',
+            'direction': direction,
+            'is_bidirectional': bidirectional,
+            'bidirectional': bidirectional,
+        })
+        rows.append([origin, destination, start, end, int(route['count']), bidirectional, airline, aircraft, direction])
+
+    # 数据指纹按每条航线的关键字段计算，不序列化完整的航线对象
+    fingerprint = hashlib.md5(json.dumps(rows, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    frequencies = [route['frequency'] for route in route_data_3d]
+    return {
+        'routes': route_data_3d,
+        'fingerprint': fingerprint.hexdigest()[:16],
+        'stats': {
+            'routes': len(route_data_3d),
+            'airports': len({r['origin'] for r in route_data_3d} | {r['destination'] for r in route_data_3d}),
+            'airlines': len({r['airline'] for r in route_data_3d}),
+            'avg_frequency': float(np.mean(frequencies)) if frequencies else 0.0,
+            'skipped_records': int(skipped_records),
+        },
+    }
@@ -0,0 +1,1040 @@
+# D:\flight_tool\map_builder.py
+"""2D航线地图构建（底图、航线图层、机场标记和图例）"""
+import hashlib
+import html
+import json
+import math
+import pickle
+from typing import Dict
+import folium
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from folium.plugins import MiniMap, MarkerCluster
+from jinja2 import Template
+import numpy as np
+from airport_coords import get_airport_coords, airport_resolver
+from route_aggregation import RouteAggregate
+from route_geometry import route_geometry
+from geojson_layer import RouteGeoJson, build_route_features, AIRPORT_TIERS, ENDPOINT_STYLES
+from flow_layer import FlowAnimationLayer, FLOW_MIN_FREQUENCY
+from route_density import DENSITY_COLORS, density_grid, density_image, density_png_url, density_bounds
+
+# 底图初始缩放级别
+MAP_ZOOM_START = 2
+
+# 缩放级别达到该值后起降机场标记不再聚合
+ENDPOINT_CLUSTER_MAX_ZOOM = 5
+
+# 2D地图的航线绘制方式
+GEOJSON_MAP_MODE = '矢量图层（GeoJSON）'
+FOLIUM_MAP_MODE = '逐条绘制（folium对象）'
+DENSITY_MAP_MODE = '密度热力图（栅格）'
+MAP_RENDER_MODES = [GEOJSON_MAP_MODE, FOLIUM_MAP_MODE, DENSITY_MAP_MODE]
+
+# 定义航司颜色方案（使用更丰富的调色板）
+airline_colors = {
+    '顺丰航空': '#FF6B35',  # 橙红色
+    '中国邮政': '#2E8B57',  # 海绿色
+    '圆通航空': '#4169E1',  # 皇家蓝
+    '中通快递': '#8A2BE2',  # 蓝紫色
+    '申通快递': '#DC143C',  # 深红色
+    '韵达快递': '#FF1493',  # 深粉色
+    '德邦快递': '#32CD32',  # 酸橙绿
+    '京东物流': '#FF4500',  # 橙红色
+    '菜鸟网络': '#1E90FF',  # 道奇蓝
+    '中国国航': '#B22222',  # 火砖红
+    '东方航空': '#4682B4',  # 钢蓝色
+    '南方航空': '#228B22',  # 森林绿
+    '海南航空': '#FF69B4',  # 热粉色
+    '厦门航空': '#20B2AA',  # 浅海绿
+    '深圳航空': '#9370DB',  # 中紫色
+    '山东航空': '#CD853F',  # 秘鲁色
+    '四川航空': '#FF8C00',  # 深橙色
+    '吉祥航空': '#00CED1',  # 深绿松石
+    '春秋航空': '#DA70D6',  # 兰花紫
+    '华夏航空': '#87CEEB'   # 天空蓝
+}
+
+
+def get_airline_color(airline_name):
+    """航司配色，未知航司基于名称生成一致的颜色"""
+    if airline_name in airline_colors:
+        return airline_colors[airline_name]
+    # 基于航司名称生成一致的颜色
+    hash_obj = hashlib.md5(airline_name.encode())
+    hash_hex = hash_obj.hexdigest()
+    return f"#{hash_hex[:6]}"
+
+
+def is_valid_coordinate(coords):
+    """验证坐标数值有效性"""
+    if not coords or len(coords) != 2:
+        return False
+    lat, lon = coords
+    return (isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and
+            math.isfinite(lat) and math.isfinite(lon) and
+            -90 <= lat <= 90 and -180 <= lon <= 180)
+
+
+def build_route_paths(routes: RouteAggregate, lod_tolerance: float = 0.0) -> Dict[tuple, list]:
+    """所有航线的大圆路径（批量生成，按坐标对缓存，重跑时复用）
+
+    Args:
+        lod_tolerance: 路径简化容差（度，按缩放级别由 lod_tolerance() 取得），0 为完整路径
+
+    Returns:
+        {(始发地, 目的地): folium 折线坐标}，跨越180度经线的航线为多段坐标列表；无坐标的航线不在结果中
+    """
+    keys = list(routes.routes)
+    origin_lat, origin_lon, origin_missing = airport_resolver.resolve_many([o for o, _ in keys])
+    dest_lat, dest_lon, dest_missing = airport_resolver.resolve_many([d for _, d in keys])
+    valid = np.flatnonzero(~(origin_missing | dest_missing))
+    paths = route_geometry.paths(origin_lat[valid], origin_lon[valid], dest_lat[valid], dest_lon[valid],
+                                 lod_tolerance)
+    return {
+        keys[i]: path[0].tolist() if len(path) == 1 else [segment.tolist() for segment in path]
+        for i, path in zip(valid, paths)
+    }
+
+
+def _path_points(locations: list) -> list:
+    """折线（或多段折线）的全部点"""
+    if not locations or not isinstance(locations[0][0], list):
+        return locations
+    return [point for segment in locations for point in segment]
+
+
+def path_midpoint(locations: list) -> list:
+    """折线（或多段折线）中间位置的点"""
+    points = _path_points(locations)
+    return points[len(points) // 2]
+
+
+def create_base_map(preload_plugins=False):
+    """创建底图：瓦片图层、小地图、指南针和图层控制器（两种航线绘制方式共用）
+
+    Args:
+        preload_plugins: 预先加载逐条绘制模式用到的插件脚本（MarkerCluster）。
+            增量更新时航线图层在底图加载后才添加，插件脚本只能随底图加载
+    """
+    m = folium.Map(
+        location=[20.0, 0.0],  # 以0度经线为中心，确保美洲在西半球正确显示
+        zoom_start=MAP_ZOOM_START,  # 降低初始缩放级别以显示完整世界地图
+        tiles='https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png',  # 使用新的稳定CartoDB URL
+        attr='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors, &copy; <a href="https://carto.com/attributions">CARTO</a>',
+        prefer_canvas=True,  # 使用Canvas渲染，减少闪烁
+        max_bounds=False,  # 移除地图边界限制，允许自由移动
+        min_zoom=1,  # 最小缩放级别
+        max_zoom=18,  # 最大缩放级别
+        world_copy_jump=True,  # 启用世界地图重复显示，便于跨越180度经线的航线显示
+        crs='EPSG3857',  # 使用Web墨卡托投影
+        width='100%',  # 地图宽度设置为100%
+        height='800px'  # 地图高度设置为800像素
+    )
+    
+    # 添加美观的备用瓦片源（使用稳定的新URL）
+    folium.TileLayer(
+        tiles='https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png',
+        attr='&copy; <a href="https://carto.com/attributions">CARTO</a>',
+        name='简洁白色',
+        overlay=False,
+        control=True
+    ).add_to(m)
+    
+    folium.TileLayer(
+        tiles='https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}.png',
+        attr='&copy; <a href="https://carto.com/attributions">CARTO</a>',
+        name='深色主题',
+        overlay=False,
+        control=True
+    ).add_to(m)
+    
+    # 添加卫星图作为备用
+    folium.TileLayer(
+        tiles='https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
+        attr='Tiles &copy; Esri &mdash; Source: Esri, i-cubed, USDA, USGS, AEX, GeoEye, Getmapping, Aerogrid, IGN, IGP, UPR-EGP, and the GIS User Community',
+        name='卫星图',
+        overlay=False,
+        control=True
+    ).add_to(m)
+    
+    # 注释：为避免网络连接错误，暂时移除外部地理边界数据加载
+    # 如需要边界显示，可在网络稳定时重新启用
+    
+    # 创建基础图层组
+    base_layer = folium.FeatureGroup(name='航线图层', show=True)
+    base_layer.add_to(m)
+    # 添加指南针和方向控件
+    
+    # 添加小地图（显示当前位置）- 使用稳定瓦片源
+    minimap = MiniMap(
+        tile_layer=folium.TileLayer(
+            tiles='https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png',
+            attr='&copy; CARTO'
+        ),
+        position='bottomright',
+        width=150,
+        height=150,
+        collapsed_width=25,
+        collapsed_height=25,
+        zoom_level_offset=-5,
+        toggle_display=True
+    )
+    m.add_child(minimap)
+    
+    # 添加方向指示器（指南针）
+    compass_html = """
+    <div id="compass" style="
+        position: fixed;
+        top: 80px;
+        right: 10px;
+        width: 80px;
+        height: 80px;
+        background: rgba(255, 255, 255, 0.9);
+        border: 2px solid #333;
+        border-radius: 50%;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        font-family: Arial, sans-serif;
+        font-weight: bold;
+        box-shadow: 0 2px 10px rgba(0,0,0,0.3);
+        z-index: 1000;
+    ">
+        <div style="
+            position: relative;
+            width: 60px;
+            height: 60px;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+        ">
+            <!-- 北 -->
+            <div style="
+                position: absolute;
+                top: 2px;
+                left: 50%;
+                transform: translateX(-50%);
+                color: #d32f2f;
+                font-size: 12px;
+                font-weight: bold;
+            ">N</div>
+            <!-- 南 -->
+            <div style="
+                position: absolute;
+                bottom: 2px;
+                left: 50%;
+                transform: translateX(-50%);
+                color: #333;
+                font-size: 12px;
+            ">S</div>
+            <!-- 东 -->
+            <div style="
+                position: absolute;
+                right: 2px;
+                top: 50%;
+                transform: translateY(-50%);
+                color: #333;
+                font-size: 12px;
+            ">E</div>
+            <!-- 西 -->
+            <div style="
+                position: absolute;
+                left: 2px;
+                top: 50%;
+                transform: translateY(-50%);
+                color: #333;
+                font-size: 12px;
+            ">W</div>
+            <!-- 指针 -->
+            <div style="
+                width: 2px;
+                height: 20px;
+                background: linear-gradient(to bottom, #d32f2f 0%, #d32f2f 60%, #333 60%, #333 100%);
+                position: absolute;
+                top: 50%;
+                left: 50%;
+                transform: translate(-50%, -50%);
+            "></div>
+        </div>
+    </div>
+    """
+    
+    m.get_root().html.add_child(folium.Element(compass_html))
+    
+    # 添加图层控制器
+    folium.LayerControl().add_to(m)
+
+    if preload_plugins:
+        PluginAssets().add_to(m)
+
+    return m
+
+
+def create_route_layer():
+    """航线图层：航线、机场标记和图例都放在这个图层中，筛选变化时只替换该图层"""
+    return folium.FeatureGroup(name='航线图层', control=False)
+
+
+def freeze_layer(layer) -> bytes:
+    """序列化航线图层，供跨会话缓存
+
+    st_folium 和导出都会修改图层（重设 _id、挂到各自的底图上），缓存的是序列化结果，
+    每次运行由 thaw_layer 生成独立的图层对象
+    """
+    return pickle.dumps(layer, pickle.HIGHEST_PROTOCOL)
+
+
+def thaw_layer(frozen: bytes):
+    """由 freeze_layer 的结果生成新的航线图层对象"""
+    return pickle.loads(frozen)
+
+
+def feature_signature(routes: RouteAggregate, keys) -> Dict[str, tuple]:
+    """地图要素ID -> 影响样式的属性，用于比较两次渲染之间新增、移除和样式变化的要素
+
+    Args:
+        keys: 地图上实际绘制的航线 (始发地, 目的地)
+    """
+    signature = {}
+    for key, route in routes.routes.items():
+        if key in keys:
+            first_direction = route['directions'][0] if route['directions'] else None
+            signature[f"route:{key[0]}→{key[1]}"] = (route['count'], route['is_round_trip'],
+                                                    route['has_transit'], first_direction)
+    for city, endpoint in routes.endpoints(keys).items():
+        signature[f"airport:{city}"] = (endpoint['role'], endpoint['outbound_records'] + endpoint['inbound_records'])
+    return signature
+
+
+def diff_features(previous: Dict[str, tuple], current: Dict[str, tuple]) -> Dict[str, list]:
+    """两次渲染之间的要素差异：新增、移除和样式变化的要素ID"""
+    return {
+        'added': [key for key in current if key not in previous],
+        'removed': [key for key in previous if key not in current],
+        'restyled': [key for key, value in current.items() if key in previous and previous[key] != value],
+    }
+
+
+class RouteLegend(MacroElement):
+    """图例：作为航线图层中的一个图层，随航线图层添加和移除（增量更新时图例同步刷新）"""
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = new (L.Layer.extend({
+            onAdd: function (map) {
+                this._container = L.DomUtil.create('div', 'route-legend', map.getContainer());
+                this._container.innerHTML = {{ this.html }};
+                L.DomEvent.disableClickPropagation(this._container);
+                L.DomEvent.disableScrollPropagation(this._container);
+                return this;
+            },
+            onRemove: function (map) {
+                L.DomUtil.remove(this._container);
+                return this;
+            }
+        }))();
+        {{ this._parent.get_name() }}.addLayer({{ this.get_name() }});
+        {% endmacro %}
+        """)
+
+    def __init__(self, legend_html: str):
+        super().__init__()
+        self._name = 'RouteLegend'
+        self.html = json.dumps(legend_html, ensure_ascii=False).replace('</', '<\\/')
+
+
+class PluginAssets(JSCSSMixin, MacroElement):
+    """只加载逐条绘制模式用到的插件脚本和样式，不创建任何图层"""
+
+    default_js = MarkerCluster.default_js
+    default_css = MarkerCluster.default_css
+
+    _template = Template(u"")
+
+
+def add_route_legend(layer, routes: RouteAggregate):
+    """添加航线类型图例和当前显示统计（可折叠），图例随航线图层一起更新"""
+    # 创建航线类型图例（可折叠）
+    legend_html = """
+    <div id="legend-container" style="position: fixed; 
+               top: 10px; right: 10px; width: 260px; height: auto;
+               background-color: white; border:2px solid grey; z-index:9999; 
+               font-size:12px; border-radius: 8px;
+               box-shadow: 0 4px 12px rgba(0,0,0,0.15);">
+        <!-- 图例标题栏（可点击折叠） -->
+        <div style="
+            padding: 12px; cursor: pointer; background: #f8f9fa; 
+            border-radius: 6px 6px 0 0; border-bottom: 1px solid #ddd;
+            display: flex; justify-content: space-between; align-items: center;"
+            onclick="var content = document.getElementById('legend-content');
+                    var toggle = document.getElementById('legend-toggle');
+                    if (content.style.display === 'none') {
+                        content.style.display = 'block';
+                        toggle.textContent = '▼';
+                    } else {
+                        content.style.display = 'none';
+                        toggle.textContent = '▶';
+                    }">
+            <h4 style="margin: 0; color: #333; font-size: 14px;">🗺️ 航线图例</h4>
+            <span id="legend-toggle" style="font-size: 16px; color: #666;">▼</span>
+        </div>
+        
+        <!-- 图例内容（可折叠） -->
+        <div id="legend-content" style="padding: 12px; display: block;">
+            <!-- 机场标记说明 -->
+            <div style="margin-bottom: 12px;">
+                <h5 style="margin: 5px 0; color: #333; font-size: 12px;">🛫 机场标记</h5>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 16px; height: 16px; background: #8B0000; 
+                               border-radius: 50%; margin-right: 8px; border: 1px solid white;"></div>
+                    <span style="font-size: 11px; color: #333;">超级枢纽 (≥30班)</span>
+                </div>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 14px; height: 14px; background: #FF4500; 
+                               border-radius: 50%; margin-right: 8px; border: 1px solid white;"></div>
+                    <span style="font-size: 11px; color: #333;">主要枢纽 (20-29班)</span>
+                </div>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 12px; height: 12px; background: #FFD700; 
+                               border-radius: 50%; margin-right: 8px; border: 1px solid white;"></div>
+                    <span style="font-size: 11px; color: #333;">区域枢纽 (10-19班)</span>
+                </div>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 10px; height: 10px; background: #4169E1; 
+                               border-radius: 50%; margin-right: 8px; border: 1px solid white;"></div>
+                    <span style="font-size: 11px; color: #333;">重要机场 (5-9班)</span>
+                </div>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 8px; height: 8px; background: #32CD32; 
+                               border-radius: 50%; margin-right: 8px; border: 1px solid white;"></div>
+                    <span style="font-size: 11px; color: #333;">一般机场 (<5班)</span>
+                </div>
+                <div style="margin: 6px 0; font-size: 10px; color: #666; padding: 4px; background: #f0f8ff; border-radius: 3px;">
+                    📍 显示完整机场代码标签
+                </div>
+            </div>
+            
+            <hr style="margin: 10px 0; border: none; border-top: 1px solid #ddd;">
+            
+            <!-- 航线标记说明 -->
+            <div style="margin-bottom: 12px;">
+                <h5 style="margin: 5px 0; color: #333; font-size: 12px;">🎯 航线标记</h5>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 16px; height: 16px; background: #28a745; 
+                               border-radius: 50%; margin-right: 8px; border: 2px solid white;"></div>
+                    <span style="font-size: 11px; color: #333;">🛫 始发地标记</span>
+                </div>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 16px; height: 16px; background: #dc3545; 
+                               border-radius: 50%; margin-right: 8px; border: 2px solid white;"></div>
+                    <span style="font-size: 11px; color: #333;">🛬 目的地标记</span>
+                </div>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 16px; height: 16px; background: #6f42c1; 
+                               border-radius: 50%; margin-right: 8px; border: 2px solid white;"></div>
+                    <span style="font-size: 11px; color: #333;">⇅ 始发地/目的地</span>
+                </div>
+            </div>
+            
+            <hr style="margin: 10px 0; border: none; border-top: 1px solid #ddd;">
+            
+            <!-- 航线类型图例 -->
+            <div style="margin-bottom: 12px;">
+                <h5 style="margin: 5px 0; color: #333; font-size: 12px;">🌍 航线类型</h5>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 20px; height: 4px; background-color: #4CAF50; 
+                               border-radius: 2px; margin-right: 10px;"></div>
+                    <span style="font-size: 11px; color: #333;">国际进口</span>
+                </div>
+                <div style="margin: 6px 0; display: flex; align-items: center;">
+                    <div style="width: 20px; height: 4px; background-color: #FFC107; 
+                               border-radius: 2px; margin-right: 10px;"></div>
+                    <span style="font-size: 11px; color: #333;">国际出口</span>
+                </div>
+                <div style="margin: 6px 0; font-size: 10px; color: #666; padding: 4px; background: #f5f5f5; border-radius: 3px;">
+                    💡 国内机场作为中转地，无纯国内航线
+                </div>
+            </div>
+            
+            <hr style="margin: 10px 0; border: none; border-top: 1px solid #ddd;">
+            
+            <!-- 线条说明 -->
+            <div style="font-size: 10px; color: #666; text-align: center; line-height: 1.4;">
+                💡 线条粗细表示航班频次<br>
+                🔥 圆点标记高频航线(≥5班)<br>
+                ⚡ 动态效果显示航线流向<br>
+                🔄 粗线条表示往返航线<br>
+                📍 点击航线查看中转信息
+            </div>
+        </div>
+        
+        <!-- 折叠功能脚本 -->
+        <script>
+            function toggleLegend() {
+                const content = document.getElementById('legend-content');
+                const toggle = document.getElementById('legend-toggle');
+                const container = document.getElementById('legend-container');
+                
+                if (content.style.display === 'none') {
+                    content.style.display = 'block';
+                    toggle.textContent = '▼';
+                    container.style.height = 'auto';
+                } else {
+                    content.style.display = 'none';
+                    toggle.textContent = '▶';
+                    container.style.height = 'auto';
+                }
+            }
+            
+            // 默认展开状态
+            document.addEventListener('DOMContentLoaded', function() {
+                document.getElementById('legend-content').style.display = 'block';
+            });
+        </script>
+    """
+    
+    # 统计国际航线数量和路径分析（数据源中无纯国内航线，直接读取航线汇总）
+    legend_stats = routes.legend_stats()
+    international_import_count = legend_stats['import_count']
+    international_export_count = legend_stats['export_count']
+    transit_routes_count = legend_stats['transit_count']  # 经过国内机场的中转航线
+    round_trip_count = legend_stats['round_trip_records']
+    major_hubs = legend_stats['major_hubs']
+    
+    # 构建中转枢纽信息
+    hub_info = ""
+    if major_hubs:
+        sorted_hubs = sorted(major_hubs.items(), key=lambda x: x[1]['total'], reverse=True)[:3]
+        hub_list = []
+        for hub_name, hub_data in sorted_hubs:
+            hub_list.append(f"{hub_name}({hub_data['total']}条)")
+        hub_info = f"<br>🏢 主要枢纽: {', '.join(hub_list)}"
+    
+    legend_html += f"""
+        <hr style="margin: 10px 0; border: none; border-top: 1px solid #ddd;">
+        <div style="font-size: 11px; color: #555; text-align: center;">
+            📊 当前显示:<br>
+            国际进口: {international_import_count} 条<br>
+            国际出口: {international_export_count} 条<br>
+            🔄 往返航线: {round_trip_count//2} 对<br>
+            🛫 含中转: {transit_routes_count} 条{hub_info}
+        </div>
+    </div>"""
+    
+    RouteLegend(legend_html).add_to(layer)
+
+
+def add_endpoint_markers(layer, endpoints: dict, airports: dict):
+    """添加起降机场标记图层
+
+    原实现为每条航线在始发地和目的地各加一个标记，枢纽机场上叠放数十个相同的标记。
+    这里按航线端点去重，每个机场一个标记，标明起降角色和进出港航线数，低缩放级别时聚合显示。
+
+    Args:
+        endpoints: RouteAggregate.endpoints() 的结果（只含地图上绘制的航线）
+        airports: {机场: {'coords': 坐标, ...}}
+    """
+    cluster = MarkerCluster(
+        name='🛫 起降机场',
+        control=False,
+        options={
+            'disableClusteringAtZoom': ENDPOINT_CLUSTER_MAX_ZOOM,
+            'maxClusterRadius': 40,
+            'showCoverageOnHover': False,
+        }
+    )
+    cluster.add_to(layer)
+
+    for city, endpoint in endpoints.items():
+        icon, color, role_name = ENDPOINT_STYLES[endpoint['role']]
+        safe_city = html.escape(str(city))
+        popup_html = (
+            f"<b>{icon} {role_name}: {safe_city}</b><br>"
+            f"出港航线: {endpoint['outbound_routes']} 条（{endpoint['outbound_records']} 班）<br>"
+            f"进港航线: {endpoint['inbound_routes']} 条（{endpoint['inbound_records']} 班）"
+        )
+        folium.Marker(
+            location=airports[city]['coords'],
+            popup=folium.Popup(popup_html, max_width=260),
+            tooltip=f"{icon} {city}",
+            icon=folium.DivIcon(
+                html=f'<div style="background-color: {color}; color: white; border-radius: 50%; width: 20px; height: 20px; display: flex; align-items: center; justify-content: center; font-size: 10px; font-weight: bold; border: 2px solid white; box-shadow: 0 2px 4px rgba(0,0,0,0.3);">{icon}</div>',
+                icon_size=(20, 20),
+                icon_anchor=(10, 10)
+            )
+        ).add_to(cluster)
+
+
+def build_route_layer(filtered, routes: RouteAggregate, animation_enabled=True, animation_speed=2000,
+                      lod_tolerance=0.0):
+    """构建2D航线图层（逐条绘制模式）：航线、标记和图例都放在一个图层中，底图另行创建
+
+    Args:
+        filtered: 筛选后的航线数据
+        routes: 筛选结果的航线汇总（build_route_aggregate）
+        animation_enabled: 是否为高频航线启用动画
+        animation_speed: 动画速度（毫秒）
+        lod_tolerance: 路径简化容差（度），0 为完整路径
+
+    Returns:
+        (folium.FeatureGroup, 显示统计字典)
+    """
+    layer = create_route_layer()
+    
+    # 所有航线的大圆路径一次批量生成（按当前细节层次简化）
+    route_paths = build_route_paths(routes, lod_tolerance)
+    
+    # 高频航线的流动动画和脉冲点合并到一个画布图层
+    flows = FlowAnimationLayer(animation_speed)
+    
+    # 收集所有机场位置
+    airports = {}
+    
+    # 绘制航线（每条航线只绘制一次）
+    routes_added = set()
+    unique_routes_displayed = 0  # 统计实际显示在地图上的唯一航线数
+    routes_without_coords = 0  # 统计无坐标的航线数
+    total_route_records = 0  # 统计所有航线记录数（包括重复）
+    
+    for idx, row in filtered.iterrows():
+        total_route_records += 1  # 统计所有航线记录
+        origin_coords = get_airport_coords(row['origin'])
+        dest_coords = get_airport_coords(row['destination'])
+        
+        # 调试信息：检查坐标获取
+        
+        
+        # 检查坐标是否有效
+        if origin_coords is None or dest_coords is None:
+            print(f"警告：无法获取坐标 - {row['origin']} 或 {row['destination']}")
+            routes_without_coords += 1
+            continue
+        
+        if not is_valid_coordinate(origin_coords) or not is_valid_coordinate(dest_coords):
+            print(f"警告：坐标数值无效 - {row['origin']}: {origin_coords}, {row['destination']}: {dest_coords}")
+            routes_without_coords += 1
+            continue
+        
+        # 记录机场位置
+        if row['origin'] not in airports:
+            airports[row['origin']] = {'coords': origin_coords, 'type': 'origin', 'flights': []}
+        if row['destination'] not in airports:
+            airports[row['destination']] = {'coords': dest_coords, 'type': 'destination', 'flights': []}
+        
+        # 记录航班信息
+        airports[row['origin']]['flights'].append(row)
+        airports[row['destination']]['flights'].append(row)
+        
+        # 创建航线唯一标识
+        route_key = (row['origin'], row['destination'])
+        
+        # 只绘制一次相同的航线
+        if route_key not in routes_added:
+            route_info = routes.routes[route_key]
+            
+            # 根据航线进出口方向设置颜色（数据源中无纯国内航线，国内机场仅作中转地）
+            direction = row.get('direction', '出口')
+            if direction == '进口':
+                line_color = '#4CAF50'  # 绿色 - 进口
+                route_type = '🌍 国际进口'
+            else:  # 出口
+                line_color = '#FFC107'  # 黄色 - 出口
+                route_type = '🌍 国际出口'
+            
+            # 标识中转航线（基于数据源中的实际中转信息）
+            # 检查是否包含中转信息（支持多种分隔符）
+            if route_info['has_transit']:
+                route_type += ' (含中转)'
+            
+            # 根据航线频率调整线条粗细和透明度
+            frequency = route_info['count']
+            if frequency >= 10:
+                line_weight = 6
+                line_opacity = 0.9
+            elif frequency >= 5:
+                line_weight = 5
+                line_opacity = 0.8
+            elif frequency >= 2:
+                line_weight = 4
+                line_opacity = 0.7
+            else:
+                line_weight = 3
+                line_opacity = 0.6
+            
+            # 确定主要航司（选择该航线上最多航班的航司）
+            main_airline = route_info['main_airline'] if route_info['main_airline'] is not None else row['airline']
+            
+            # 根据方向调整显示
+            if '出口' in route_info['directions'] and '进口' in route_info['directions']:
+                # 双向航线
+                direction_indicator = '⇄'
+            elif '出口' in route_info['directions']:
+                direction_indicator = '→'
+            else:
+                direction_indicator = '←'
+            
+            # 检查是否为往返航线，调整线条样式
+            is_round_trip = route_info['is_round_trip']
+            
+            # 为往返航线调整透明度和样式
+            if is_round_trip:
+                line_opacity = min(line_opacity + 0.1, 1.0)  # 增加透明度
+                line_weight = min(line_weight + 1, 8)  # 增加线条粗细
+            
+            # 大圆路径（跨越180度经线时为多段）
+            route_path = route_paths[route_key]
+            
+            # 创建详细的航线信息
+            airlines_list = [str(a) for a in route_info['airlines']]
+            directions_list = [str(d) for d in route_info['directions']]
+            
+            # 分析是否为中转航线（检查是否有相同起点或终点的其他航线）
+            transit_info = ""
+            same_origin_routes = routes.outbound[row['origin']]
+            same_dest_routes = routes.inbound[row['destination']]
+            
+            if len(same_origin_routes) > 1:
+                other_destinations = [dest for dest in same_origin_routes if dest != row['destination']][:3]
+                transit_info += f"<p style='margin: 3px 0; font-size: 11px; color: #666;'><b>🛫 {row['origin']} 其他航线:</b> → {', '.join(other_destinations)}{'...' if len(same_origin_routes) > 4 else ''}</p>"
+            
+            if len(same_dest_routes) > 1:
+                other_origins = [orig for orig in same_dest_routes if orig != row['origin']][:3]
+                transit_info += f"<p style='margin: 3px 0; font-size: 11px; color: #666;'><b>🛬 {row['destination']} 其他航线:</b> {', '.join(other_origins)}{'...' if len(same_dest_routes) > 4 else ''} →</p>"
+            
+            # 安全处理弹出框内容，避免特殊字符导致闪退
+            safe_origin = html.escape(str(row['origin']))
+            safe_destination = html.escape(str(row['destination']))
+            safe_main_airline = html.escape(str(main_airline))
+            safe_aircraft = html.escape(str(row['aircraft']))
+            safe_route_type = html.escape(str(route_type))
+            safe_directions = html.escape(' + '.join(directions_list))
+            safe_airlines = html.escape(', '.join(airlines_list[:3]))
+            
+            popup_content = f"""
+            <div style='width: 350px; font-family: Arial, sans-serif; line-height: 1.4;'>
+                <h3 style='margin: 0; color: {line_color}; border-bottom: 2px solid {line_color}; padding-bottom: 5px;'>
+                    ✈️ {safe_origin} {direction_indicator} {safe_destination}
+                </h3>
+                <div style='margin: 10px 0;'>
+                    <div style='margin: 3px 0; padding: 3px 8px; background: {line_color}20; border-radius: 5px; border-left: 3px solid {line_color};'>
+                        <strong>{safe_route_type}</strong>
+                    </div>
+                    <p style='margin: 3px 0;'><b>🏢 主要航司:</b> <span style='color: {line_color};'>{safe_main_airline}</span></p>
+                    <p style='margin: 3px 0;'><b>📊 航班频次:</b> <span style='background: {line_color}; color: white; padding: 2px 6px; border-radius: 3px;'>{frequency} 班</span></p>
+                    <p style='margin: 3px 0;'><b>🔄 运营方向:</b> {safe_directions}</p>
+                    <p style='margin: 3px 0;'><b>🛫 服务航司:</b> {safe_airlines}{'...' if len(airlines_list) > 3 else ''}</p>
+                    <p style='margin: 3px 0;'><b>✈️ 机型:</b> {safe_aircraft}</p>
+                </div>
+            </div>
+            """
+            
+            # 添加航线（优化渲染，减少闪烁）
+            if frequency >= FLOW_MIN_FREQUENCY and animation_enabled:  # 高频航线且启用动画
+                # 高频航线：静态折线负责弹窗和提示，流动虚线和脉冲点由画布图层统一绘制
+                folium.PolyLine(
+                    locations=route_path,
+                    color=line_color,
+                    weight=line_weight,
+                    opacity=line_opacity * 0.6,  # 进一步降低透明度
+                    smooth_factor=1.0,
+                    popup=folium.Popup(popup_content, max_width=350),
+                    tooltip=f"{route_type} - {row['origin']} → {row['destination']} ({frequency}班) 🎬"
+                ).add_to(layer)
+                flows.add_flow(route_path, line_color, line_weight, line_opacity * 0.6, frequency)
+            else:
+                # 中低频航线使用静态线条（减少视觉干扰）
+                folium.PolyLine(
+                    locations=route_path,
+                    color=line_color,
+                    weight=max(1, line_weight - 1),  # 稍微减小线条粗细
+                    opacity=line_opacity * 0.5,  # 进一步降低透明度
+                    smooth_factor=2.0,  # 增加平滑度
+                    popup=folium.Popup(popup_content, max_width=350),
+                    tooltip=f"{route_type} - {row['origin']} → {row['destination']} ({frequency}班)"
+                ).add_to(layer)
+            
+            routes_added.add(route_key)
+            unique_routes_displayed += 1  # 统计实际显示的唯一航线
+    
+    if len(flows):
+        flows.add_to(layer)
+    
+    # 起降机场标记：每个端点机场一个标记（按角色区分），低缩放级别时聚合
+    add_endpoint_markers(layer, routes.endpoints(routes_added), airports)
+    
+    add_route_legend(layer, routes)
+    
+    # 添加优化的机场标记
+    for airport_code, airport_info in airports.items():
+        coords = airport_info['coords']
+        flights = airport_info['flights']
+        
+        # 统计该机场的航班数量和类型
+        total_flights = len(flights)
+        airlines = set([f['airline'] for f in flights])
+        aircraft_types = set([f['aircraft'] for f in flights])
+        
+        # 统计各航司在该机场的航班数
+        airline_stats = {}
+        for flight in flights:
+            airline = flight['airline']
+            airline_stats[airline] = airline_stats.get(airline, 0) + 1
+        
+        # 确定机场类型和图标（与矢量图层共用 AIRPORT_TIERS）
+        _, airport_type, icon_color, icon_size, circle_radius = next(
+            tier for tier in AIRPORT_TIERS if total_flights >= tier[0])
+        
+        # 创建详细的弹出窗口HTML
+        popup_html = f"""
+        <div style="width: 320px; font-family: Arial, sans-serif; line-height: 1.4;">
+            <h3 style="margin: 0; color: {icon_color}; border-bottom: 2px solid {icon_color}; padding-bottom: 5px;">
+                🛫 {airport_code} 机场
+            </h3>
+            <div style="margin: 10px 0; background: #f8f9fa; padding: 8px; border-radius: 5px;">
+                <p style="margin: 3px 0;"><b>🏷️ 机场等级:</b> <span style="color: {icon_color}; font-weight: bold;">{airport_type}</span></p>
+                <p style="margin: 3px 0;"><b>📊 航班总数:</b> <span style="background: {icon_color}; color: white; padding: 1px 5px; border-radius: 3px;">{total_flights} 班</span></p>
+                <p style="margin: 3px 0;"><b>🏢 服务航司:</b> {len(airlines)} 家</p>
+                <p style="margin: 3px 0;"><b>✈️ 机型种类:</b> {len(aircraft_types)} 种</p>
+            </div>
+            <div style="margin: 10px 0;">
+                <h4 style="margin: 5px 0; color: #666; font-size: 13px;">📈 航司分布:</h4>
+        """
+        
+        # 添加航司统计（按航班数排序）
+        sorted_airlines = sorted(airline_stats.items(), key=lambda x: x[1], reverse=True)
+        for airline, count in sorted_airlines[:5]:  # 只显示前5个航司
+            color = get_airline_color(airline)
+            percentage = (count / total_flights) * 100
+            popup_html += f"""
+                <div style="margin: 2px 0; display: flex; align-items: center;">
+                    <div style="width: 12px; height: 12px; background-color: {color}; 
+                               border-radius: 2px; margin-right: 6px;"></div>
+                    <span style="font-size: 11px;">{airline}: {count}班 ({percentage:.1f}%)</span>
+                </div>
+            """
+        
+        if len(sorted_airlines) > 5:
+            popup_html += f"<div style='font-size: 10px; color: #888; margin-top: 3px;'>...还有{len(sorted_airlines)-5}家航司</div>"
+        
+        popup_html += """
+            </div>
+        </div>
+        """
+        
+        # 创建自定义图标和标签
+        icon_html = f"""
+        <div style="
+            position: relative;
+            display: flex;
+            flex-direction: column;
+            align-items: center;
+            justify-content: center;
+        ">
+            <!-- 机场图标 -->
+            <div style="
+                background: linear-gradient(135deg, {icon_color}, {icon_color}dd);
+                border: 2px solid white;
+                border-radius: 50%;
+                width: {icon_size}px;
+                height: {icon_size}px;
+                display: flex;
+                align-items: center;
+                justify-content: center;
+                font-size: {max(8, icon_size-6)}px;
+                color: white;
+                font-weight: bold;
+                box-shadow: 0 2px 6px rgba(0,0,0,0.3);
+                text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
+            ">{airport_code[:2]}</div>
+            <!-- 机场标签 -->
+            <div style="
+                margin-top: 2px;
+                background: rgba(255, 255, 255, 0.9);
+                border: 1px solid {icon_color};
+                border-radius: 4px;
+                padding: 1px 4px;
+                font-size: 10px;
+                font-weight: bold;
+                color: {icon_color};
+                white-space: nowrap;
+                box-shadow: 0 1px 3px rgba(0,0,0,0.2);
+                text-shadow: none;
+            ">{airport_code}</div>
+        </div>
+        """
+        
+        # 添加机场标记
+        folium.Marker(
+            location=coords,
+            popup=folium.Popup(popup_html, max_width=370),
+            tooltip=f"{airport_code} - {airport_type} ({total_flights}班)",
+            icon=folium.DivIcon(
+                html=icon_html,
+                icon_size=(icon_size, icon_size),
+                icon_anchor=(icon_size//2, icon_size//2)
+            )
+        ).add_to(layer)
+        
+        # 为重要机场添加影响范围圆圈
+        if total_flights >= 10:
+            folium.Circle(
+                location=coords,
+                radius=circle_radius,
+                color=icon_color,
+                fillColor=icon_color,
+                fillOpacity=0.08,
+                weight=1,
+                opacity=0.3,
+                popup=f"{airport_code} 服务范围",
+                tooltip=f"📍 {airport_code} 影响区域"
+            ).add_to(layer)
+
+    return layer, {
+        'unique_routes_displayed': unique_routes_displayed,
+        'routes_without_coords': routes_without_coords,
+        'total_route_records': total_route_records,
+        'vertices': sum(len(_path_points(route_paths[key])) for key in routes_added),
+        'flows': len(flows),
+        'features': feature_signature(routes, routes_added),
+    }
+
+
+def route_line_style(frequency: int, is_round_trip: bool):
+    """航线线宽和透明度（与逐条绘制模式的规则一致）"""
+    if frequency >= 10:
+        weight, opacity = 6, 0.9
+    elif frequency >= 5:
+        weight, opacity = 5, 0.8
+    elif frequency >= 2:
+        weight, opacity = 4, 0.7
+    else:
+        weight, opacity = 3, 0.6
+    if is_round_trip:
+        weight, opacity = min(weight + 1, 8), min(opacity + 0.1, 1.0)
+    return weight, opacity
+
+
+def build_geojson_route_layer(filtered, routes: RouteAggregate, lod_tolerance=0.0,
+                              animation_enabled=False, animation_speed=2000):
+    """构建2D航线图层（矢量图层模式）
+
+    全部航线和机场输出为一个 GeoJSON 图层，样式和弹窗在浏览器端按要素属性生成，
+    页面大小和 DOM 节点数不再随航线数按对象增长。启用动画时高频航线的流动效果由一个画布图层绘制。
+
+    Args:
+        filtered: 筛选后的航线数据（统计口径与逐条绘制模式一致，航线和机场均取自航线汇总）
+        routes: 筛选结果的航线汇总（build_route_aggregate）
+        lod_tolerance: 路径简化容差（度），0 为完整路径
+        animation_enabled: 是否为高频航线启用动画
+        animation_speed: 动画速度（毫秒）
+
+    Returns:
+        (folium.FeatureGroup, 显示统计字典)
+    """
+    layer = create_route_layer()
+    collection, stats = build_route_features(routes, airline_color=get_airline_color, lod_tolerance=lod_tolerance)
+    RouteGeoJson(collection).add_to(layer)
+
+    flows = FlowAnimationLayer(animation_speed)
+    for feature in collection['features'] if animation_enabled else []:
+        p, geometry = feature['properties'], feature['geometry']
+        if geometry['type'] == 'Point' or p['n'] < FLOW_MIN_FREQUENCY:
+            continue
+        lines = [geometry['coordinates']] if geometry['type'] == 'LineString' else geometry['coordinates']
+        weight, opacity = route_line_style(p['n'], p['rt'])
+        flows.add_flow([[[lat, lon] for lon, lat in line] for line in lines],
+                       '#4CAF50' if p['imp'] else '#FFC107', weight, opacity * 0.6, p['n'])
+    if len(flows):
+        flows.add_to(layer)
+
+    add_route_legend(layer, routes)
+    drawn = {(f['properties']['o'], f['properties']['d'])
+             for f in collection['features'] if f['geometry']['type'] != 'Point'}
+    stats['flows'] = len(flows)
+    stats['features'] = feature_signature(routes, drawn)
+    return layer, stats
+
+
+def add_density_legend(layer, peak: float):
+    """密度图层的色标图例"""
+    gradient = ', '.join(f"rgb{color} {stop:.0%}" for stop, color in DENSITY_COLORS)
+    legend_html = f"""
+    <div id="legend-container" style="position: fixed; top: 10px; right: 10px; width: 220px;
+               background-color: white; border:2px solid grey; z-index:9999; font-size:12px;
+               border-radius: 8px; padding: 10px 12px; box-shadow: 0 4px 12px rgba(0,0,0,0.15);">
+        <h4 style="margin: 0 0 8px 0; color: #333; font-size: 14px;">🔥 航线密度</h4>
+        <div style="height: 12px; border-radius: 3px; background: linear-gradient(to right, {gradient});"></div>
+        <div style="display: flex; justify-content: space-between; color: #666; margin-top: 4px;">
+            <span>低</span><span>高（{peak:,.0f} 航班·公里）</span>
+        </div>
+        <div style="color: #888; margin-top: 6px;">颜色按对数刻度，表示经过该区域的航班数 × 航程</div>
+    </div>
+    """
+    RouteLegend(legend_html).add_to(layer)
+
+
+def build_density_route_layer(filtered, routes: RouteAggregate):
+    """构建2D航线图层（密度模式）
+
+    所有航线沿大圆采样、按航班数加权累加到网格中，整个筛选结果只输出一张半透明图片，
+    适合不筛选时查看整体航线分布。
+
+    Args:
+        filtered: 筛选后的航线数据（统计口径与其他模式一致，航线取自航线汇总）
+        routes: 筛选结果的航线汇总（build_route_aggregate）
+
+    Returns:
+        (folium.FeatureGroup, 显示统计字典)
+    """
+    layer = create_route_layer()
+    keys = list(routes.routes)
+    counts = np.array([route['count'] for route in routes.routes.values()], dtype=float)
+    origin_lat, origin_lon, origin_missing = airport_resolver.resolve_many([o for o, _ in keys])
+    dest_lat, dest_lon, dest_missing = airport_resolver.resolve_many([d for _, d in keys])
+    valid = ~(origin_missing | dest_missing)
+
+    grid = density_grid(origin_lat[valid], origin_lon[valid], dest_lat[valid], dest_lon[valid], counts[valid])
+    folium.raster_layers.ImageOverlay(
+        image=density_png_url(density_image(grid)),
+        bounds=density_bounds(),
+        opacity=0.85,
+        pixelated=False,
+        interactive=False,
+        control=False,
+    ).add_to(layer)
+    add_density_legend(layer, grid.max(initial=0.0))
+
+    drawn = {key for key, ok in zip(keys, valid) if ok}
+    return layer, {
+        'unique_routes_displayed': len(drawn),
+        'routes_without_coords': int(counts[~valid].sum()),
+        'total_route_records': routes.total_records,
+        'vertices': 0,
+        'flows': 0,
+        'features': feature_signature(routes, drawn),
+    }
+
+
+def build_route_map(filtered, routes: RouteAggregate, animation_enabled=True, animation_speed=2000):
+    """构建完整的2D航线地图（底图 + 逐条绘制的航线图层），用于导出和性能对比"""
+    layer, stats = build_route_layer(filtered, routes, animation_enabled, animation_speed)
+    m = create_base_map(preload_plugins=True)
+    layer.add_to(m)
+    return m, stats
+
+
+def build_geojson_route_map(filtered, routes: RouteAggregate):
+    """构建完整的2D航线地图（底图 + 矢量图层），用于导出和性能对比"""
+    layer, stats = build_geojson_route_layer(filtered, routes)
+    m = create_base_map()
+    layer.add_to(m)
+    return m, stats
+
+
+def build_density_route_map(filtered, routes: RouteAggregate):
+    """构建完整的2D航线地图（底图 + 密度图层），用于导出和性能对比"""
+    layer, stats = build_density_route_layer(filtered, routes)
+    m = create_base_map()
+    layer.add_to(m)
+    return m, stats
@@ -0,0 +1,184 @@
+# D:\flight_tool\parse_cache.py
+"""解析结果持久化缓存（按文件指纹保存为 Parquet）"""
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+from parser import PARSER_VERSION
+from fix_parser import PARSER_VERSION as EXCEL_PARSER_VERSION
+from data_cleaner import CLEANER_VERSION
+
+# 缓存目录（与 data/ 同级）
+DEFAULT_CACHE_DIR = 'parse_cache'
+
+# 缓存条目上限，超过后删除最久未使用的条目
+MAX_CACHE_ENTRIES = 8
+
+# 文件指纹索引：避免每次都重新计算内容哈希
+INDEX_FILE = 'fingerprints.json'
+
+
+def _hash_file(path: str) -> str:
+    """计算文件内容的 SHA1"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def file_fingerprint(path: str, known: dict = None) -> dict:
+    """计算文件指纹
+
+    大小和修改时间与已知指纹一致时复用已知的内容哈希，否则重新计算。
+    """
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if known and known.get('size') == stat.st_size and known.get('mtime_ns') == stat.st_mtime_ns:
+        fingerprint['sha1'] = known['sha1']
+    else:
+        fingerprint['sha1'] = _hash_file(path)
+    return fingerprint
+
+
+def cache_key(fingerprints: list, params: dict = None) -> str:
+    """由文件内容哈希、解析/清理版本和加载参数生成缓存键"""
+    payload = {
+        'files': [fp['sha1'] for fp in fingerprints],
+        'parser_version': PARSER_VERSION,
+        'excel_parser_version': EXCEL_PARSER_VERSION,
+        'cleaner_version': CLEANER_VERSION,
+        'params': params or {},
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def _to_storable(df: pd.DataFrame) -> pd.DataFrame:
+    """把混合类型的 object 列转成字符串（保留空值），以便写入 Parquet"""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            values = df[col].dropna()
+            if not values.map(lambda v: isinstance(v, str)).all():
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def _prune(cache_dir: str, keep: int = MAX_CACHE_ENTRIES):
+    """删除最久未使用的缓存条目"""
+    entries = [
+        os.path.join(cache_dir, name[:-len('.parquet')])
+        for name in os.listdir(cache_dir) if name.endswith('.parquet')
+    ]
+    entries.sort(key=lambda base: os.path.getmtime(f"{base}.parquet"), reverse=True)
+    for base in entries[keep:]:
+        for suffix in ('.parquet', '.json'):
+            try:
+                os.remove(f"{base}{suffix}")
+            except OSError:
+                pass
+
+
+def load_or_build(files: list, build, params: dict = None, cache_dir: str = DEFAULT_CACHE_DIR):
+    """读取缓存的解析结果，未命中时调用 build() 解析并写入缓存
+
+    Args:
+        files: 输入文件路径列表
+        build: 无参函数，返回解析+清理后的 DataFrame
+        params: 影响解析结果的参数（如是否去重），参与缓存键计算
+        cache_dir: 缓存目录
+
+    Returns:
+        (DataFrame, 缓存报告字典)
+    """
+    start = time.perf_counter()
+    report = {'hit': False, 'seconds': 0.0, 'cold_seconds': None, 'key': None, 'error': None}
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        index_path = os.path.join(cache_dir, INDEX_FILE)
+        index = _read_json(index_path)
+        fingerprints = []
+        for path in files:
+            abs_path = os.path.abspath(path)
+            fingerprint = file_fingerprint(abs_path, index.get(abs_path))
+            index[abs_path] = fingerprint
+            fingerprints.append(fingerprint)
+        _write_json(index_path, index)
+        key = cache_key(fingerprints, params)
+    except OSError as e:
+        # 无法计算指纹时直接解析，不使用缓存
+        report['error'] = str(e)
+        df = build()
+        report['seconds'] = report['cold_seconds'] = time.perf_counter() - start
+        return df, report
+
+    report['key'] = key
+    data_path = os.path.join(cache_dir, f"{key}.parquet")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+
+    # 命中：直接读取列式文件
+    if os.path.exists(data_path) and os.path.exists(meta_path):
+        try:
+            meta = _read_json(meta_path)
+            df = pd.read_parquet(data_path)
+            df.attrs.update(meta.get('attrs', {}))
+            os.utime(data_path)  # 更新最近使用时间
+            report.update(hit=True, cold_seconds=meta.get('cold_seconds'))
+            report['seconds'] = time.perf_counter() - start
+            return df, report
+        except Exception as e:
+            print(f"读取解析缓存失败，重新解析: {e}")
+
+    # 未命中：解析并写入缓存
+    df = build()
+    cold_seconds = time.perf_counter() - start
+    report['seconds'] = report['cold_seconds'] = cold_seconds
+
+    if not df.empty:
+        try:
+            _to_storable(df).to_parquet(data_path, index=False)
+            _write_json(meta_path, {
+                'attrs': dict(df.attrs),
+                'cold_seconds': cold_seconds,
+                'rows': len(df),
+                'created': time.time(),
+            })
+            _prune(cache_dir)
+        except Exception as e:
+            # 缺少 pyarrow 等情况下仅跳过缓存写入
+            report['error'] = str(e)
+            print(f"写入解析缓存失败: {e}")
+
+    return df, report
+
+
+def clear_cache(cache_dir: str = DEFAULT_CACHE_DIR) -> int:
+    """清空解析缓存，返回删除的文件数"""
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(cache_dir):
+        try:
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+        except OSError:
+            pass
+    return removed
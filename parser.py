@@ -1,26 +1,27 @@
 # D:\flight_tool\parser.py
+import codecs
+import itertools
 import pandas as pd
-import re
 import os
+import time
 import numpy as np
-from typing import List, Dict, Any, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from excel_stream import iter_excel_chunks, is_streamable, DEFAULT_CHUNK_ROWS
+from route_tokenizer import tokenize_route_text
+from city_classifier import city_classifier
+
+# 解析逻辑版本号：修改解析结果时递增，使解析缓存失效
+PARSER_VERSION = 3
 
 def parse_route_text(text):
-    """解析航线文本，提取起点和终点信息"""
+    """解析航线文本，提取起点和终点信息（分词结果按文本缓存）"""
     if pd.isna(text) or not str(text).strip():
         return []
     
-    # 使用正则表达式分割航线文本
-    parts = re.split(r'\s*[-—>\u2192]\s*', str(text).strip())
-    results = []
-    
-    for p in parts:
-        # 提取IATA代码
-        m = re.search(r'([A-Z]{3})', p)
-        iata = m.group(1) if m else None
-        # 清理城市名称
-        clean_name = re.sub(r'\([A-Z]{3}\)', '', p).strip()
-        results.append({"name": clean_name, "iata": iata})
+    # 每次返回新的字典，调用方修改结果不会影响缓存
+    results = [{"name": token.name, "iata": token.iata} for token in tokenize_route_text(str(text).strip())]
     
     # 生成航段
     segments = []
@@ -110,8 +111,14 @@ def detect_table_structure(df: pd.DataFrame) -> Dict[str, Any]:
     
     return structure
 
-def clean_and_normalize_data(df: pd.DataFrame, structure: Dict[str, Any]) -> pd.DataFrame:
-    """清理和标准化数据"""
+def clean_and_normalize_data(df: pd.DataFrame, structure: Dict[str, Any],
+                             fill_values: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """清理和标准化数据
+
+    Args:
+        fill_values: 分块处理时上一块各关键列的最后一个非空值，用于跨块向下填充；
+            处理后更新为本块的最后一个非空值
+    """
     # 从检测到的数据开始行开始处理
     if structure['data_start_row'] > 0:
         df = df.iloc[structure['data_start_row']:].reset_index(drop=True)
@@ -125,7 +132,13 @@ def clean_and_normalize_data(df: pd.DataFrame, structure: Dict[str, Any]) -> pd.
         key_cols = [structure['airline_col'], structure['aircraft_col'], structure['reg_col']]
         for col in key_cols:
             if col and col in df.columns:
-                df[col] = df[col].fillna(method='ffill')
+                df[col] = df[col].ffill()
+                if fill_values is not None:
+                    if col in fill_values:
+                        df[col] = df[col].fillna(fill_values[col])
+                    last_valid = df[col].last_valid_index()
+                    if last_valid is not None:
+                        fill_values[col] = df[col].iloc[last_valid]
     
     # 清理文本数据
     for col in df.columns:
@@ -137,68 +150,7 @@ def clean_and_normalize_data(df: pd.DataFrame, structure: Dict[str, Any]) -> pd.
 
 def categorize_city_for_direction(city_name: str) -> str:
     """判断城市是国内还是国外（用于方向判断）"""
-    # 中国主要城市列表（包括港澳台）
-    chinese_cities = {
-        # 直辖市
-        '北京', '上海', '天津', '重庆',
-        # 省会城市
-        '广州', '深圳', '杭州', '南京', '武汉', '成都', '西安', '郑州', '济南', '沈阳',
-        '长春', '哈尔滨', '石家庄', '太原', '呼和浩特', '兰州', '西宁', '银川', '乌鲁木齐',
-        '合肥', '福州', '南昌', '长沙', '海口', '南宁', '贵阳', '昆明', '拉萨',
-        # 其他重要城市
-        '苏州', '无锡', '常州', '南通', '徐州', '扬州', '镇江', '泰州', '盐城', '淮安', '宿迁', '连云港',
-        '宁波', '温州', '嘉兴', '湖州', '绍兴', '金华', '衢州', '舟山', '台州', '丽水',
-        '青岛', '烟台', '潍坊', '临沂', '淄博', '济宁', '泰安', '威海', '日照', '滨州',
-        '东营', '聊城', '德州', '菏泽', '枣庄', '莱芜',
-        '大连', '鞍山', '抚顺', '本溪', '丹东', '锦州', '营口', '阜新', '辽阳', '盘锦',
-        '铁岭', '朝阳', '葫芦岛',
-        '长春', '吉林', '四平', '辽源', '通化', '白山', '松原', '白城', '延边',
-        '哈尔滨', '齐齐哈尔', '鸡西', '鹤岗', '双鸭山', '大庆', '伊春', '佳木斯', '七台河',
-        '牡丹江', '黑河', '绥化', '大兴安岭',
-        '厦门', '泉州', '漳州', '莆田', '三明', '龙岩', '南平', '宁德',
-        '南昌', '景德镇', '萍乡', '九江', '新余', '鹰潭', '赣州', '吉安', '宜春', '抚州', '上饶',
-        '珠海', '汕头', '佛山', '韶关', '湛江', '肇庆', '江门', '茂名', '惠州', '梅州',
-        '汕尾', '河源', '阳江', '清远', '东莞', '中山', '潮州', '揭阳', '云浮',
-        '柳州', '桂林', '梧州', '北海', '防城港', '钦州', '贵港', '玉林', '百色', '贺州',
-        '河池', '来宾', '崇左',
-        '三亚', '三沙', '儋州',
-        '遵义', '六盘水', '安顺', '毕节', '铜仁', '黔西南', '黔东南', '黔南',
-        '曲靖', '玉溪', '保山', '昭通', '丽江', '普洱', '临沧', '楚雄', '红河', '文山',
-        '西双版纳', '大理', '德宏', '怒江', '迪庆',
-        '日喀则', '昌都', '林芝', '山南', '那曲', '阿里',
-        '宝鸡', '咸阳', '铜川', '渭南', '延安', '榆林', '汉中', '安康', '商洛',
-        '洛阳', '开封', '平顶山', '安阳', '鹤壁', '新乡', '焦作', '濮阳', '许昌', '漯河',
-        '三门峡', '南阳', '商丘', '信阳', '周口', '驻马店', '济源',
-        '株洲', '湘潭', '衡阳', '邵阳', '岳阳', '常德', '张家界', '益阳', '郴州', '永州',
-        '怀化', '娄底', '湘西',
-        '芜湖', '蚌埠', '淮南', '马鞍山', '淮北', '铜陵', '安庆', '黄山', '滁州', '阜阳',
-        '宿州', '六安', '亳州', '池州', '宣城',
-        '唐山', '秦皇岛', '邯郸', '邢台', '保定', '张家口', '承德', '沧州', '廊坊', '衡水',
-        '大同', '阳泉', '长治', '晋城', '朔州', '晋中', '运城', '忻州', '临汾', '吕梁',
-        '包头', '乌海', '赤峰', '通辽', '鄂尔多斯', '呼伦贝尔', '巴彦淖尔', '乌兰察布',
-        '兴安盟', '锡林郭勒盟', '阿拉善盟',
-        '金昌', '白银', '天水', '武威', '张掖', '平凉', '酒泉', '庆阳', '定西', '陇南',
-        '临夏', '甘南',
-        '海东', '海北', '黄南', '海南', '果洛', '玉树', '海西',
-        '石嘴山', '吴忠', '固原', '中卫',
-        '克拉玛依', '吐鲁番', '哈密', '昌吉', '博尔塔拉', '巴音郭楞', '阿克苏', '克孜勒苏',
-        '喀什', '和田', '伊犁', '塔城', '阿勒泰',
-        # 港澳台
-        '香港', '澳门', '台北', '高雄', '台中', '台南', '桃园', '新竹', '基隆', '嘉义',
-        '台东', '花莲', '宜兰', '苗栗', '彰化', '南投', '云林', '屏东', '澎湖', '金门', '马祖',
-        # 其他常见城市
-        '鄂州'
-    }
-    
-    # 清理城市名称（去除可能的机场后缀）
-    clean_city = str(city_name).replace('机场', '').replace('国际机场', '').replace('Airport', '').strip()
-    
-    # 检查是否为中国城市
-    for chinese_city in chinese_cities:
-        if chinese_city in clean_city:
-            return '国内'
-    
-    return '国外'
+    return city_classifier.categorize(city_name, international='国外')
 
 def determine_direction(origin: str, destination: str) -> str:
     """根据起点和终点判断进出口方向"""
@@ -260,199 +212,370 @@ def extract_route_info(row: pd.Series, structure: Dict[str, Any]) -> List[Dict[s
     
     return routes
 
-def load_data(files):
-    """加载并解析多个航司数据文件 - 智能解析版本"""
-    all_rows = []
-    successfully_loaded_files = []  # 记录成功加载的文件
+# 输出列顺序
+RECORD_COLUMNS = ['direction', 'airline', 'reg', 'aircraft', 'age', 'origin', 'origin_iata',
+                  'destination', 'dest_iata', 'flight_time', 'flight_distance', 'special', 'flight_number']
+
+
+def _text_values(series: pd.Series, default: str = '') -> np.ndarray:
+    """整列转换为去除首尾空白的字符串数组，空值替换为 default"""
+    values = series.astype(object).where(series.notna(), default)
+    return values.astype(str).str.strip().to_numpy(dtype=object)
+
+
+def _route_segments(texts: pd.Series) -> pd.DataFrame:
+    """批量拆分航线文本（与 parse_route_text 规则一致）
+
+    相同的文本只分词一次（并共享 route_tokenizer 的缓存），再按行号展开为航段。
+
+    Returns:
+        每个航段一行：row（所在行号）、pos（段序号）、origin、destination、origin_iata、dest_iata
+    """
+    texts = texts[texts.notna()].astype(str).str.strip()
+    texts = texts[texts != '']
+    columns = ['row', 'pos', 'origin', 'destination', 'origin_iata', 'dest_iata']
+    if texts.empty:
+        return pd.DataFrame(columns=columns)
+
+    codes, uniques = pd.factorize(texts)
+    tokenized = [tokenize_route_text(text) for text in uniques]
+
+    # 各不同文本的航段首尾依次排成扁平数组，offsets 为每个文本的第一个航段位置
+    segment_counts = np.array([max(len(tokens) - 1, 0) for tokens in tokenized], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(segment_counts)[:-1]])
+    flat = [(tokens[i], tokens[i + 1]) for tokens in tokenized for i in range(len(tokens) - 1)]
+    if not flat:
+        return pd.DataFrame(columns=columns)
+    origin_names = np.array([o.name for o, _ in flat], dtype=object)
+    dest_names = np.array([d.name for _, d in flat], dtype=object)
+    origin_iata = np.array([o.iata for o, _ in flat], dtype=object)
+    dest_iata = np.array([d.iata for _, d in flat], dtype=object)
+
+    # 每行按其文本的航段数展开
+    row_counts = segment_counts[codes]
+    total = int(row_counts.sum())
+    row_starts = np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+    pos = np.arange(total) - row_starts
+    index = np.repeat(offsets[codes], row_counts) + pos
+    return pd.DataFrame({
+        'row': np.repeat(texts.index.to_numpy(), row_counts),
+        'pos': pos,
+        'origin': origin_names[index],
+        'destination': dest_names[index],
+        'origin_iata': origin_iata[index],
+        'dest_iata': dest_iata[index],
+    }, columns=columns)
+
+
+def _directions(origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+    """批量判断进出口方向：每个唯一城市只分类一次"""
+    domestic = city_classifier.is_domestic_many(np.concatenate([origins, destinations]))
+    origin_domestic, dest_domestic = domestic[:len(origins)], domestic[len(origins):]
+    # 国外到国内为进口，其余（出口、国内航线、国际中转）均标记为出口
+    return np.where(~origin_domestic & dest_domestic, '进口', '出口').astype(object)
+
+
+def extract_file_frame(df_clean: pd.DataFrame, structure: Dict[str, Any], airline_name: str) -> pd.DataFrame:
+    """从清理后的数据块中按列批量提取航线记录
+
+    列映射只解析一次，各字段整列转换为数组，航线文本用向量化字符串操作拆分成航段，
+    最后一次性构建结果表。记录顺序和取值与逐行提取（extract_route_info）一致：
+    每行先取明确的起点/终点列，再按航线列顺序取各航段；都没有时在未识别的列中查找航线文本。
+    """
+    df = df_clean.reset_index(drop=True)
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame()
+
+    # 航司：航司列为空时使用文件名，仍为空的行跳过
+    airline = np.full(n, str(airline_name).strip(), dtype=object)
+    if structure['airline_col'] and structure['airline_col'] in df.columns:
+        column = df[structure['airline_col']]
+        text = _text_values(column)
+        has_airline = column.notna().to_numpy() & (text != '')
+        airline = np.where(has_airline, text, airline)
+    valid_rows = airline != ''
+
+    # 航段：(行号, 来源顺序, 段序号) 排序后即为逐行提取的顺序
+    pieces = []
+    if structure['origin_col'] and structure['destination_col']:
+        origin = df[structure['origin_col']]
+        destination = df[structure['destination_col']]
+        both = (origin.notna() & destination.notna()).to_numpy()
+        rows = np.flatnonzero(both)
+        pieces.append(pd.DataFrame({
+            'row': rows, 'source': 0, 'pos': 0,
+            'origin': _text_values(origin)[rows],
+            'destination': _text_values(destination)[rows],
+            'origin_iata': '', 'dest_iata': '', 'direction': None,
+        }))
+    for i, route_col in enumerate(structure['route_cols']):
+        if route_col in df.columns:
+            segments = _route_segments(df[route_col])
+            segments['source'] = 1 + i
+            segments['direction'] = None
+            pieces.append(segments)
+
+    # 没有航线的行：在未识别的列中查找第一个含 '-' 的值（方向标记为出口）
+    mapped = [structure.get(k) for k in structure.keys() if k.endswith('_col')]
+    has_routes = np.zeros(n, dtype=bool)
+    for piece in pieces:
+        has_routes[piece['row'].to_numpy(dtype=np.int64)] = True
+    pending = valid_rows & ~has_routes
+    if pending.any():
+        fallback_text = pd.Series([None] * n, dtype=object)
+        for col in df.columns:
+            if col in mapped:
+                continue
+            column = df[col]
+            candidate = pending & column.notna().to_numpy() & column.astype(str).str.contains('-', regex=False, na=False).to_numpy()
+            fallback_text[candidate] = column.astype(str)[candidate]
+            pending &= ~candidate
+            if not pending.any():
+                break
+        segments = _route_segments(fallback_text)
+        segments['source'] = len(structure['route_cols']) + 1
+        segments['direction'] = '出口'
+        pieces.append(segments)
+
+    pieces = [piece for piece in pieces if len(piece)]
+    if not pieces:
+        return pd.DataFrame()
+    routes = pd.concat(pieces, ignore_index=True)
+    routes = routes[valid_rows[routes['row'].to_numpy(dtype=np.int64)]]
+    routes = routes.sort_values(['row', 'source', 'pos'], kind='stable')
+    if routes.empty:
+        return pd.DataFrame()
+
+    origins = routes['origin'].to_numpy(dtype=object)
+    destinations = routes['destination'].to_numpy(dtype=object)
+    direction = routes['direction'].to_numpy(dtype=object, copy=True)
+    computed = pd.isna(direction)
+    if computed.any():
+        direction[computed] = _directions(origins[computed], destinations[computed])
+
+    # 其他字段按行整列提取，再按航段所在行取值
+    def field(col_key, default=''):
+        col = structure[col_key]
+        if col and col in df.columns:
+            return _text_values(df[col])
+        return np.full(n, default, dtype=object)
+
+    def first_present(cols):
+        values = pd.Series([''] * n, dtype=object)
+        for col in reversed(cols):
+            if col in df.columns:
+                column = df[col]
+                values = column.astype(object).where(column.notna(), values)
+        return values.astype(str).str.strip().to_numpy(dtype=object)
+
+    # 特殊说明为空时使用运营频率（默认“正常运营”）
+    special = pd.Series(np.full(n, '', dtype=object))
+    if structure['special_col'] and structure['special_col'] in df.columns:
+        column = df[structure['special_col']]
+        special = column.astype(object).where(column.notna(), '')
+    frequency = pd.Series(np.full(n, '正常运营', dtype=object))
+    if structure['frequency_col'] and structure['frequency_col'] in df.columns:
+        column = df[structure['frequency_col']]
+        frequency = column.astype(object).where(column.notna(), '正常运营')
+    special = special.where(special.astype(bool), frequency).astype(str).str.strip().to_numpy(dtype=object)
+
+    row_ids = routes['row'].to_numpy(dtype=np.int64)
+    return pd.DataFrame({
+        'direction': direction.tolist(),
+        'airline': airline[row_ids].tolist(),
+        'reg': field('reg_col')[row_ids].tolist(),
+        'aircraft': field('aircraft_col')[row_ids].tolist(),
+        'age': field('age_col')[row_ids].tolist(),
+        'origin': origins.tolist(),
+        'origin_iata': routes['origin_iata'].tolist(),
+        'destination': destinations.tolist(),
+        'dest_iata': routes['dest_iata'].tolist(),
+        'flight_time': first_present(structure['flight_time_cols'])[row_ids].tolist(),
+        'flight_distance': first_present(structure['flight_distance_cols'])[row_ids].tolist(),
+        'special': special[row_ids].tolist(),
+        'flight_number': field('flight_number_col')[row_ids].tolist(),
+    }, columns=RECORD_COLUMNS)
+
+
+def sniff_encoding(file: str, sample_size: int = 64 * 1024) -> Optional[str]:
+    """读取文件开头的字节判断文本编码：BOM → UTF-8 → GBK，都不符合时返回 None
+
+    只解码一小段样本，不再对整个文件逐个编码试读。
+    """
+    with open(file, 'rb') as f:
+        sample = f.read(sample_size)
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    # 样本可能在多字节字符中间截断，非文件末尾时按增量方式解码
+    final = len(sample) < sample_size
+    for encoding in ['utf-8', 'gbk']:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=final)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def read_file_chunks(file: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                     report: Optional[Dict[str, Any]] = None) -> Optional[Iterator[pd.DataFrame]]:
+    """按文件类型读取数据块；无法读取时返回 None
+
+    .xlsx/.xlsm 使用 openpyxl 只读模式流式分块读取，其他格式整表读取为单个块。
+
+    Args:
+        report: 可选的文件报告字典，填入 encoding（文本文件的编码）和 error（读取失败原因）
+    """
+    if report is None:
+        report = {}
     
-    for file in files:
+    if is_streamable(file):
+        chunks = iter_excel_chunks(file, chunk_rows)
         try:
-            print(f"正在处理文件: {os.path.basename(file)}")
-            
-            # 多种方式尝试读取文件
-            df = None
-            encodings = ['utf-8', 'gbk', 'gb2312', 'utf-8-sig']
-            
-            if file.lower().endswith(('.xlsx', '.xls')):
-                try:
-                    df = pd.read_excel(file, engine='openpyxl')
-                except:
-                    try:
-                        df = pd.read_excel(file, engine='xlrd')
-                    except:
-                        print(f"无法读取Excel文件: {file}")
-                        continue
-            elif file.lower().endswith('.csv'):
-                for encoding in encodings:
-                    try:
-                        df = pd.read_csv(file, encoding=encoding)
-                        break
-                    except:
-                        continue
-                if df is None:
-                    print(f"⚠️ 跳过无法读取的CSV文件: {os.path.basename(file)}")
-                    continue
-            else:
-                # 尝试自动检测格式
-                for encoding in encodings:
-                    try:
-                        df = pd.read_csv(file, encoding=encoding)
-                        break
-                    except:
-                        try:
-                            df = pd.read_excel(file)
-                            break
-                        except:
-                            continue
-                if df is None:
-                    print(f"⚠️ 跳过无法识别格式的文件: {os.path.basename(file)}")
-                    continue
-            
-            if df is None or df.empty:
-                print(f"⚠️ 跳过空文件: {os.path.basename(file)}")
+            # 读取首块以尽早发现无法打开的文件
+            first = next(chunks, None)
+        except Exception as e:
+            report['error'] = f"无法读取Excel文件: {e}"
+            return None
+        return iter([]) if first is None else itertools.chain([first], chunks)
+    
+    if file.lower().endswith('.xls'):
+        errors = []
+        for engine in ['openpyxl', 'xlrd']:
+            try:
+                return iter([pd.read_excel(file, engine=engine)])
+            except Exception as e:
+                errors.append(f"{engine}: {e}")
+        report['error'] = f"无法读取Excel文件: {'; '.join(errors)}"
+        return None
+    
+    encoding = sniff_encoding(file)
+    report['encoding'] = encoding
+    if file.lower().endswith('.csv'):
+        if encoding is None:
+            report['error'] = "无法识别CSV文件编码"
+            return None
+        try:
+            return iter([pd.read_csv(file, encoding=encoding)])
+        except Exception as e:
+            report['error'] = f"无法读取CSV文件: {e}"
+            return None
+    
+    # 未知扩展名：文本编码可识别时先按CSV读取，否则按Excel读取
+    errors = []
+    if encoding is not None:
+        try:
+            return iter([pd.read_csv(file, encoding=encoding)])
+        except Exception as e:
+            errors.append(f"csv: {e}")
+    try:
+        return iter([pd.read_excel(file)])
+    except Exception as e:
+        errors.append(f"excel: {e}")
+    report['error'] = f"无法识别文件格式: {'; '.join(errors)}"
+    return None
+
+
+def parse_file(file: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """解析单个航司数据文件（可在子进程中执行）
+
+    Returns:
+        (航线记录DataFrame, 文件报告)。文件报告包含 file、status（ok / skipped / failed）、
+        rows（原始行数）、records（航线记录数）、seconds、encoding、error
+    """
+    start = time.perf_counter()
+    report = {'file': os.path.basename(file), 'status': 'ok', 'rows': 0, 'records': 0,
+              'seconds': 0.0, 'encoding': None, 'error': None}
+    frames = []
+    try:
+        # 按块读取；表格结构按首块检测，合并单元格的向下填充跨块延续
+        chunks = read_file_chunks(file, chunk_rows, report)
+        if chunks is None:
+            report['status'] = 'failed'
+            return pd.DataFrame(), report
+        
+        # 从文件名提取航司名称
+        airline_name = os.path.basename(file).split('.')[0]
+        # 清理文件名中的前缀
+        for prefix in ['示例数据_', '数据_', 'sample_', 'data_']:
+            if airline_name.startswith(prefix):
+                airline_name = airline_name[len(prefix):]
+                break
+        
+        structure = None
+        fill_values = {}
+        for chunk in chunks:
+            if chunk.empty:
                 continue
-            
-            print(f"原始数据形状: {df.shape}")
-            print(f"列名: {list(df.columns)}")
-            
-            # 智能检测表格结构
-            structure = detect_table_structure(df)
-            print(f"检测到的结构: {structure}")
+            report['rows'] += len(chunk)
+            if structure is None:
+                # 智能检测表格结构
+                structure = detect_table_structure(chunk)
+                chunk_structure = structure
+            else:
+                # 标题行只出现在首块
+                chunk_structure = {**structure, 'data_start_row': 0}
             
             # 清理和标准化数据
-            df_clean = clean_and_normalize_data(df, structure)
-            print(f"清理后数据形状: {df_clean.shape}")
+            df_clean = clean_and_normalize_data(chunk, chunk_structure, fill_values)
             
-            # 从文件名提取航司名称
-            airline_name = os.path.basename(file).split('.')[0]
-            # 清理文件名中的前缀
-            for prefix in ['示例数据_', '数据_', 'sample_', 'data_']:
-                if airline_name.startswith(prefix):
-                    airline_name = airline_name[len(prefix):]
-                    break
-            
-            # 处理每一行数据
-            processed_count = 0
-            for idx, row in df_clean.iterrows():
-                # 获取航司名称
-                airline_value = None
-                if structure['airline_col'] and structure['airline_col'] in row.index:
-                    airline_value = row[structure['airline_col']]
-                
-                # 如果没有航司列或航司为空，使用文件名
-                if pd.isna(airline_value) or str(airline_value).strip() == '':
-                    airline_value = airline_name
-                
-                if pd.isna(airline_value) or str(airline_value).strip() == '':
-                    continue  # 跳过无法确定航司的行
-                
-                # 提取航线信息
-                routes = extract_route_info(row, structure)
-                
-                # 如果没有找到航线信息，尝试其他方法
-                if not routes:
-                    # 检查是否有未识别的列包含航线信息
-                    for col in df_clean.columns:
-                        if col not in [structure.get(k) for k in structure.keys() if k.endswith('_col')]:
-                            col_value = row[col]
-                            if pd.notna(col_value) and '-' in str(col_value):
-                                segments = parse_route_text(str(col_value))
-                                for origin_info, dest_info in segments:
-                                    routes.append({
-                                        'origin': origin_info['name'],
-                                        'destination': dest_info['name'],
-                                        'direction': '出口',
-                                        'origin_iata': origin_info['iata'],
-                                        'dest_iata': dest_info['iata']
-                                    })
-                                break
-                
-                # 为每个航线创建记录
-                for route_info in routes:
-                    # 获取其他字段值
-                    reg_value = ''
-                    if structure['reg_col'] and structure['reg_col'] in row.index:
-                        reg_value = row[structure['reg_col']] if pd.notna(row[structure['reg_col']]) else ''
-                    
-                    aircraft_value = ''
-                    if structure['aircraft_col'] and structure['aircraft_col'] in row.index:
-                        aircraft_value = row[structure['aircraft_col']] if pd.notna(row[structure['aircraft_col']]) else ''
-                    
-                    age_value = ''
-                    if structure['age_col'] and structure['age_col'] in row.index:
-                        age_value = row[structure['age_col']] if pd.notna(row[structure['age_col']]) else ''
-                    
-                    flight_number_value = ''
-                    if structure['flight_number_col'] and structure['flight_number_col'] in row.index:
-                        flight_number_value = row[structure['flight_number_col']] if pd.notna(row[structure['flight_number_col']]) else ''
-                    
-                    frequency_value = '正常运营'
-                    if structure['frequency_col'] and structure['frequency_col'] in row.index:
-                        frequency_value = row[structure['frequency_col']] if pd.notna(row[structure['frequency_col']]) else '正常运营'
-                    
-                    special_value = ''
-                    if structure['special_col'] and structure['special_col'] in row.index:
-                        special_value = row[structure['special_col']] if pd.notna(row[structure['special_col']]) else ''
-                    
-                    # 获取飞行时间和距离
-                    flight_time_value = ''
-                    flight_distance_value = ''
-                    
-                    for time_col in structure['flight_time_cols']:
-                        if time_col in row.index and pd.notna(row[time_col]):
-                            flight_time_value = str(row[time_col])
-                            break
-                    
-                    for dist_col in structure['flight_distance_cols']:
-                        if dist_col in row.index and pd.notna(row[dist_col]):
-                            flight_distance_value = str(row[dist_col])
-                            break
-                    
-                    all_rows.append({
-                        "direction": route_info.get('direction', '出口'),
-                        "airline": str(airline_value).strip(),
-                        "reg": str(reg_value).strip(),
-                        "aircraft": str(aircraft_value).strip(),
-                        "age": str(age_value).strip(),
-                        "origin": route_info['origin'],
-                        "origin_iata": route_info.get('origin_iata', ''),
-                        "destination": route_info['destination'],
-                        "dest_iata": route_info.get('dest_iata', ''),
-                        "flight_time": str(flight_time_value).strip(),
-                        "flight_distance": str(flight_distance_value).strip(),
-                        "special": str(special_value or frequency_value).strip(),
-                        "flight_number": str(flight_number_value).strip()
-                    })
-                    processed_count += 1
-            
-            print(f"从文件 {os.path.basename(file)} 中提取了 {processed_count} 条航线记录")
-            successfully_loaded_files.append(os.path.basename(file))  # 记录成功加载的文件
-            
-        except Exception as e:
-            print(f"处理文件 {file} 时出错: {e}")
-            import traceback
-            traceback.print_exc()
-            continue
+            # 按列批量提取本块的航线记录
+            records = extract_file_frame(df_clean, structure, airline_name)
+            if not records.empty:
+                frames.append(records)
+        
+        if structure is None:
+            report['status'] = 'skipped'
+            report['error'] = "空文件"
+    except Exception as e:
+        report['status'] = 'failed'
+        report['error'] = f"{type(e).__name__}: {e}"
     
-    result_df = pd.DataFrame(all_rows)
+    result_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    report['records'] = len(result_df)
+    report['seconds'] = time.perf_counter() - start
+    return result_df, report
+
+
+def _parse_files(files, chunk_rows: int, max_workers: Optional[int]):
+    """并行解析多个文件，结果按输入顺序返回；进程池不可用时退回顺序解析"""
+    if max_workers is None:
+        max_workers = min(len(files), os.cpu_count() or 1)
+    if max_workers > 1 and len(files) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                # map 按提交顺序返回结果，合并顺序与文件顺序一致
+                return list(executor.map(parse_file, files, [chunk_rows] * len(files))), max_workers
+        except (OSError, BrokenProcessPool) as e:
+            print(f"⚠️ 进程池不可用，改为顺序加载: {e}")
+    return [parse_file(file, chunk_rows) for file in files], 1
+
+
+def load_data(files, chunk_rows: int = DEFAULT_CHUNK_ROWS, max_workers: Optional[int] = None):
+    """加载并解析多个航司数据文件 - 智能解析版本
+
+    多个文件在进程池中并行解析（max_workers 默认取文件数和CPU核数的较小值，1 表示顺序解析），
+    结果按文件顺序合并。Excel 工作簿按 chunk_rows 行分块流式读取，内存占用与工作簿大小无关。
+
+    每个文件的耗时、行数和失败原因记录在 result_df.attrs['load_report'] 中：
+    {'files': [文件报告, ...], 'workers', 'seconds', 'records'}
+    """
+    start = time.perf_counter()
+    files = list(files)
+    results, workers = _parse_files(files, chunk_rows, max_workers)
     
-    # 数据合并统计
-    if len(successfully_loaded_files) > 1:
-        print(f"\n📊 数据合并统计：")
-        print(f"   成功加载文件数量：{len(successfully_loaded_files)}")
-        print(f"   合并后总记录数：{len(result_df)}")
-        
-        # 按航司统计
-        if 'airline' in result_df.columns:
-            airline_counts = result_df['airline'].value_counts()
-            print(f"   涉及航司数量：{len(airline_counts)}")
-            for airline, count in airline_counts.head(5).items():
-                print(f"     - {airline}: {count} 条记录")
-            if len(airline_counts) > 5:
-                print(f"     - 其他 {len(airline_counts) - 5} 个航司...")
-    else:
-        print(f"总共加载了 {len(result_df)} 条航线记录")
+    frames = [df for df, _ in results if not df.empty]
+    file_reports = [report for _, report in results]
+    result_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    successfully_loaded_files = [report['file'] for report in file_reports if report['status'] == 'ok']
     
-    # 将成功加载的文件信息添加到DataFrame的元数据中
+    # 将成功加载的文件信息和加载报告添加到DataFrame的元数据中
     result_df.attrs['successfully_loaded_files'] = successfully_loaded_files
-    return result_df
\ No newline at end of file
+    result_df.attrs['load_report'] = {
+        'files': file_reports,
+        'workers': workers,
+        'seconds': time.perf_counter() - start,
+        'records': len(result_df),
+    }
+    return result_df
@@ -0,0 +1,170 @@
+# D:\flight_tool\route_aggregation.py
+"""航线汇总表：按 (始发地, 目的地) 汇总航班数、航司、方向、机型、往返标记和机场邻接表"""
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from route_graph import RouteGraph
+from transit_analysis import TRANSIT_SEPARATORS
+
+# 连接城市数达到该值的机场视为主要中转枢纽
+MAJOR_HUB_CONNECTIONS = 6
+
+
+def has_transit_separator(city) -> bool:
+    """城市名中是否带有中转分隔符"""
+    text = str(city)
+    return any(sep in text for sep in TRANSIT_SEPARATORS)
+
+
+def _unique_in_order(values) -> list:
+    """去重并保持首次出现的顺序（忽略空值）"""
+    return [v for v in dict.fromkeys(values) if not pd.isna(v)]
+
+
+class RouteAggregate:
+    """筛选结果的航线汇总
+
+    Attributes:
+        routes: {(始发地, 目的地): 航线信息字典}，按首次出现顺序排列
+        outbound: {机场: [目的地, ...]} 出港邻接表
+        inbound: {机场: [始发地, ...]} 进港邻接表
+        total_records: 航线记录总数（含重复）
+    """
+
+    def __init__(self, routes: Dict[Tuple, dict], outbound: Dict[str, List], inbound: Dict[str, List],
+                 total_records: int, import_records: int):
+        self.routes = routes
+        self.outbound = outbound
+        self.inbound = inbound
+        self.total_records = total_records
+        self.import_records = import_records
+        self._graph = None
+
+    def __len__(self):
+        return len(self.routes)
+
+    def __contains__(self, key):
+        return key in self.routes
+
+    def get(self, origin, destination) -> Optional[dict]:
+        return self.routes.get((origin, destination))
+
+    def count(self, origin, destination) -> int:
+        route = self.routes.get((origin, destination))
+        return route['count'] if route else 0
+
+    def is_round_trip(self, origin, destination) -> bool:
+        """是否存在反向航线"""
+        return (destination, origin) in self.routes
+
+    def connections(self, city) -> set:
+        """与该机场直接相连的城市"""
+        return set(self.outbound.get(city, [])) | set(self.inbound.get(city, []))
+
+    def graph(self) -> RouteGraph:
+        """筛选结果的航线网络图（按需构建一次）"""
+        if self._graph is None:
+            keys = list(self.routes)
+            self._graph = RouteGraph.from_edges(
+                [origin for origin, _ in keys], [destination for _, destination in keys],
+                [route['count'] for route in self.routes.values()])
+        return self._graph
+
+    def endpoints(self, keys=None) -> Dict[str, dict]:
+        """航线端点机场：每个机场只出现一次，带起降角色和计数
+
+        Args:
+            keys: 只统计这些航线（如地图上实际绘制的航线），默认全部
+
+        Returns:
+            {机场: {'role': 'origin'/'destination'/'both', 'outbound_routes', 'inbound_routes',
+                    'outbound_records', 'inbound_records'}}，按首次出现顺序（始发地在前）
+        """
+        endpoints = {}
+        for key, route in self.routes.items():
+            if keys is not None and key not in keys:
+                continue
+            origin, destination = key
+            for city, side in ((origin, 'outbound'), (destination, 'inbound')):
+                endpoint = endpoints.setdefault(city, {'outbound_routes': 0, 'inbound_routes': 0,
+                                                       'outbound_records': 0, 'inbound_records': 0})
+                endpoint[side + '_routes'] += 1
+                endpoint[side + '_records'] += route['count']
+
+        for endpoint in endpoints.values():
+            if endpoint['outbound_routes'] and endpoint['inbound_routes']:
+                endpoint['role'] = 'both'
+            else:
+                endpoint['role'] = 'origin' if endpoint['outbound_routes'] else 'destination'
+        return endpoints
+
+    def legend_stats(self) -> dict:
+        """图例统计：进出口记录数、往返航线对、含中转记录数、主要枢纽"""
+        round_trip_records = sum(r['count'] for r in self.routes.values() if r['is_round_trip'])
+        transit_records = sum(r['count'] for r in self.routes.values() if r['has_transit'])
+
+        # 机场编号按首次出现顺序分配，枢纽顺序与逐行统计一致
+        major_hubs = self.graph().hub_degrees(MAJOR_HUB_CONNECTIONS)
+
+        return {
+            'import_count': self.import_records,
+            'export_count': self.total_records - self.import_records,
+            'round_trip_records': round_trip_records,
+            'transit_count': transit_records,
+            'major_hubs': major_hubs,
+        }
+
+
+def build_route_aggregate(filtered: pd.DataFrame) -> RouteAggregate:
+    """按 (始发地, 目的地) 单次分组生成航线汇总"""
+    if filtered.empty:
+        return RouteAggregate({}, {}, {}, 0, 0)
+
+    df = pd.DataFrame({
+        'origin': filtered['origin'].to_numpy(),
+        'destination': filtered['destination'].to_numpy(),
+        'airline': filtered['airline'].to_numpy(),
+        'aircraft': filtered['aircraft'].to_numpy() if 'aircraft' in filtered.columns else None,
+        'direction': filtered['direction'].to_numpy() if 'direction' in filtered.columns else '出口',
+    })
+    keys = ['origin', 'destination']
+
+    # 航班数（分组顺序 = 首次出现顺序）
+    counts = df.groupby(keys, sort=False, observed=True, dropna=False).size()
+    routes = {}
+    for (origin, destination), count in counts.items():
+        routes[(origin, destination)] = {
+            'origin': origin,
+            'destination': destination,
+            'count': int(count),
+            'airline_counts': {},
+            'main_airline': None,
+            'airlines': [],
+            'directions': [],
+            'aircraft': [],
+        }
+
+    # 航司分布；主要航司取航班最多者，并列时取最先出现的航司
+    airline_counts = df.groupby(keys + ['airline'], sort=False, observed=True, dropna=False).size()
+    for (origin, destination, airline), count in airline_counts.items():
+        route = routes[(origin, destination)]
+        route['airline_counts'][airline] = int(count)
+        route['airlines'].append(airline)
+        if route['main_airline'] is None or count > route['airline_counts'][route['main_airline']]:
+            route['main_airline'] = airline
+
+    grouped = df.groupby(keys, sort=False, observed=True, dropna=False)
+    for (origin, destination), values in grouped['direction'].unique().items():
+        routes[(origin, destination)]['directions'] = _unique_in_order(values)
+    for (origin, destination), values in grouped['aircraft'].unique().items():
+        routes[(origin, destination)]['aircraft'] = _unique_in_order(values)
+
+    # 往返标记、中转标记和机场邻接表
+    outbound, inbound = {}, {}
+    for (origin, destination), route in routes.items():
+        route['is_round_trip'] = (destination, origin) in routes
+        route['has_transit'] = has_transit_separator(origin) or has_transit_separator(destination)
+        outbound.setdefault(origin, []).append(destination)
+        inbound.setdefault(destination, []).append(origin)
+
+    import_records = int((df['direction'] == '进口').sum())
+    return RouteAggregate(routes, outbound, inbound, len(df), import_records)
@@ -0,0 +1,142 @@
+# D:\flight_tool\route_density.py
+"""航线密度栅格：大圆采样按航班数加权累加到墨卡托网格，输出为 PNG 图片"""
+import base64
+import struct
+import zlib
+from typing import Tuple
+import numpy as np
+from route_enrichment import EARTH_RADIUS_KM
+from route_geometry import unit_vectors, segment_counts
+
+# 相邻采样点之间的最大弧长（公里）和每条航线的最多采样点数
+DENSITY_SAMPLE_KM = 100
+DENSITY_MAX_SAMPLES = 64
+
+# 网格大小（像素）：经度方向 × 墨卡托纵坐标方向
+DENSITY_WIDTH = 1024
+DENSITY_HEIGHT = 1024
+
+# Web 墨卡托的纬度范围
+MERCATOR_MAX_LAT = 85.051128779806589
+
+# 每批采样的航线数（控制中间数组的内存）
+DENSITY_BATCH = 8192
+
+# 颜色渐变：(归一化密度, RGB)，从低到高
+DENSITY_COLORS = [
+    (0.0, (65, 105, 225)),
+    (0.35, (50, 205, 50)),
+    (0.65, (255, 215, 0)),
+    (1.0, (139, 0, 0)),
+]
+
+# PNG 压缩级别（folium.utilities.write_png 固定用 9，大图编码比累加网格还慢）
+PNG_COMPRESS_LEVEL = 6
+
+# 最低/最高不透明度
+DENSITY_MIN_ALPHA = 90
+DENSITY_MAX_ALPHA = 230
+
+
+def mercator_y(lat: np.ndarray) -> np.ndarray:
+    """纬度 -> Web 墨卡托纵坐标（以度为单位，纬度上限对应 180）"""
+    lat = np.clip(lat, -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT)
+    return np.degrees(np.arcsinh(np.tan(np.radians(lat))))
+
+
+def route_samples(lat1, lon1, lat2, lon2, weights, sample_km: float = DENSITY_SAMPLE_KM) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """一批航线的大圆采样点
+
+    Returns:
+        (墨卡托纵坐标, 经度, 权重) 一维数组；权重为航线权重 × 该采样点代表的弧长（公里）
+    """
+    lat1, lon1, lat2, lon2, weights = (np.asarray(v, dtype=float) for v in (lat1, lon1, lat2, lon2, weights))
+    a = unit_vectors(lat1, lon1)
+    b = unit_vectors(lat2, lon2)
+    angles = np.arctan2(np.linalg.norm(np.cross(a, b), axis=-1), np.sum(a * b, axis=-1))
+    counts = segment_counts(angles, sample_km, 1, DENSITY_MAX_SAMPLES)
+
+    # 第 j 个采样点位于第 j 段的中点 t = (j + 0.5) / n；只为实际的采样点计算（不补齐成矩阵），
+    # 逐点运算用 float32（误差约 1 米，远小于网格分辨率）
+    rows = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    t = ((np.arange(len(rows)) - starts[rows] + 0.5) / counts[rows]).astype(np.float32)
+    a, b, angles32 = a.astype(np.float32), b.astype(np.float32), angles.astype(np.float32)
+
+    # slerp 权重；距离极近时退化为线性插值（此时点几乎重合，不再归一化）
+    d = angles32[rows]
+    sin_d = np.sin(d)
+    near = sin_d < 1e-9
+    safe = np.where(near, 1.0, sin_d)
+    wa = np.where(near, 1.0 - t, np.sin((1.0 - t) * d) / safe)
+    wb = np.where(near, t, np.sin(t * d) / safe)
+    x = wa * a[rows, 0] + wb * b[rows, 0]
+    y = wa * a[rows, 1] + wb * b[rows, 1]
+    z = wa * a[rows, 2] + wb * b[rows, 2]
+
+    # 墨卡托纵坐标 = artanh(sin(纬度))，直接由单位向量的 z 分量得到
+    limit = np.sin(np.radians(MERCATOR_MAX_LAT))
+    sample_y = np.degrees(np.arctanh(np.clip(z, -limit, limit)))
+    sample_lon = np.degrees(np.arctan2(y, x))
+    sample_weights = (weights * angles * EARTH_RADIUS_KM / counts)[rows]
+    return sample_y, sample_lon, sample_weights
+
+
+def density_grid(lat1, lon1, lat2, lon2, weights, width: int = DENSITY_WIDTH, height: int = DENSITY_HEIGHT,
+                 sample_km: float = DENSITY_SAMPLE_KM) -> np.ndarray:
+    """航线密度网格
+
+    Args:
+        lat1, lon1, lat2, lon2: 每条航线的端点坐标
+        weights: 每条航线的权重（航班数）
+
+    Returns:
+        (height, width) 数组，第 0 行为北端；值为经过该格子的加权弧长（公里）
+    """
+    lat1, lon1, lat2, lon2, weights = (np.asarray(v, dtype=float) for v in (lat1, lon1, lat2, lon2, weights))
+    grid = np.zeros(height * width)
+    for start in range(0, len(lat1), DENSITY_BATCH):
+        batch = slice(start, start + DENSITY_BATCH)
+        y, lon, w = route_samples(lat1[batch], lon1[batch], lat2[batch], lon2[batch], weights[batch], sample_km)
+        column = np.clip(((lon + 180.0) / 360.0 * width).astype(np.int64), 0, width - 1)
+        row = np.clip(((180.0 - y) / 360.0 * height).astype(np.int64), 0, height - 1)
+        grid += np.bincount(row * width + column, weights=w, minlength=height * width)
+    return grid.reshape(height, width)
+
+
+def density_image(grid: np.ndarray) -> np.ndarray:
+    """密度网格 -> RGBA 图片（uint8）：按对数归一化着色，空白格子透明"""
+    image = np.zeros(grid.shape + (4,), dtype=np.uint8)
+    peak = grid.max(initial=0.0)
+    if peak <= 0:
+        return image
+    level = np.log1p(grid) / np.log1p(peak)
+    stops = [stop for stop, _ in DENSITY_COLORS]
+    for channel in range(3):
+        image[..., channel] = np.interp(level, stops, [color[channel] for _, color in DENSITY_COLORS]).astype(np.uint8)
+    alpha = DENSITY_MIN_ALPHA + (DENSITY_MAX_ALPHA - DENSITY_MIN_ALPHA) * level
+    image[..., 3] = np.where(grid > 0, alpha, 0).astype(np.uint8)
+    return image
+
+
+def density_bounds() -> list:
+    """密度图片在地图上的范围 [[南, 西], [北, 东]]"""
+    return [[-MERCATOR_MAX_LAT, -180.0], [MERCATOR_MAX_LAT, 180.0]]
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack('!I', len(data)) + tag + data + struct.pack('!I', zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def density_png_url(image: np.ndarray) -> str:
+    """RGBA 图片 -> PNG data URL（可直接作为 ImageOverlay 的图片地址）"""
+    height, width = image.shape[:2]
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 4)
+    png = b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('!2I5B', width, height, 8, 6, 0, 0, 0)),
+        _png_chunk(b'IDAT', zlib.compress(raw.tobytes(), PNG_COMPRESS_LEVEL)),
+        _png_chunk(b'IEND', b''),
+    ])
+    return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
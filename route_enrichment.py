@@ -0,0 +1,258 @@
+# D:\flight_tool\route_enrichment.py
+"""航线距离/时长/速度批量补全"""
+import math
+import re
+import numpy as np
+import pandas as pd
+from airport_coords import airport_resolver
+
+try:
+    from geopy.distance import geodesic
+except ImportError:
+    geodesic = None
+
+# 地球平均半径（公里）
+EARTH_RADIUS_KM = 6371.0088
+
+# 默认巡航速度（公里/小时）
+DEFAULT_SPEED_KMH = 850
+
+# 根据机型设置平均速度（公里/小时）
+AIRCRAFT_SPEEDS = {
+    'B737': 850,  # 波音737
+    'B747': 900,  # 波音747
+    'B757': 850,  # 波音757
+    'B767': 850,  # 波音767
+    'B777': 900,  # 波音777
+    'B787': 900,  # 波音787
+    'A320': 840,  # 空客A320
+    'A330': 880,  # 空客A330
+    'A340': 880,  # 空客A340
+    'A350': 900,  # 空客A350
+    'A380': 900,  # 空客A380
+}
+
+# 超过该时长（小时）的估算结果视为无效
+MAX_FLIGHT_HOURS = 24
+
+
+def calculate_flight_distance(origin_coords, dest_coords):
+    """
+    计算两点间的飞行距离（大圆距离）
+
+    Args:
+        origin_coords: 起点坐标 [lat, lon]
+        dest_coords: 终点坐标 [lat, lon]
+
+    Returns:
+        距离（公里）
+    """
+    try:
+        # 验证坐标格式
+        if not (origin_coords and dest_coords and
+                len(origin_coords) == 2 and len(dest_coords) == 2):
+            return None
+
+        # 验证坐标数值有效性
+        for coord_pair in [origin_coords, dest_coords]:
+            lat, lon = coord_pair
+            # 检查是否为有限数值
+            if not (math.isfinite(lat) and math.isfinite(lon)):
+                return None
+            # 检查经纬度范围
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                return None
+
+        if geodesic is not None:
+            distance = geodesic(origin_coords, dest_coords).kilometers
+        else:
+            # 未安装geopy时使用球面公式
+            distance = float(haversine_km(origin_coords[0], origin_coords[1],
+                                          dest_coords[0], dest_coords[1]))
+        # 验证计算结果
+        if math.isfinite(distance) and distance >= 0:
+            return round(distance, 0)
+        return None
+    except Exception as e:
+        print(f"计算飞行距离时出错: {e}")
+        return None
+
+
+def lookup_aircraft_speed(aircraft_type=''):
+    """查找机型对应的平均速度（公里/小时），未匹配时返回默认速度"""
+    if aircraft_type:
+        aircraft_upper = str(aircraft_type).upper()
+        for model, model_speed in AIRCRAFT_SPEEDS.items():
+            if model in aircraft_upper:
+                return model_speed
+    return DEFAULT_SPEED_KMH
+
+
+def calculate_flight_time(distance_km, aircraft_type=''):
+    """
+    根据距离和机型估算飞行时间
+
+    Args:
+        distance_km: 飞行距离（公里）
+        aircraft_type: 机型
+
+    Returns:
+        飞行时间（小时h分钟m格式）
+    """
+    try:
+        # 验证距离数值有效性
+        if not distance_km or not math.isfinite(distance_km) or distance_km <= 0:
+            return None
+
+        # 计算飞行时间（小时）
+        flight_hours = distance_km / lookup_aircraft_speed(aircraft_type)
+
+        # 验证计算结果
+        if not math.isfinite(flight_hours) or flight_hours <= 0:
+            return None
+
+        # 转换为小时h分钟m格式
+        hours = int(flight_hours)
+        minutes = int((flight_hours - hours) * 60)
+
+        # 验证最终结果
+        if hours < 0 or minutes < 0 or hours > MAX_FLIGHT_HOURS:  # 超过24小时的飞行时间不太现实
+            return None
+
+        return f"{hours}h{minutes:02d}m"
+    except Exception as e:
+        print(f"计算飞行时间时出错: {e}")
+        return None
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """向量化的大圆距离（公里），参数可以是标量或等长数组"""
+    lat1 = np.radians(np.asarray(lat1, dtype=float))
+    lon1 = np.radians(np.asarray(lon1, dtype=float))
+    lat2 = np.radians(np.asarray(lat2, dtype=float))
+    lon2 = np.radians(np.asarray(lon2, dtype=float))
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def resolve_city_coords(cities: pd.Series):
+    """批量获取城市坐标：每个唯一城市只查询一次
+
+    Returns:
+        (lat数组, lon数组)，缺失或无效坐标为 NaN
+    """
+    lat, lon, _ = airport_resolver.resolve_many(cities)
+    return lat, lon
+
+
+def aircraft_speeds(aircraft: pd.Series) -> np.ndarray:
+    """批量查找机型速度：每个唯一机型只匹配一次"""
+    codes, uniques = pd.factorize(aircraft.fillna(''), use_na_sentinel=True)
+    unique_speeds = np.array([lookup_aircraft_speed(a) for a in uniques] + [DEFAULT_SPEED_KMH], dtype=float)
+    return unique_speeds[codes]
+
+
+def _is_blank(series: pd.Series) -> np.ndarray:
+    """判断字符串列中的空值（NaN、空字符串、'nan'）"""
+    text = series.astype(str).str.strip()
+    return (series.isna() | text.isin(['', 'nan', 'NaN', 'None'])).to_numpy()
+
+
+def parse_distance_km(series: pd.Series) -> np.ndarray:
+    """把 '1234公里' / '1234' 形式的距离字符串解析为浮点数组"""
+    extracted = series.astype(str).str.extract(r'^\s*(\d+(?:\.\d+)?)\s*(?:公里)?\s*$')[0]
+    return pd.to_numeric(extracted, errors='coerce').to_numpy(dtype=float)
+
+
+def parse_flight_minutes(series: pd.Series) -> np.ndarray:
+    """把 '5h30m' 或 '5:30' 形式的飞行时长解析为分钟数组"""
+    text = series.astype(str)
+    hm = text.str.extract(r'^\s*(\d+)\s*h\s*(\d+)\s*m\s*$')
+    colon = text.str.extract(r'^\s*(\d+)\s*:\s*(\d+)\s*$')
+    hours = pd.to_numeric(hm[0], errors='coerce').fillna(pd.to_numeric(colon[0], errors='coerce'))
+    minutes = pd.to_numeric(hm[1], errors='coerce').fillna(pd.to_numeric(colon[1], errors='coerce'))
+    return (hours * 60 + minutes).to_numpy(dtype=float)
+
+
+def parse_speed_kmh(series: pd.Series) -> np.ndarray:
+    """把 '850 km/h' / '850' 形式的速度字符串解析为浮点数组"""
+    extracted = series.astype(str).str.extract(r'^\s*(\d+(?:\.\d+)?)\s*(?:km/h|公里/小时)?\s*$', flags=re.IGNORECASE)[0]
+    return pd.to_numeric(extracted, errors='coerce').to_numpy(dtype=float)
+
+
+def enrich_routes(df: pd.DataFrame) -> pd.DataFrame:
+    """批量补全缺失的飞行距离、飞行时间和飞行速度
+
+    已有的字符串值保持不变，仅填充空值；同时新增数值列：
+    - distance_km: 飞行距离（公里）
+    - flight_minutes: 飞行时长（分钟）
+    - speed_kmh: 飞行速度（公里/小时）
+    """
+    if df.empty:
+        return df
+
+    result = df.copy()
+    for col in ['flight_distance', 'flight_time', 'speed']:
+        if col not in result.columns:
+            result[col] = ''
+
+    # 每个唯一城市只解析一次坐标
+    origin_lat, origin_lon = resolve_city_coords(result['origin'])
+    dest_lat, dest_lon = resolve_city_coords(result['destination'])
+    has_coords = ~(np.isnan(origin_lat) | np.isnan(dest_lat))
+
+    # 记录缺失坐标的城市（每个城市只输出一次）
+    for column, lat in [('origin', origin_lat), ('destination', dest_lat)]:
+        missing = result.loc[np.isnan(lat), column].dropna().unique()
+        if len(missing) > 0:
+            label = '起点' if column == 'origin' else '终点'
+            print(f"缺失{label}坐标: {', '.join(map(str, missing))}")
+
+    # 距离：已有值优先，否则使用计算值（四舍五入到公里）
+    computed_km = np.round(haversine_km(origin_lat, origin_lon, dest_lat, dest_lon))
+    distance_blank = _is_blank(result['flight_distance'])
+    fill_distance = distance_blank & has_coords & (computed_km > 0)
+    distance_km = np.where(distance_blank, np.nan, parse_distance_km(result['flight_distance']))
+    distance_km = np.where(fill_distance, computed_km, distance_km)
+
+    if fill_distance.any():
+        result['flight_distance'] = result['flight_distance'].astype(object)
+        result.loc[fill_distance, 'flight_distance'] = [f"{int(km)}公里" for km in computed_km[fill_distance]]
+
+    # 飞行时间：已有值优先，否则根据距离和机型速度估算
+    speeds = aircraft_speeds(result['aircraft']) if 'aircraft' in result.columns else np.full(len(result), float(DEFAULT_SPEED_KMH))
+    time_blank = _is_blank(result['flight_time'])
+    with np.errstate(invalid='ignore'):
+        flight_hours = distance_km / speeds
+        whole_hours = np.floor(flight_hours)
+        estimated_minutes = whole_hours * 60 + np.floor((flight_hours - whole_hours) * 60)
+        fill_time = time_blank & (distance_km > 0) & (whole_hours <= MAX_FLIGHT_HOURS)
+    flight_minutes = np.where(time_blank, np.nan, parse_flight_minutes(result['flight_time']))
+    flight_minutes = np.where(fill_time, estimated_minutes, flight_minutes)
+
+    if fill_time.any():
+        result['flight_time'] = result['flight_time'].astype(object)
+        result.loc[fill_time, 'flight_time'] = [
+            f"{int(m // 60)}h{int(m % 60):02d}m" for m in estimated_minutes[fill_time]
+        ]
+
+    # 飞行速度：已有值优先，否则由距离和时长推算
+    speed_blank = _is_blank(result['speed'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estimated_speed = distance_km / (flight_minutes / 60)
+        fill_speed = speed_blank & np.isfinite(estimated_speed) & (estimated_speed > 0)
+    speed_kmh = np.where(speed_blank, np.nan, parse_speed_kmh(result['speed']))
+    speed_kmh = np.where(fill_speed, estimated_speed, speed_kmh)
+
+    if fill_speed.any():
+        result['speed'] = result['speed'].astype(object)
+        result.loc[fill_speed, 'speed'] = [f"{int(s)} km/h" for s in speed_kmh[fill_speed]]
+
+    result['distance_km'] = distance_km
+    result['flight_minutes'] = flight_minutes
+    result['speed_kmh'] = speed_kmh
+
+    return result
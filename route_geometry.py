@@ -0,0 +1,242 @@
+# D:\flight_tool\route_geometry.py
+"""航线几何：批量生成大圆路径（跨越180度经线时切开）、按缩放级别简化并缓存"""
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+import numpy as np
+from route_enrichment import EARTH_RADIUS_KM
+
+# 相邻路径点之间的最大弧长（公里）
+DEFAULT_SEGMENT_KM = 300
+
+# 每条航线的最少/最多分段数
+MIN_SEGMENTS = 1
+MAX_SEGMENTS = 64
+
+# 缓存键中坐标保留的小数位
+KEY_DECIMALS = 4
+
+# 细节层次：(最大缩放级别, 简化容差/度)；容差约为该缩放级别下一个像素对应的经度跨度，
+# 超过最后一级的缩放级别使用完整路径
+LOD_LEVELS = [(3, 0.2), (5, 0.05), (7, 0.01)]
+
+# 一条航线的路径：若干段，每段为 (点数, 2) 的 [纬度, 经度] 数组（跨越180度经线时多于一段）
+RoutePath = List[np.ndarray]
+
+
+def unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """经纬度（度）-> 三维单位向量，最后一维为 (x, y, z)"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def central_angles(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """两点间的球心角（弧度），用 atan2 计算，近距离和对跖点附近都数值稳定"""
+    a = unit_vectors(np.asarray(lat1, dtype=float), np.asarray(lon1, dtype=float))
+    b = unit_vectors(np.asarray(lat2, dtype=float), np.asarray(lon2, dtype=float))
+    return np.arctan2(np.linalg.norm(np.cross(a, b), axis=-1), np.sum(a * b, axis=-1))
+
+
+def segment_counts(angles: np.ndarray, max_segment_km: float = DEFAULT_SEGMENT_KM,
+                   min_segments: int = MIN_SEGMENTS, max_segments: int = MAX_SEGMENTS) -> np.ndarray:
+    """按弧长自适应的分段数"""
+    counts = np.ceil(angles * EARTH_RADIUS_KM / max_segment_km)
+    return np.clip(counts, min_segments, max_segments).astype(np.int64)
+
+
+def great_circle_points(lat1, lon1, lat2, lon2, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """批量 slerp：第 i 条航线在 counts[i] + 1 个等弧长位置上的点
+
+    Returns:
+        (纬度, 经度) 两个 (航线数, max(counts) + 1) 数组；每行 counts[i] 之后的位置重复终点
+    """
+    a = unit_vectors(np.asarray(lat1, dtype=float), np.asarray(lon1, dtype=float))
+    b = unit_vectors(np.asarray(lat2, dtype=float), np.asarray(lon2, dtype=float))
+    angles = np.arctan2(np.linalg.norm(np.cross(a, b), axis=-1), np.sum(a * b, axis=-1))
+
+    columns = np.arange(int(counts.max(initial=0)) + 1)
+    t = np.minimum(columns[None, :] / counts[:, None], 1.0)
+
+    # 距离极近时 sin(d) 接近 0，退化为线性插值（归一化后仍在球面上）
+    d = angles[:, None]
+    sin_d = np.sin(d)
+    near = sin_d < 1e-9
+    safe = np.where(near, 1.0, sin_d)
+    wa = np.where(near, 1.0 - t, np.sin((1.0 - t) * d) / safe)
+    wb = np.where(near, t, np.sin(t * d) / safe)
+
+    points = wa[..., None] * a[:, None, :] + wb[..., None] * b[:, None, :]
+    points /= np.linalg.norm(points, axis=-1, keepdims=True)
+    lat = np.degrees(np.arcsin(np.clip(points[..., 2], -1.0, 1.0)))
+    lon = np.degrees(np.arctan2(points[..., 1], points[..., 0]))
+    return lat, lon
+
+
+def split_antimeridian(lat: np.ndarray, lon: np.ndarray) -> RoutePath:
+    """在180度经线处切开路径：相邻点经度差超过180度时插入经线上的交点，分成多段"""
+    jumps = np.flatnonzero(np.abs(np.diff(lon)) > 180)
+    if len(jumps) == 0:
+        return [np.column_stack([lat, lon])]
+
+    segments = []
+    start = 0
+    current = []
+    for i in jumps:
+        lon_next = lon[i + 1] + (360 if lon[i] > 0 else -360)
+        edge = 180.0 if lon[i] > 0 else -180.0
+        fraction = (edge - lon[i]) / (lon_next - lon[i])
+        crossing_lat = lat[i] + fraction * (lat[i + 1] - lat[i])
+        head = np.column_stack([lat[start:i + 1], lon[start:i + 1]])
+        segments.append(np.vstack(current + [head, [[crossing_lat, edge]]]))
+        current = [np.array([[crossing_lat, -edge]])]
+        start = i + 1
+    segments.append(np.vstack(current + [np.column_stack([lat[start:], lon[start:]])]))
+    return segments
+
+
+def lod_tolerance(zoom) -> float:
+    """缩放级别对应的简化容差（度），0 表示使用完整路径"""
+    for max_zoom, tolerance in LOD_LEVELS:
+        if zoom <= max_zoom:
+            return tolerance
+    return 0.0
+
+
+def segment_distances(lat: np.ndarray, lon: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """每个点到其所在简化线段（start -> end 列）的平面距离（经纬度，单位度）"""
+    rows = np.arange(lat.shape[0])[:, None]
+    ax, ay = lon[rows, start], lat[rows, start]
+    dx, dy = lon[rows, end] - ax, lat[rows, end] - ay
+    length2 = dx * dx + dy * dy
+    t = np.clip(((lon - ax) * dx + (lat - ay) * dy) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+    return np.hypot(lon - ax - t * dx, lat - ay - t * dy)
+
+
+def simplify_mask(lat: np.ndarray, lon: np.ndarray, counts: np.ndarray, tolerance: float) -> np.ndarray:
+    """批量 Douglas–Peucker：所有航线同时迭代，每轮为每个超出容差的区间保留距离最大的点
+
+    Args:
+        lat, lon: (航线数, 列数) 路径点（经度需连续，不能在180度经线处跳变）
+        counts: 每条航线的分段数（第 i 行有效点为 0..counts[i]）
+        tolerance: 简化容差（度）
+
+    Returns:
+        (航线数, 列数) 布尔数组，保留的点为 True（端点总是保留）
+    """
+    rows = np.arange(len(counts))
+    columns = np.arange(lat.shape[1])
+    valid = columns[None, :] <= counts[:, None]
+    if tolerance <= 0:
+        return valid
+    keep = np.zeros(lat.shape, dtype=bool)
+    keep[:, 0] = True
+    keep[rows, counts] = True
+
+    while True:
+        # 每个点所在区间的左右端点：左侧/右侧最近的保留点
+        start = np.maximum.accumulate(np.where(keep, columns, 0), axis=1)
+        end = np.minimum.accumulate(np.where(keep, columns, lat.shape[1] - 1)[:, ::-1], axis=1)[:, ::-1]
+        distances = segment_distances(lat, lon, start, end)
+        distances[keep | ~valid] = -1.0
+        candidates = distances > tolerance
+        if not candidates.any():
+            return keep
+
+        # 区间按左端点标识，每个区间只保留距离最大的点
+        row_index, column_index = np.nonzero(candidates)
+        span_max = np.full(lat.shape, -1.0)
+        np.maximum.at(span_max, (row_index, start[row_index, column_index]), distances[row_index, column_index])
+        keep |= candidates & (distances == span_max[rows[:, None], start])
+
+
+def great_circle_paths(lat1, lon1, lat2, lon2, max_segment_km: float = DEFAULT_SEGMENT_KM,
+                       tolerance: float = 0.0) -> List[RoutePath]:
+    """批量生成航线大圆路径（自适应点数，跨越180度经线时切开）
+
+    Args:
+        tolerance: Douglas–Peucker 简化容差（度），0 为不简化
+    """
+    lat1, lon1, lat2, lon2 = (np.asarray(v, dtype=float) for v in (lat1, lon1, lat2, lon2))
+    if len(lat1) == 0:
+        return []
+    counts = segment_counts(central_angles(lat1, lon1, lat2, lon2), max_segment_km)
+    lat, lon = great_circle_points(lat1, lon1, lat2, lon2, counts)
+
+    # 端点精确使用原坐标（避免 atan2 把 180 度变成 -180 度等微小差异）
+    rows = np.arange(len(counts))
+    lat[:, 0], lon[:, 0] = lat1, lon1
+    lat[rows, counts], lon[rows, counts] = lat2, lon2
+
+    crossing = np.any(np.abs(np.diff(lon, axis=1)) > 180, axis=1)
+    if tolerance > 0:
+        # 简化在连续经度上进行，避免180度经线处的跳变被当成偏离
+        unwrapped = np.degrees(np.unwrap(np.radians(lon), axis=1))
+        keep = simplify_mask(lat, unwrapped, counts, tolerance)
+    else:
+        keep = np.ones(lat.shape, dtype=bool)
+
+    paths = []
+    for i, count in enumerate(counts):
+        kept = keep[i, :count + 1]
+        route_lat, route_lon = lat[i, :count + 1][kept], lon[i, :count + 1][kept]
+        if crossing[i]:
+            paths.append(split_antimeridian(route_lat, route_lon))
+        else:
+            paths.append([np.column_stack([route_lat, route_lon])])
+    return paths
+
+
+class RouteGeometry:
+    """航线路径生成器：按 (机场坐标对, 简化容差) 缓存批量生成的大圆路径
+
+    Args:
+        max_segment_km: 相邻路径点之间的最大弧长
+        memo_size: 最多缓存的坐标对数
+    """
+
+    def __init__(self, max_segment_km: float = DEFAULT_SEGMENT_KM, memo_size: int = 65536):
+        self.max_segment_km = max_segment_km
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[tuple, RoutePath]" = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def paths(self, lat1, lon1, lat2, lon2, tolerance: float = 0.0) -> List[RoutePath]:
+        """批量取路径：缓存未命中的坐标对一次性计算
+
+        Args:
+            tolerance: 简化容差（度，见 lod_tolerance），每个容差的简化结果分别缓存
+        """
+        coords = np.round(np.column_stack([lat1, lon1, lat2, lon2]).astype(float), KEY_DECIMALS)
+        keys = [tuple(row) + (tolerance,) for row in coords.tolist()]
+
+        missing: Dict[tuple, int] = {}
+        found: Dict[tuple, RoutePath] = {}
+        for key in keys:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                found[key] = self._memo[key]
+                self.stats['hits'] += 1
+            elif key not in found and key not in missing:
+                missing[key] = len(missing)
+        self.stats['misses'] += len(missing)
+
+        if missing:
+            batch = np.array(list(missing), dtype=float)
+            new_paths = great_circle_paths(batch[:, 0], batch[:, 1], batch[:, 2], batch[:, 3],
+                                           self.max_segment_km, tolerance)
+            found.update(zip(missing, new_paths))
+            for key in missing:
+                self._memo[key] = found[key]
+
+        # 先取出本批结果再淘汰，单批坐标对多于缓存容量时也不会丢失
+        result = [found[key] for key in keys]
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return result
+
+    def clear(self):
+        """清空路径缓存"""
+        self._memo.clear()
+
+
+# 创建全局实例（跨 Streamlit 重跑复用缓存）
+route_geometry = RouteGeometry()
@@ -0,0 +1,344 @@
+# D:\flight_tool\route_graph.py
+"""航线网络图（CSR 邻接数组）：最短路径、可达机场、中心性和连通分量"""
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# 路径权重：航段数 / 距离 / 航班频次（频次越高代价越低）
+WEIGHT_LEGS = 'legs'
+WEIGHT_DISTANCE = 'distance'
+WEIGHT_FREQUENCY = 'frequency'
+WEIGHTS = [WEIGHT_LEGS, WEIGHT_DISTANCE, WEIGHT_FREQUENCY]
+
+
+class RouteGraph:
+    """CSR 结构的航线网络
+
+    Attributes:
+        names: 机场名称列表，下标即机场编号
+        indptr: 出边起始位置，长度为 机场数 + 1
+        indices: 出边的目的机场编号
+        frequency: 出边的航班频次
+        distance: 出边的距离（公里），未知为 NaN
+    """
+
+    def __init__(self, names: Sequence, sources: np.ndarray, targets: np.ndarray,
+                 frequency: np.ndarray, distance: np.ndarray):
+        self.names = list(names)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+
+        # 按起点稳定排序，同一起点的出边保持原有顺序
+        order = np.argsort(sources, kind='stable')
+        self.indices = np.asarray(targets, dtype=np.int64)[order]
+        self.frequency = np.asarray(frequency, dtype=np.int64)[order]
+        self.distance = np.asarray(distance, dtype=float)[order]
+        self.sources = np.asarray(sources, dtype=np.int64)[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources, minlength=n), out=self.indptr[1:])
+
+        self._edge_index = {(int(s), int(t)): e for e, (s, t) in enumerate(zip(self.sources, self.indices))}
+        self._betweenness: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+
+    # ------------------------------------------------------------------ 构建
+
+    @classmethod
+    def from_edges(cls, origins: Sequence, destinations: Sequence,
+                   frequency: Sequence = None, distance: Sequence = None) -> 'RouteGraph':
+        """由去重后的边列表构建；机场编号按首次出现顺序分配"""
+        ids: Dict[object, int] = {}
+        sources, targets = [], []
+        for origin, destination in zip(origins, destinations):
+            sources.append(ids.setdefault(origin, len(ids)))
+            targets.append(ids.setdefault(destination, len(ids)))
+        count = len(sources)
+        frequency = np.ones(count, dtype=np.int64) if frequency is None else np.asarray(frequency)
+        distance = np.full(count, np.nan) if distance is None else np.asarray(distance, dtype=float)
+        return cls(list(ids), np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64),
+                   frequency, distance)
+
+    @classmethod
+    def from_routes(cls, df: pd.DataFrame) -> 'RouteGraph':
+        """由航线表构建：按 (始发地, 目的地) 分组，频次为记录数，距离取中位数
+
+        距离优先使用补全阶段的 distance_km 列，没有时按机场坐标计算大圆距离。
+        """
+        if df.empty:
+            return cls.from_edges([], [])
+
+        pairs = pd.DataFrame({'origin': df['origin'].to_numpy(), 'destination': df['destination'].to_numpy()})
+        if 'distance_km' in df.columns:
+            pairs['distance_km'] = pd.to_numeric(df['distance_km'], errors='coerce').to_numpy()
+        else:
+            pairs['distance_km'] = np.nan
+        grouped = pairs.groupby(['origin', 'destination'], sort=False, dropna=True)['distance_km']
+        edges = grouped.agg(['size', 'median'])
+
+        origins = edges.index.get_level_values(0)
+        destinations = edges.index.get_level_values(1)
+        distance = edges['median'].to_numpy(dtype=float, copy=True)
+        missing = np.isnan(distance)
+        if missing.any():
+            from route_enrichment import haversine_km, resolve_city_coords
+            origin_lat, origin_lon = resolve_city_coords(pd.Series(origins[missing]))
+            dest_lat, dest_lon = resolve_city_coords(pd.Series(destinations[missing]))
+            distance[missing] = haversine_km(origin_lat, origin_lon, dest_lat, dest_lon)
+        return cls.from_edges(origins, destinations, edges['size'].to_numpy(), distance)
+
+    # ------------------------------------------------------------------ 基本查询
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def __contains__(self, name) -> bool:
+        return name in self._ids
+
+    def node_id(self, name) -> int:
+        """机场编号，不存在时抛出 KeyError"""
+        return self._ids[name]
+
+    def successors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def edge(self, origin, destination) -> Optional[int]:
+        """边编号（用于读取 frequency / distance），不存在时返回 None"""
+        if origin not in self._ids or destination not in self._ids:
+            return None
+        return self._edge_index.get((self._ids[origin], self._ids[destination]))
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=self.node_count)
+
+    def edge_weights(self, weight: str = WEIGHT_LEGS) -> np.ndarray:
+        """边代价数组；距离未知的边代价为无穷大（不可用）"""
+        if weight == WEIGHT_LEGS:
+            return np.ones(self.edge_count)
+        if weight == WEIGHT_DISTANCE:
+            return np.where(np.isnan(self.distance), np.inf, self.distance)
+        if weight == WEIGHT_FREQUENCY:
+            return 1.0 / np.maximum(self.frequency, 1)
+        raise ValueError(f"未知的路径权重: {weight}")
+
+    # ------------------------------------------------------------------ 中心性与连通性
+
+    def hub_degrees(self, min_connections: int = 0) -> Dict[object, dict]:
+        """出港/进港连接城市数之和不少于 min_connections 的机场（按机场编号顺序）"""
+        outbound = self.out_degree()
+        inbound = self.in_degree()
+        total = outbound + inbound
+        return {
+            self.names[i]: {'total': int(total[i]), 'outbound': int(outbound[i]), 'inbound': int(inbound[i])}
+            for i in np.flatnonzero(total >= min_connections)
+        }
+
+    def degree_centrality(self) -> np.ndarray:
+        """度中心性：(出度 + 入度) / (机场数 - 1)"""
+        if self.node_count <= 1:
+            return np.zeros(self.node_count)
+        return (self.out_degree() + self.in_degree()) / (self.node_count - 1)
+
+    def betweenness_centrality(self) -> np.ndarray:
+        """有向图的介数中心性（按航段数计最短路径，Brandes 算法，结果缓存在图上）"""
+        if self._betweenness is not None:
+            return self._betweenness
+
+        n = self.node_count
+        indptr, indices = self.indptr, self.indices
+        centrality = np.zeros(n)
+        for source in range(n):
+            stack = []
+            predecessors: List[List[int]] = [[] for _ in range(n)]
+            sigma = np.zeros(n)
+            sigma[source] = 1.0
+            dist = np.full(n, -1, dtype=np.int64)
+            dist[source] = 0
+            queue = deque([source])
+            while queue:
+                v = queue.popleft()
+                stack.append(v)
+                for w in indices[indptr[v]:indptr[v + 1]]:
+                    if dist[w] < 0:
+                        dist[w] = dist[v] + 1
+                        queue.append(w)
+                    if dist[w] == dist[v] + 1:
+                        sigma[w] += sigma[v]
+                        predecessors[w].append(v)
+            delta = np.zeros(n)
+            while stack:
+                w = stack.pop()
+                for v in predecessors[w]:
+                    delta[v] += sigma[v] / sigma[w] * (1.0 + delta[w])
+                if w != source:
+                    centrality[w] += delta[w]
+
+        if n > 2:
+            centrality /= (n - 1) * (n - 2)
+        self._betweenness = centrality
+        return centrality
+
+    def connected_components(self) -> np.ndarray:
+        """弱连通分量：返回每个机场的分量编号（按分量大小降序编号）"""
+        if self._components is not None:
+            return self._components
+
+        # 并查集合并每条边的两端
+        parent = np.arange(self.node_count)
+
+        def find(x):
+            root = x
+            while parent[root] != root:
+                root = parent[root]
+            while parent[x] != root:
+                parent[x], x = root, parent[x]
+            return root
+
+        for source, target in zip(self.sources, self.indices):
+            a, b = find(source), find(target)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+        roots = np.array([find(i) for i in range(self.node_count)], dtype=np.int64)
+        _, inverse, sizes = np.unique(roots, return_inverse=True, return_counts=True)
+        rank = np.empty(len(sizes), dtype=np.int64)
+        rank[np.argsort(-sizes, kind='stable')] = np.arange(len(sizes))
+        self._components = rank[inverse]
+        return self._components
+
+    def centrality_table(self) -> pd.DataFrame:
+        """各机场的连接数、度中心性、介数中心性和所属分量"""
+        return pd.DataFrame({
+            'airport': self.names,
+            'outbound': self.out_degree(),
+            'inbound': self.in_degree(),
+            'degree_centrality': self.degree_centrality(),
+            'betweenness': self.betweenness_centrality(),
+            'component': self.connected_components(),
+        })
+
+    # ------------------------------------------------------------------ 路径查询
+
+    def reachable_within(self, origin, max_legs: int) -> Dict[object, int]:
+        """max_legs 段以内可到达的机场及最少航段数（不含起点）"""
+        if origin not in self._ids or max_legs < 1:
+            return {}
+        source = self._ids[origin]
+        legs = {source: 0}
+        frontier = [source]
+        for step in range(1, max_legs + 1):
+            next_frontier = []
+            for node in frontier:
+                for target in self.successors(node):
+                    target = int(target)
+                    if target not in legs:
+                        legs[target] = step
+                        next_frontier.append(target)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return {self.names[node]: step for node, step in legs.items() if node != source}
+
+    def _dijkstra(self, source: int, target: int, costs: np.ndarray, max_legs: Optional[int],
+                  banned_nodes=frozenset(), banned_edges=frozenset()):
+        """单源最短路径，返回 (代价, 节点列表, 边列表)，不可达时返回 None"""
+        best = {(source, 0): 0.0}
+        heap = [(0.0, 0, source, None)]
+        parents = {}
+        while heap:
+            cost, legs, node, parent = heapq.heappop(heap)
+            state = (node, legs)
+            if state in parents or cost > best.get(state, np.inf):
+                continue
+            parents[state] = parent
+            if node == target:
+                nodes, edges = [], []
+                while state is not None:
+                    nodes.append(state[0])
+                    parent = parents[state]
+                    if parent is not None:
+                        edges.append(parent[1])
+                        state = parent[0]
+                    else:
+                        state = None
+                return cost, nodes[::-1], edges[::-1]
+            if max_legs is not None and legs >= max_legs:
+                continue
+            for e in range(self.indptr[node], self.indptr[node + 1]):
+                nxt = int(self.indices[e])
+                if nxt in banned_nodes or e in banned_edges or not np.isfinite(costs[e]):
+                    continue
+                new_state = (nxt, legs + 1 if max_legs is not None else 0)
+                new_cost = cost + costs[e]
+                if new_state not in parents and new_cost < best.get(new_state, np.inf):
+                    best[new_state] = new_cost
+                    heapq.heappush(heap, (new_cost, new_state[1], nxt, (state, e)))
+        return None
+
+    def k_shortest_paths(self, origin, destination, k: int = 3, weight: str = WEIGHT_LEGS,
+                         max_legs: Optional[int] = None) -> List[dict]:
+        """起点到终点的前 k 条无环最短路径（Yen 算法）
+
+        Args:
+            weight: 路径代价，'legs' 航段数 / 'distance' 距离 / 'frequency' 航班频次倒数
+            max_legs: 最多航段数，None 表示不限
+
+        Returns:
+            [{'airports': [...], 'legs', 'distance_km', 'min_frequency', 'cost'}, ...]，按代价升序
+        """
+        if origin not in self._ids or destination not in self._ids or origin == destination or k < 1:
+            return []
+        costs = self.edge_weights(weight)
+        source, target = self._ids[origin], self._ids[destination]
+
+        first = self._dijkstra(source, target, costs, max_legs)
+        if first is None:
+            return []
+        accepted = [first]
+        candidates = []
+        seen = {tuple(first[1])}
+        while len(accepted) < k:
+            _, prev_nodes, prev_edges = accepted[-1]
+            for i in range(len(prev_nodes) - 1):
+                spur = prev_nodes[i]
+                root_nodes = prev_nodes[:i + 1]
+                root_edges = prev_edges[:i]
+                banned_edges = {edges[i] for _, nodes, edges in accepted
+                                if len(nodes) > i + 1 and nodes[:i + 1] == root_nodes}
+                remaining = None if max_legs is None else max_legs - i
+                spur_path = self._dijkstra(spur, target, costs, remaining,
+                                           banned_nodes=set(root_nodes[:-1]), banned_edges=banned_edges)
+                if spur_path is None:
+                    continue
+                nodes = root_nodes[:-1] + spur_path[1]
+                if tuple(nodes) in seen:
+                    continue
+                seen.add(tuple(nodes))
+                edges = root_edges + spur_path[2]
+                total = float(costs[root_edges].sum()) + spur_path[0] if root_edges else spur_path[0]
+                heapq.heappush(candidates, (total, len(edges), nodes, edges))
+            if not candidates:
+                break
+            total, _, nodes, edges = heapq.heappop(candidates)
+            accepted.append((total, nodes, edges))
+
+        return [self._describe_path(nodes, edges, cost) for cost, nodes, edges in accepted]
+
+    def _describe_path(self, nodes: List[int], edges: List[int], cost: float) -> dict:
+        edges = np.asarray(edges, dtype=np.int64)
+        return {
+            'airports': [self.names[node] for node in nodes],
+            'legs': len(edges),
+            'distance_km': float(self.distance[edges].sum()),
+            'min_frequency': int(self.frequency[edges].min()),
+            'cost': float(cost),
+        }
@@ -0,0 +1,465 @@
+# D:\flight_tool\route_pipeline.py
+"""航线数据处理流水线：load → clean → enrich → store → index → graph → filter → aggregate → render → detail"""
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+import pandas as pd
+import streamlit as st
+from parser import load_data
+from data_cleaner import clean_route_data, get_sorted_cities
+from parse_cache import load_or_build
+from route_enrichment import enrich_routes
+from map_builder import (build_route_layer, build_geojson_route_layer, build_density_route_layer, freeze_layer,
+                         GEOJSON_MAP_MODE, DENSITY_MAP_MODE)
+from route_aggregation import RouteAggregate, build_route_aggregate
+from filter_engine import FilterIndex
+from route_graph import RouteGraph
+from route_store import RouteStore
+from display_columns import add_display_columns
+from detail_table import DetailTable
+
+# 阶段顺序（调试面板按此顺序显示）
+STAGES = ['load', 'clean', 'enrich', 'store', 'index', 'graph', 'filter', 'aggregate', 'render', 'detail']
+
+# 每次运行的阶段记录保存在会话状态中
+PIPELINE_STATS_KEY = 'pipeline_stats'
+
+# 按线程统计各阶段函数体的实际执行次数（Streamlit 每个会话在独立线程中运行脚本）
+_local = threading.local()
+
+
+def _stage_runs() -> dict:
+    if not hasattr(_local, 'runs'):
+        _local.runs = {}
+    return _local.runs
+
+
+def make_key(*parts) -> str:
+    """由任意可JSON序列化的参数生成短哈希键"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def file_stamp(files) -> tuple:
+    """文件路径、大小和修改时间，作为加载阶段的缓存输入"""
+    stamp = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+            stamp.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            stamp.append((os.path.abspath(path), None, None))
+    return tuple(stamp)
+
+
+def begin_pipeline_run():
+    """开始新一次脚本运行，清空上次的阶段记录"""
+    st.session_state[PIPELINE_STATS_KEY] = []
+
+
+def get_stage_log() -> list:
+    """本次运行中各阶段的记录：[{'stage', 'hit', 'ms'}]"""
+    return st.session_state.get(PIPELINE_STATS_KEY, [])
+
+
+def last_stage_hit(name: str) -> bool:
+    """本次运行中该阶段最近一次调用是否命中缓存"""
+    for record in reversed(get_stage_log()):
+        if record['stage'] == name:
+            return record['hit']
+    return False
+
+
+def _record_stage(name: str, hit: bool, seconds: float):
+    log = st.session_state.get(PIPELINE_STATS_KEY)
+    if log is None:
+        log = []
+        st.session_state[PIPELINE_STATS_KEY] = log
+    log.append({'stage': name, 'hit': hit, 'ms': seconds * 1000})
+
+
+def pipeline_stage(name: str, resource: bool = False, **cache_kwargs):
+    """把函数包装为带缓存的流水线阶段，并记录命中情况和耗时
+
+    Args:
+        name: 阶段名称
+        resource: True 时使用 st.cache_resource（返回对象不复制，如 folium 地图）
+        cache_kwargs: 传给 st.cache_data / st.cache_resource 的参数
+
+    阶段函数只能用关键字参数调用，以便 Streamlit 正确识别下划线参数。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def body(**kwargs):
+            runs = _stage_runs()
+            runs[name] = runs.get(name, 0) + 1
+            return func(**kwargs)
+
+        cache = st.cache_resource if resource else st.cache_data
+        cached = cache(show_spinner=False, **cache_kwargs)(body)
+
+        @functools.wraps(func)
+        def wrapper(**kwargs):
+            runs_before = _stage_runs().get(name, 0)
+            start = time.perf_counter()
+            result = cached(**kwargs)
+            hit = _stage_runs().get(name, 0) == runs_before
+            _record_stage(name, hit, time.perf_counter() - start)
+            return result
+
+        wrapper.clear = cached.clear
+        wrapper.stage_name = name
+        return wrapper
+    return decorator
+
+
+def read_route_files(files_to_load) -> pd.DataFrame:
+    """读取航线数据文件并转换为统一格式（不做清理）"""
+    # 检查文件类型并使用相应的加载方法
+    if len(files_to_load) == 1 and files_to_load[0].endswith('.csv'):
+        # 直接加载CSV文件（integrated_all_data_latest.csv）
+        routes_df = pd.read_csv(files_to_load[0], encoding='utf-8')
+
+        # 添加缺失的列（确保与Excel数据格式一致）
+        if 'flight_number' not in routes_df.columns:
+            routes_df['flight_number'] = ''
+        if 'frequency' not in routes_df.columns:
+            routes_df['frequency'] = '正常运营'
+        if 'flight_time' not in routes_df.columns:
+            routes_df['flight_time'] = ''
+        if 'flight_distance' not in routes_df.columns:
+            routes_df['flight_distance'] = ''
+        if 'speed' not in routes_df.columns:
+            routes_df['speed'] = ''
+
+        # 设置成功加载的文件信息；CSV为整合后的数据，仅在去重时清理
+        routes_df.attrs = {
+            'successfully_loaded_files': [os.path.basename(files_to_load[0])],
+            'source_format': 'csv'
+        }
+        return routes_df
+
+    # 检查是否有中国十六家货航国际航线.xlsx文件
+    excel_file = None
+    for file_path in files_to_load:
+        if '中国十六家货航国际航线.xlsx' in file_path or '中国十六家货航国际航线' in os.path.basename(file_path):
+            excel_file = file_path
+            break
+
+    if not excel_file:
+        # 使用原有的加载逻辑
+        return load_data(files_to_load)
+
+    # 检查是否为十六家货航文件，使用对应的解析函数
+    if '中国十六家货航国际航线' in os.path.basename(excel_file):
+        from parse_sixteen_airlines import parse_sixteen_airlines_excel
+        routes_df = parse_sixteen_airlines_excel(excel_file)
+    else:
+        # 使用原有解析函数处理其他Excel文件
+        from fix_parser import parse_excel_route_data
+        routes_df = parse_excel_route_data(excel_file)
+
+    if routes_df.empty:
+        return routes_df
+
+    # 转换为标准格式：重命名列以匹配系统期望的格式
+    routes_df = routes_df.rename(columns={
+        'reg': 'registration',
+        'aircraft': 'aircraft',
+        'age': 'age',
+        'remarks': 'special'
+    })
+
+    # 添加缺失的列
+    if 'flight_number' not in routes_df.columns:
+        routes_df['flight_number'] = ''
+    if 'frequency' not in routes_df.columns:
+        routes_df['frequency'] = '正常运营'
+    if 'flight_time' not in routes_df.columns:
+        routes_df['flight_time'] = ''
+    if 'flight_distance' not in routes_df.columns:
+        routes_df['flight_distance'] = ''
+
+    # 设置成功加载的文件信息
+    routes_df.attrs['successfully_loaded_files'] = [os.path.basename(excel_file)]
+    return routes_df
+
+
+def clean_route_table(routes_df: pd.DataFrame, enable_deduplication: bool) -> pd.DataFrame:
+    """清理读取后的航线表，添加城市分类字段"""
+    if routes_df.empty:
+        return routes_df
+    if routes_df.attrs.get('source_format') == 'csv' and not enable_deduplication:
+        return routes_df
+    attrs = dict(routes_df.attrs)
+    cleaned = clean_route_data(routes_df, enable_deduplication=enable_deduplication)
+    cleaned.attrs.update(attrs)
+    return cleaned
+
+
+def load_route_table(files_to_load, enable_deduplication) -> pd.DataFrame:
+    """读取并清理航线数据文件（不经过缓存）"""
+    return clean_route_table(read_route_files(files_to_load), enable_deduplication)
+
+
+@pipeline_stage('load', max_entries=4)
+def load_stage(files: tuple, stamp: tuple) -> pd.DataFrame:
+    """加载阶段：读取原始数据文件"""
+    return read_route_files(list(files))
+
+
+@pipeline_stage('clean', max_entries=4)
+def clean_stage(files: tuple, stamp: tuple, enable_deduplication: bool, cache_dir: str):
+    """清理阶段：先查磁盘解析缓存，未命中时加载并清理
+
+    Returns:
+        (清理后的DataFrame, 解析缓存报告)
+    """
+    def build():
+        raw_df = load_stage(files=files, stamp=stamp)
+        return clean_route_table(raw_df, enable_deduplication)
+
+    return load_or_build(
+        list(files),
+        build,
+        params={'enable_deduplication': enable_deduplication},
+        cache_dir=cache_dir
+    )
+
+
+@pipeline_stage('enrich', max_entries=4)
+def enrich_stage(_routes: pd.DataFrame, dataset_key: str) -> pd.DataFrame:
+    """补全阶段：批量计算飞行距离、时间和速度"""
+    return enrich_routes(_routes)
+
+
+@pipeline_stage('store', resource=True, max_entries=4)
+def store_stage(_routes: pd.DataFrame, dataset_key: str) -> RouteStore:
+    """存储阶段：补充明细表派生列（每个数据集只算一次），转为字典编码的列存储（共享对象，不可修改）"""
+    return RouteStore.from_frame(add_display_columns(_routes))
+
+
+@pipeline_stage('index', resource=True, max_entries=4)
+def index_stage(_routes: pd.DataFrame, dataset_key: str, _categorize=None) -> dict:
+    """索引阶段：生成筛选控件的选项列表和列式筛选索引（共享对象，不可修改）"""
+    def city_options(column):
+        cities = get_sorted_cities(_routes, column)
+        domestic = [city for city in cities if _categorize(city) == '国内']
+        international = [city for city in cities if _categorize(city) == '国际']
+        options = ['全部']
+        if domestic:
+            options.append('--- 国内城市 ---')
+            options.extend(domestic)
+        if international:
+            options.append('--- 国际城市 ---')
+            options.extend(international)
+        return options
+
+    return {
+        'airlines': sorted(_routes["airline"].dropna().unique()),
+        'origin_options': city_options('origin'),
+        'destination_options': city_options('destination'),
+        'aircrafts': sorted(_routes["aircraft"].dropna().unique()),
+        'engine': FilterIndex(_routes),
+    }
+
+
+@pipeline_stage('graph', resource=True, max_entries=4)
+def graph_stage(_routes: pd.DataFrame, dataset_key: str) -> RouteGraph:
+    """网络图阶段：按数据集构建一次航线网络图（共享对象，中心性等结果缓存在图上）"""
+    return RouteGraph.from_routes(_routes)
+
+
+def apply_filters(routes_df: pd.DataFrame, selection: dict, view_mode: str, engine: FilterIndex = None):
+    """按筛选条件过滤航线，往返航线视图下按城市对配对
+
+    Args:
+        routes_df: 航线数据
+        selection: {筛选键: 选中值}，'全部' 表示不限
+        view_mode: 数据视图模式
+        engine: routes_df 的筛选索引，未提供时临时构建
+
+    Returns:
+        (筛选后的DataFrame, 往返航线配对列表)
+    """
+    if engine is None:
+        engine = FilterIndex(routes_df)
+    # 各条件位图按位与，一次取出结果行
+    filtered = engine.select(selection)
+
+    round_trip_pairs = []
+    if view_mode != "往返航线视图":
+        return filtered, round_trip_pairs
+
+    # 创建往返航线配对
+    route_pairs_dict = {}
+
+    # 按航线对分组
+    for _, row in filtered.iterrows():
+        # 创建航线对的键（不区分方向）
+        route_key = tuple(sorted([row['origin'], row['destination']]))
+
+        if route_key not in route_pairs_dict:
+            route_pairs_dict[route_key] = {'出口': [], '进口': []}
+
+        # 根据实际的起点终点和方向来分类
+        if row['direction'] == '出口':
+            route_pairs_dict[route_key]['出口'].append(row)
+        else:
+            route_pairs_dict[route_key]['进口'].append(row)
+
+    # 创建往返航线对
+    for route_key, directions in route_pairs_dict.items():
+        city1, city2 = route_key
+        export_routes = directions['出口']
+        import_routes = directions['进口']
+
+        if export_routes or import_routes:
+            round_trip_pairs.append({
+                'city_pair': f"{city1} ↔ {city2}",
+                'export_routes': export_routes,
+                'import_routes': import_routes,
+                'total_routes': len(export_routes) + len(import_routes),
+                'has_both_directions': len(export_routes) > 0 and len(import_routes) > 0
+            })
+
+    # 按总航线数排序
+    round_trip_pairs.sort(key=lambda x: x['total_routes'], reverse=True)
+
+    # 更新filtered为往返航线视图的数据
+    filtered_for_display = []
+    for pair in round_trip_pairs:
+        filtered_for_display.extend(pair['export_routes'])
+        filtered_for_display.extend(pair['import_routes'])
+
+    # 转换为DataFrame
+    if filtered_for_display:
+        filtered = pd.DataFrame(filtered_for_display)
+    else:
+        filtered = pd.DataFrame()
+    return filtered, round_trip_pairs
+
+
+@pipeline_stage('filter', max_entries=32)
+def filter_stage(_routes: pd.DataFrame, dataset_key: str, selection: dict, view_mode: str, _engine=None):
+    """筛选阶段"""
+    return apply_filters(_routes, selection, view_mode, _engine)
+
+
+def analyze_route_paths(routes: RouteAggregate) -> dict:
+    """路径分析：往返航线对和城市连接关系（基于航线汇总，每条航线只处理一次）"""
+    route_pairs = {}
+    for (origin, destination), route in routes.routes.items():
+        # 统计往返航线对
+        route_key = tuple(sorted([origin, destination]))
+        if route_key not in route_pairs:
+            route_pairs[route_key] = {'airlines': set(), 'directions': set()}
+        route_pairs[route_key]['airlines'].update(route['airlines'])
+        route_pairs[route_key]['directions'].add(f"{origin}→{destination}")
+
+    # 统计城市连接
+    city_connections = {}
+    for origin, destination in routes.routes:
+        city_connections.setdefault(origin, set()).add(destination)
+        city_connections.setdefault(destination, set()).add(origin)
+
+    return {
+        'round_trip_pairs': [(pair, data) for pair, data in route_pairs.items() if len(data['directions']) >= 2],
+        'one_way_pairs': [(pair, data) for pair, data in route_pairs.items() if len(data['directions']) == 1],
+        'city_connections': city_connections,
+    }
+
+
+def aggregate_routes(filtered: pd.DataFrame) -> dict:
+    """汇总筛选结果：航线汇总表、指标和路径分析"""
+    routes = build_route_aggregate(filtered)
+    if filtered.empty:
+        return {'routes': routes, 'airline_count': 0, 'domestic_count': 0,
+                'international_count': 0, 'has_categories': False, 'paths': None}
+
+    has_categories = "origin_category" in filtered.columns and "destination_category" in filtered.columns
+    domestic_count = international_count = 0
+    if has_categories:
+        domestic_count = int((
+            (filtered["origin_category"] == "国内") &
+            (filtered["destination_category"] == "国内")
+        ).sum())
+        international_count = int((
+            (filtered["origin_category"] == "国际") |
+            (filtered["destination_category"] == "国际")
+        ).sum())
+
+    return {
+        'routes': routes,
+        'airline_count': len(filtered["airline"].unique()),
+        'domestic_count': domestic_count,
+        'international_count': international_count,
+        'has_categories': has_categories,
+        'paths': analyze_route_paths(routes),
+    }
+
+
+@pipeline_stage('aggregate', max_entries=32)
+def aggregate_stage(_filtered: pd.DataFrame, filter_key: str) -> dict:
+    """汇总阶段"""
+    return aggregate_routes(_filtered)
+
+
+@pipeline_stage('render', resource=True, max_entries=8)
+def render_stage(_filtered: pd.DataFrame, _routes: RouteAggregate, filter_key: str,
+                 animation_enabled: bool, animation_speed: int, render_mode: str = GEOJSON_MAP_MODE,
+                 lod_tolerance: float = 0.0):
+    """渲染阶段：构建2D航线图层，返回 (序列化的图层, 统计)
+
+    缓存由所有会话共享，页面每次运行用 thaw_layer 取得独立的图层对象后再挂到会话的底图上。
+    矢量图层模式把航线和机场输出为单个 GeoJSON 图层，逐条绘制模式保留原 folium 对象，
+    两种模式的航线动画都由一个画布图层绘制；
+    密度模式输出一张航线密度图片（按筛选键缓存，与缩放级别无关）；
+    航线路径按当前缩放级别的简化容差生成，每个细节层次分别缓存
+    """
+    if render_mode == DENSITY_MAP_MODE:
+        layer, stats = build_density_route_layer(_filtered, _routes)
+    elif render_mode == GEOJSON_MAP_MODE:
+        layer, stats = build_geojson_route_layer(_filtered, _routes, lod_tolerance, animation_enabled, animation_speed)
+    else:
+        layer, stats = build_route_layer(_filtered, _routes, animation_enabled, animation_speed, lod_tolerance)
+    return freeze_layer(layer), stats
+
+
+@pipeline_stage('detail', resource=True, max_entries=8)
+def detail_stage(_filtered: pd.DataFrame, filter_key: str) -> DetailTable:
+    """明细表阶段：每个筛选结果一个分页明细表（共享对象，已计算的页缓存在表上）"""
+    return DetailTable(_filtered)
+
+
+ALL_STAGES = [load_stage, clean_stage, enrich_stage, store_stage, index_stage, graph_stage, filter_stage, aggregate_stage, render_stage, detail_stage]
+
+
+def clear_pipeline_caches():
+    """清空所有阶段的内存缓存"""
+    for stage in ALL_STAGES:
+        stage.clear()
+
+
+def render_debug_panel():
+    """侧边栏调试面板：显示本次运行各阶段的缓存命中和耗时"""
+    log = get_stage_log()
+    with st.sidebar.expander("🐞 流水线调试", expanded=False):
+        rows = []
+        for stage in STAGES:
+            records = [r for r in log if r['stage'] == stage]
+            if not records:
+                rows.append({'阶段': stage, '状态': '未调用', '耗时(ms)': 0.0})
+                continue
+            record = records[-1]
+            rows.append({
+                '阶段': stage,
+                '状态': '✅ 命中' if record['hit'] else '🔄 执行',
+                '耗时(ms)': round(record['ms'], 1),
+            })
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        total_ms = sum(r['ms'] for r in log if r['stage'] in ('clean', 'enrich', 'store', 'index', 'graph', 'filter', 'aggregate', 'render', 'detail'))
+        st.caption(f"流水线总耗时：{total_ms:.1f} ms")
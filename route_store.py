@@ -0,0 +1,160 @@
+# D:\flight_tool\route_store.py
+"""紧凑的航线内存存储（文本列字典编码，数值列 float 数组）"""
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+# 按数值数组保存的列（补全阶段生成）
+NUMERIC_COLUMNS = ['distance_km', 'flight_minutes', 'speed_kmh']
+
+# 显示时替换为空字符串的缺失值文本
+MISSING_TEXTS = ['nan', 'NaN', 'None']
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class RouteStore:
+    """字典编码的航线列存储
+
+    Args:
+        codes: {列名: 整数编码数组}，-1 表示空值
+        categories: {列名: 类别表}
+        numeric: {列名: 数值数组}
+        index: 行索引
+        columns: 列顺序
+        attrs: 原 DataFrame 的 attrs（加载报告等）
+    """
+
+    def __init__(self, codes: Dict[str, np.ndarray], categories: Dict[str, pd.Index],
+                 numeric: Dict[str, np.ndarray], index: pd.Index, columns: List[str], attrs: dict = None):
+        self._codes = codes
+        self._categories = categories
+        self._numeric = numeric
+        self.index = index
+        self.columns = list(columns)
+        self.attrs = dict(attrs or {})
+        self.size = len(index)
+        # 构建时原 DataFrame 各列的内存占用（字节），供 memory_report 对比
+        self.source_usage: Dict[str, int] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, numeric_columns: List[str] = None) -> 'RouteStore':
+        """由航线表构建：数值列保存为数组，其余列按取值字典编码"""
+        numeric_columns = NUMERIC_COLUMNS if numeric_columns is None else numeric_columns
+        codes, categories, numeric = {}, {}, {}
+        for col in df.columns:
+            series = df[col]
+            if col in numeric_columns or (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)):
+                numeric[col] = series.to_numpy(dtype=float, na_value=np.nan, copy=True)
+                continue
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                categorical = series.array.remove_unused_categories()
+            else:
+                categorical = pd.Categorical(series)
+            codes[col] = np.asarray(categorical.codes)
+            categories[col] = categorical.categories
+        store = cls(codes, categories, numeric, df.index, df.columns, df.attrs)
+        store.source_usage = df.memory_usage(deep=True, index=False).to_dict()
+        return store
+
+    def __len__(self):
+        return self.size
+
+    def codes(self, column: str) -> np.ndarray:
+        """文本列的整数编码（只读视图，-1 为空值）"""
+        return _readonly(self._codes[column])
+
+    def categories(self, column: str) -> pd.Index:
+        return self._categories[column]
+
+    def values(self, column: str) -> np.ndarray:
+        """数值列的底层数组（只读视图）"""
+        return _readonly(self._numeric[column])
+
+    def is_numeric(self, column: str) -> bool:
+        return column in self._numeric
+
+    def column(self, column: str, rows: Optional[np.ndarray] = None) -> pd.Series:
+        """单列；文本列为分类类型。未指定行时不复制底层数组"""
+        index = self.index if rows is None else self.index[rows]
+        if column in self._numeric:
+            values = self._numeric[column] if rows is None else self._numeric[column][rows]
+            return pd.Series(values, index=index, name=column, copy=False)
+        codes = self._codes[column] if rows is None else self._codes[column][rows]
+        categorical = pd.Categorical.from_codes(codes, categories=self._categories[column], validate=False)
+        return pd.Series(categorical, index=index, name=column, copy=False)
+
+    def to_frame(self, rows: Optional[np.ndarray] = None, columns: List[str] = None) -> pd.DataFrame:
+        """以分类列表示的 DataFrame（筛选、聚合等环节使用）"""
+        columns = self.columns if columns is None else columns
+        frame = pd.DataFrame({col: self.column(col, rows) for col in columns}, copy=False)
+        if rows is None:
+            frame.index = self.index
+        frame.attrs.update(self.attrs)
+        return frame
+
+    def to_display(self, rows: Optional[np.ndarray] = None, columns: List[str] = None) -> pd.DataFrame:
+        """显示边界：把选中行的文本列还原为字符串，空值显示为空字符串
+
+        每个类别只转换一次字符串，再按编码取值。
+        """
+        columns = self.columns if columns is None else columns
+        index = self.index if rows is None else self.index[rows]
+        data = {}
+        for col in columns:
+            if col in self._numeric:
+                data[col] = self._numeric[col] if rows is None else self._numeric[col][rows]
+                continue
+            labels = display_strings(self._categories[col])
+            codes = self._codes[col] if rows is None else self._codes[col][rows]
+            data[col] = np.append(labels, '')[codes]
+        return pd.DataFrame(data, index=index)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """各列占用的字节数（编码数组 + 类别表）"""
+        usage = {}
+        for col in self.columns:
+            if col in self._numeric:
+                usage[col] = self._numeric[col].nbytes
+            else:
+                usage[col] = self._codes[col].nbytes + int(self._categories[col].memory_usage(deep=True))
+        return usage
+
+    def memory_report(self, df: pd.DataFrame = None) -> pd.DataFrame:
+        """与原 DataFrame 对比各列内存占用（KB），最后一行为合计
+
+        Args:
+            df: 对比的 DataFrame，默认使用构建时记录的原表内存占用
+        """
+        before = self.source_usage if df is None else df.memory_usage(deep=True, index=False).to_dict()
+        after = self.memory_usage()
+        rows = []
+        for col in self.columns:
+            rows.append({
+                '列': col,
+                '编码方式': '数值数组' if col in self._numeric else f"字典编码（{len(self._categories[col])} 个取值）",
+                'DataFrame(KB)': before.get(col, 0) / 1024,
+                '编码存储(KB)': after[col] / 1024,
+            })
+        rows.append({
+            '列': '合计',
+            '编码方式': '',
+            'DataFrame(KB)': sum(row['DataFrame(KB)'] for row in rows),
+            '编码存储(KB)': sum(row['编码存储(KB)'] for row in rows),
+        })
+        report = pd.DataFrame(rows)
+        report['压缩比'] = (report['DataFrame(KB)'] / report['编码存储(KB)'].where(report['编码存储(KB)'] > 0)).round(1)
+        report[['DataFrame(KB)', '编码存储(KB)']] = report[['DataFrame(KB)', '编码存储(KB)']].round(1)
+        return report
+
+
+def display_strings(values) -> np.ndarray:
+    """把取值转为显示用字符串：空值和 'nan'/'None' 等文本显示为空字符串"""
+    series = pd.Series(values, dtype=object)
+    labels = series.map(lambda v: '' if pd.isna(v) else str(v)).to_numpy(dtype=object)
+    labels[np.isin(labels, MISSING_TEXTS)] = ''
+    return labels
@@ -0,0 +1,99 @@
+# D:\flight_tool\route_tokenizer.py
+"""航线文本分词（两个解析器共用，按文本缓存）"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+from typing import Tuple
+
+# 每个缓存最多保存的不同文本数
+TOKEN_CACHE_SIZE = 65536
+
+# 通用解析器的分段规则
+ROUTE_SPLIT_RE = re.compile(r'\s*[-—>\u2192]\s*')
+IATA_RE = re.compile(r'([A-Z]{3})')
+IATA_PAREN_RE = re.compile(r'\([A-Z]{3}\)')
+
+# 全货机航线表的分隔符（按优先级排列）；'->' 作为整体匹配，不会被当成 '-' 和 '>'
+SEPARATORS = ['—', '-', '→', '->', '至', '到']
+SEPARATOR_RE = re.compile('|'.join(re.escape(sep) for sep in sorted(SEPARATORS, key=len, reverse=True)))
+_SEPARATOR_PRIORITY = {sep: i for i, sep in enumerate(SEPARATORS)}
+
+# 城市名清理规则
+CITY_SUFFIXES = ['机场', '国际机场', '空港', 'Airport', 'International']
+PAREN_RE = re.compile(r'\([^)]*\)')
+
+RouteToken = namedtuple('RouteToken', ['name', 'iata'])
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def tokenize_route_text(text: str) -> Tuple[RouteToken, ...]:
+    """按通用解析器规则拆分航线文本，返回各地点的 (名称, IATA代码)"""
+    tokens = []
+    for part in ROUTE_SPLIT_RE.split(text.strip()):
+        match = IATA_RE.search(part)
+        tokens.append(RouteToken(IATA_PAREN_RE.sub('', part).strip(), match.group(1) if match else None))
+    return tuple(tokens)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def clean_city_name(city_name: str) -> str:
+    """清理城市名称：去掉机场类后缀和括号内容"""
+    if not city_name:
+        return ''
+
+    cleaned = city_name.strip()
+    for suffix in CITY_SUFFIXES:
+        if cleaned.endswith(suffix):
+            cleaned = cleaned[:-len(suffix)].strip()
+
+    # 移除括号及其内容
+    return PAREN_RE.sub('', cleaned).strip()
+
+
+def select_separator(route_str: str) -> str:
+    """一次扫描找出文本中的分隔符，返回优先级最高的一个（没有时返回空字符串）"""
+    found = set(SEPARATOR_RE.findall(route_str))
+    if not found:
+        return ''
+    return min(found, key=_SEPARATOR_PRIORITY.get)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def split_route(route_str: str) -> Tuple[tuple, ...]:
+    """按全货机航线表规则解析航线字符串
+
+    Returns:
+        单段航线为 ((起点, 终点),)，多段航线为 ((起点, 终点, 完整航线),)，无法解析时为空元组
+    """
+    route_str = route_str.strip()
+    sep = select_separator(route_str)
+    if not sep:
+        return ()
+
+    parts = route_str.split(sep)
+    origin = clean_city_name(parts[0].strip())
+    destination = clean_city_name(parts[-1].strip())  # 取最后一个作为终点
+
+    if len(parts) > 2:
+        # 多段航线：保留完整的多段航线描述
+        cleaned_parts = [name for name in (clean_city_name(part.strip()) for part in parts) if name]
+        if len(cleaned_parts) >= 2:
+            return ((origin, destination, sep.join(cleaned_parts)),)
+        return ()
+    if origin and destination:
+        return ((origin, destination),)
+    return ()
+
+
+def cache_stats() -> dict:
+    """各缓存的命中/未命中次数和当前大小"""
+    return {
+        func.__name__: func.cache_info()._asdict()
+        for func in (tokenize_route_text, split_route, clean_city_name)
+    }
+
+
+def clear_caches():
+    """清空分词缓存"""
+    for func in (tokenize_route_text, split_route, clean_city_name):
+        func.cache_clear()
@@ -0,0 +1,87 @@
+# D:\flight_tool\substring_index.py
+"""子串匹配索引（Aho-Corasick 自动机）"""
+from bisect import bisect_right
+from collections import deque
+from typing import Iterable, List, Optional
+
+
+class SubstringAutomaton:
+    """Aho-Corasick 自动机：查找文本中包含的关键词
+
+    关键词按传入顺序编号，first_match 返回编号最小的命中关键词，
+    与 "按顺序遍历关键词、返回第一个命中项" 的结果一致。
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = [str(p) for p in patterns]
+        self._goto = [{}]
+        self._fail = [0]
+        self._output: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            if pattern:
+                self._insert(pattern, index)
+        self._build_fail_links()
+
+        # 反向索引："文本是哪个关键词的子串"，通过拼接串的 find 在C层完成
+        self._joined = '\x00'.join(self.patterns)
+        self._offsets = []
+        offset = 0
+        for pattern in self.patterns:
+            self._offsets.append(offset)
+            offset += len(pattern) + 1
+
+    def _insert(self, pattern: str, index: int):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(index)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_matches(self, text: str):
+        """逐个产出文本中命中的关键词编号（可能重复）"""
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._output[node]:
+                yield from self._output[node]
+
+    def contains_any(self, text: str) -> bool:
+        """文本中是否包含任一关键词"""
+        for _ in self.iter_matches(text):
+            return True
+        return False
+
+    def first_match(self, text: str) -> Optional[int]:
+        """文本中包含的关键词里编号最小的一个，没有则返回 None"""
+        return min(self.iter_matches(text), default=None)
+
+    def first_superstring(self, text: str) -> Optional[int]:
+        """包含该文本的关键词里编号最小的一个，没有则返回 None"""
+        if not text or '\x00' in text:
+            return None
+        position = self._joined.find(text)
+        if position < 0:
+            return None
+        return bisect_right(self._offsets, position) - 1
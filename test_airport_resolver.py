@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试机场坐标解析器（精确/别名/模糊三层）与原线性扫描结果一致
+"""
+
+import numpy as np
+import pandas as pd
+from airport_coords import AIRPORT_COORDS, AirportResolver, get_airport_coords
+from substring_index import SubstringAutomaton
+from conftest import load_sample_routes
+
+
+def legacy_get_airport_coords(city_or_iata):
+    """原 get_airport_coords 的线性扫描实现（仅用于对比）"""
+    if not city_or_iata:
+        return None
+    city_or_iata = str(city_or_iata).strip()
+    if city_or_iata in AIRPORT_COORDS:
+        return AIRPORT_COORDS[city_or_iata]
+    for key, coords in AIRPORT_COORDS.items():
+        if city_or_iata in key or key in city_or_iata:
+            return coords
+    return None
+
+
+def test_substring_automaton():
+    """自动机返回编号最小的命中关键词"""
+    automaton = SubstringAutomaton(['上海', '海', '浦东', '上海浦东机场'])
+    assert automaton.first_match('上海浦东') == 0
+    assert automaton.first_match('浦东新区') == 2
+    assert automaton.first_match('北京') is None
+    assert automaton.first_superstring('浦东机') == 3
+    assert automaton.first_superstring('北京') is None
+    assert sorted(set(automaton.iter_matches('上海浦东'))) == [0, 1, 2]
+
+
+def test_resolver_matches_legacy_scan(raw_routes_df):
+    """示例数据中的所有城市：旧实现能找到的，解析器结果相同"""
+    cities = sorted(set(raw_routes_df['origin']) | set(raw_routes_df['destination']))
+    resolver = AirportResolver()
+
+    changed = []
+    for city in cities:
+        expected = legacy_get_airport_coords(city)
+        actual = resolver.resolve(city)
+        if expected is not None and actual != expected:
+            changed.append((city, expected, actual))
+
+    print(f"城市总数: {len(cities)}，解析统计: {resolver.stats}")
+    for city, expected, actual in changed:
+        print(f"  别名覆盖: {city}: {expected} -> {actual}")
+    # 仅允许别名层（机场名称映射）改变旧的模糊匹配结果
+    assert all(city in resolver._aliases for city, _, _ in changed)
+
+
+def test_resolve_many_and_negative_memo():
+    """批量解析返回坐标数组和缺失掩码，未命中结果同样被缓存"""
+    resolver = AirportResolver()
+    names = pd.Series(['北京', 'pvg', '不存在的城市', None, '北京', '浦东'])
+    lat, lon, missing = resolver.resolve_many(names)
+
+    assert list(missing) == [False, False, True, True, False, False]
+    assert lat[0] == AIRPORT_COORDS['北京'][0] and lon[1] == AIRPORT_COORDS['PVG'][1]
+    assert np.isnan(lat[2]) and np.isnan(lon[3])
+
+    resolver.resolve('不存在的城市')
+    assert resolver.stats['miss'] == 1
+    assert resolver.stats['memo_hits'] >= 1
+    assert get_airport_coords('') is None
+
+
+if __name__ == "__main__":
+    raw_routes_df = load_sample_routes('raw')
+    test_substring_automaton()
+    test_resolver_matches_legacy_scan(raw_routes_df)
+    test_resolve_many_and_negative_memo()
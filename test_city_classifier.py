@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试国内/国际城市分类器：三处调用结果一致，并与原子串循环实现对比
+"""
+
+import glob
+import pandas as pd
+from city_classifier import CityClassifier, CHINESE_CITIES, city_classifier, categorize_city, classify
+from parser import categorize_city_for_direction, determine_direction
+from fix_parser import is_domestic_city, parse_route_string
+
+# 原 fix_parser.is_domestic_city 的城市集合（仅用于对比）
+LEGACY_FIX_PARSER_CITIES = {
+    '北京', '上海', '广州', '深圳', '成都', '重庆', '杭州', '南京', '武汉', '西安',
+    '天津', '青岛', '大连', '厦门', '宁波', '郑州', '长沙', '哈尔滨', '沈阳', '济南',
+    '福州', '石家庄', '太原', '合肥', '南昌', '昆明', '贵阳', '兰州', '银川', '西宁',
+    '乌鲁木齐', '拉萨', '海口', '三亚', '呼和浩特', '长春', '大庆', '包头', '鄂州',
+    '浦东', '首都', '双流', '桃仙', '白云', '宝安', '萧山', '禄口', '天河', '咸阳',
+    '滨海', '流亭', '周水子', '高崎', '栎社', '新郑', '黄花', '太平', '遥墙',
+    '长乐', '正定', '武宿', '骆岗', '昌北', '长水', '龙洞堡', '中川', '河东', '曹家堡',
+    '地窝堡', '贡嘎', '美兰', '凤凰', '白塔', '二连浩特', '芜湖'
+}
+
+
+def legacy_categorize_city(city_name, cities=frozenset(CHINESE_CITIES) - {'二连浩特', '义乌'}):
+    """原 parser.categorize_city_for_direction / web_app.categorize_city（仅用于对比）"""
+    clean_city = str(city_name).replace('机场', '').replace('国际机场', '').replace('Airport', '').strip()
+    for chinese_city in cities:
+        if chinese_city in clean_city:
+            return '国内'
+    return '国际'
+
+
+def legacy_is_domestic_city(city_name):
+    """原 fix_parser.is_domestic_city（仅用于对比）"""
+    return any(domestic_city in city_name for domestic_city in LEGACY_FIX_PARSER_CITIES)
+
+
+def sample_city_names():
+    """示例工作簿和CSV数据中出现的全部城市名"""
+    names = set()
+    routes_df = pd.read_excel('data/大陆航司全货机航线.xlsx')
+    for col in ['出口航线', '进口航线']:
+        for text in routes_df[col].dropna().astype(str):
+            for route in parse_route_string(text):
+                names.update(route[:2])
+    for path in glob.glob('data/*.csv'):
+        df = pd.read_csv(path)
+        for col in ['origin', 'destination']:
+            if col in df.columns:
+                names.update(df[col].dropna().astype(str))
+    return sorted(names)
+
+
+def test_call_sites_agree():
+    """parser、fix_parser 和 web_app 使用的分类结果一致"""
+    names = sample_city_names()
+    print(f"示例数据中共 {len(names)} 个不同城市名")
+    for name in names:
+        domestic = is_domestic_city(name)
+        assert categorize_city(name) == ('国内' if domestic else '国际'), name
+        assert categorize_city_for_direction(name) == ('国内' if domestic else '国外'), name
+    assert list(classify(pd.Series(names))) == [categorize_city(name) for name in names]
+
+
+def test_matches_legacy_where_lists_agree():
+    """原实现结论一致的城市分类不变；原列表缺失的城市和机场简称得到修正"""
+    fixed = []
+    for name in sample_city_names():
+        legacy_full = legacy_categorize_city(name) == '国内'
+        legacy_short = legacy_is_domestic_city(name)
+        if name == '义乌':
+            # 两份原列表都缺少的城市
+            assert city_classifier.is_domestic(name)
+        elif legacy_full == legacy_short:
+            assert city_classifier.is_domestic(name) == legacy_full, name
+        else:
+            fixed.append(name)
+            assert city_classifier.is_domestic(name), name
+    print(f"原实现结论不一致的城市: {fixed}")
+
+    # 原 parser / web_app 把机场简称判为国外，原 fix_parser 缺少大量城市
+    for name in ['浦东', '南通', '温州', '烟台', '香港', '义乌']:
+        assert categorize_city(name) == '国内', name
+    for name in ['凤凰城', '首尔仁川', '安克雷奇', '关西', '', None, float('nan')]:
+        assert categorize_city(name) == '国际', name
+    assert categorize_city('上海浦东国际机场') == '国内'
+    assert determine_direction('浦东', '芝加哥') == '出口'
+    assert determine_direction('列日', '郑州新郑') == '进口'
+
+
+def test_memo_and_vectorized_classify():
+    """每个不同名称只分类一次；classify 与输入索引对齐，缺失值归为国际"""
+    classifier = CityClassifier(memo_size=3)
+    cities = pd.Series(['上海', '芝加哥', None, '上海', '深圳宝安', '芝加哥'], index=list('abcdef'))
+    result = classifier.classify(cities)
+    assert list(result.index) == list('abcdef')
+    assert list(result) == ['国内', '国际', '国际', '国内', '国内', '国际']
+    assert len(classifier._memo) == 3
+    assert list(classifier.classify(cities, international='国外'))[1] == '国外'
+
+    classifier.memo_size = 2
+    classifier.is_domestic('北京')
+    classifier.is_domestic('迪拜')
+    assert list(classifier._memo) == ['北京', '迪拜']
+    classifier.clear()
+    assert not classifier._memo
+
+
+if __name__ == "__main__":
+    test_call_sites_agree()
+    test_matches_legacy_where_lists_agree()
+    test_memo_and_vectorized_classify()
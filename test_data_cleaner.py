@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按不同取值清理的 clean_route_data 与原逐行 apply 实现结果一致，输出列为分类类型
+"""
+
+import os
+import re
+import pandas as pd
+from data_cleaner import (clean_route_data, normalize_city_name, categorize_city, is_valid_city,
+                          INVALID_PATTERNS, DOMESTIC_CITIES, INTERNATIONAL_CITIES)
+from conftest import load_sample_routes
+
+
+def legacy_is_valid_city(city_name):
+    """原 is_valid_city（仅用于对比）"""
+    if not city_name or pd.isna(city_name):
+        return False
+    city_str = str(city_name).strip()
+    for pattern in INVALID_PATTERNS:
+        if re.match(pattern, city_str, re.IGNORECASE):
+            return False
+    return normalize_city_name(city_str) in (DOMESTIC_CITIES | INTERNATIONAL_CITIES)
+
+
+def legacy_clean_route_data(df):
+    """原 clean_route_data 的逐行清理逻辑（不去重，仅用于对比）"""
+    df_clean = df.copy()
+    if 'origin' in df_clean.columns:
+        df_clean['origin'] = df_clean['origin'].apply(normalize_city_name)
+        df_clean = df_clean[df_clean['origin'].apply(legacy_is_valid_city)]
+        df_clean['origin_category'] = df_clean['origin'].apply(categorize_city)
+    if 'destination' in df_clean.columns:
+        df_clean['destination'] = df_clean['destination'].apply(normalize_city_name)
+        df_clean = df_clean[df_clean['destination'].apply(legacy_is_valid_city)]
+        df_clean['destination_category'] = df_clean['destination'].apply(categorize_city)
+    if 'origin' in df_clean.columns and 'destination' in df_clean.columns:
+        df_clean = df_clean[df_clean['origin'] != df_clean['destination']]
+    return df_clean
+
+
+def assert_same_as_legacy(df):
+    expected = legacy_clean_route_data(df)
+    actual = clean_route_data(df, enable_deduplication=False)
+    print(f"{len(df)} 条 → {len(actual)} 条")
+    assert list(actual.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(actual.astype(object), expected.astype(object))
+    return actual
+
+
+def test_sample_data_matches_legacy(raw_routes_df):
+    """示例工作簿和CSV数据：保留的行、标准化城市名和分类与原实现一致"""
+    actual = assert_same_as_legacy(raw_routes_df)
+    for col in ['origin', 'destination', 'origin_category', 'destination_category']:
+        assert isinstance(actual[col].dtype, pd.CategoricalDtype), col
+    for name in ['cleaned_route_data.csv', 'debug_web_data.csv']:
+        df = pd.read_csv(os.path.join('data', name))
+        assert_same_as_legacy(df.drop(columns=['origin_category', 'destination_category'], errors='ignore'))
+
+
+def test_edge_cases():
+    """空值、无效模式、映射后相同的起终点、空白和只含始发地列"""
+    df = pd.DataFrame({
+        'origin': ['上海浦东', '338ER类似', None, '胡志明', ' 北 京 ', 'null', '首尔仁川', '上海'],
+        'destination': ['芝加哥', '列日', '东京', '上海', '东京成田', '大阪', '首尔', 'ABC'],
+        'airline': list('ABCDEFGH'),
+    }, index=range(10, 18))
+    actual = assert_same_as_legacy(df)
+    assert list(actual.index) == [10, 13, 14]
+    assert list(actual['origin']) == ['上海', '胡志明市', '北京']
+    assert list(actual['origin_category']) == ['国内', '国际', '国内']
+
+    # 类别中只包含保留下来的取值
+    assert list(actual['origin'].cat.categories) == ['上海', '胡志明市', '北京']
+    assert '首尔' not in actual['destination'].cat.categories
+    assert list(actual['destination_category'].cat.categories) == ['国内', '国际']
+
+    assert_same_as_legacy(df[['origin', 'airline']])
+    assert is_valid_city('北京') and not is_valid_city('B777F') and not is_valid_city(None)
+
+
+def test_categorical_memory(raw_routes_df):
+    """分类列占用的内存小于原字符串列"""
+    df = pd.concat([raw_routes_df] * 20, ignore_index=True)
+    expected = legacy_clean_route_data(df)
+    actual = clean_route_data(df, enable_deduplication=False)
+    columns = ['origin', 'destination', 'origin_category', 'destination_category']
+    before = expected[columns].memory_usage(deep=True).sum()
+    after = actual[columns].memory_usage(deep=True).sum()
+    print(f"城市列内存: {before / 1024:.0f} KB → {after / 1024:.0f} KB")
+    assert after < before / 4
+
+
+if __name__ == "__main__":
+    raw_routes_df = load_sample_routes('raw')
+    test_sample_data_matches_legacy(raw_routes_df)
+    test_edge_cases()
+    test_categorical_memory(raw_routes_df)
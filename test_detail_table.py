@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分页明细表：按页计算的派生列与完整表格一致，服务端搜索/排序正确，页结果缓存
+"""
+
+import pandas as pd
+from transit_analysis import analyze_transit_hubs
+from detail_table import DetailTable, COLUMN_LABELS, DISPLAY_ORDER
+from conftest import load_sample_routes
+
+
+def legacy_display_frame(filtered):
+    """原明细表（完整表格模式）的派生列和字符串转换（仅用于对比）"""
+    display_df = filtered.copy()
+    display_df['中转地分析'] = analyze_transit_hubs(display_df)
+
+    def extract_transit_station(row):
+        transit_stations = []
+        destination = str(row.get('destination', '')).strip()
+        for sep in ['-', '—', '→', '>']:
+            if sep in destination:
+                parts = destination.split(sep)
+                transit_stations.extend(p.strip() for p in parts[:-1] if p.strip())
+                break
+        origin = str(row.get('origin', '')).strip()
+        for sep in ['-', '—', '→', '>']:
+            if sep in origin:
+                parts = origin.split(sep)
+                transit_stations.extend(p.strip() for p in parts[1:] if p.strip())
+                break
+        return ', '.join(dict.fromkeys(transit_stations))
+
+    display_df['中转站'] = display_df.apply(extract_transit_station, axis=1)
+    display_df['航线类型'] = display_df.apply(
+        lambda row: '🔄 中转' if any(sep in str(row['origin']) or sep in str(row['destination'])
+                                   for sep in ['-', '—', '→', '>']) else '✈️ 直飞', axis=1)
+    display_df['speed'] = display_df['speed'].apply(
+        lambda v: '未知' if pd.isna(v) or str(v).strip() == '' else str(v).strip())
+    display_df['flight_distance'] = display_df['flight_distance'].astype(str).replace(['nan', 'NaN', 'None', '', ' '], '未知')
+    for col in display_df.columns:
+        if display_df[col].dtype == 'object' or isinstance(display_df[col].dtype, pd.CategoricalDtype):
+            display_df[col] = display_df[col].astype(str).replace(['nan', 'NaN', 'None'], '')
+    display_df = display_df.rename(columns=COLUMN_LABELS)
+    return display_df[[label for label in DISPLAY_ORDER if label in display_df.columns]]
+
+
+def test_pages_match_full_table(stored_routes_df):
+    """逐页拼接的结果与完整表格一致（中转地分析基于整个筛选结果的网络）"""
+    routes_df = stored_routes_df
+    filtered = routes_df[routes_df['airline'].isin(routes_df['airline'].unique()[:5])]
+    expected = legacy_display_frame(filtered)
+    table = DetailTable(filtered)
+
+    pages = []
+    page_number = 1
+    while True:
+        frame, info = table.page(page_number, 40)
+        pages.append(frame)
+        if page_number >= info['pages']:
+            break
+        page_number += 1
+    print(f"{len(filtered)} 条记录，{info['pages']} 页")
+    pd.testing.assert_frame_equal(pd.concat(pages), expected)
+
+    # 汇总指标与完整表格一致
+    summary = table.summary()
+    assert summary['records'] == len(expected)
+    assert summary['transit'] == expected['🔀 中转地分析'].str.contains('🔀').sum()
+    assert table.label_counts('航线类型').to_dict() == expected['🌍 航线类型'].value_counts().to_dict()
+
+
+def test_only_visible_rows_are_derived(stored_routes_df):
+    """取第一页时只为该页涉及的航线对计算中转地分析"""
+    table = DetailTable(stored_routes_df)
+    frame, info = table.page(1, 10)
+    assert len(frame) == 10 and info['total'] == table.size and not info['cached']
+    computed = pd.notna(table._transit_labels).sum()
+    assert 0 < computed <= 10 < len(table._transit_labels)
+
+
+def test_search_sort_and_cache(stored_routes_df):
+    """服务端搜索不区分大小写；排序时缺失值在最后；重复取页命中缓存"""
+    routes_df = stored_routes_df
+    table = DetailTable(routes_df)
+
+    rows = table.query('浦东')
+    assert len(rows) > 0
+    for position in rows:
+        row = routes_df.iloc[position]
+        assert any('浦东' in str(row[col]) for col in ['origin', 'destination', 'full_route', 'remarks'])
+    assert len(table.query('b777f')) == (routes_df['aircraft'].astype(str).str.lower().str.contains('b777f')).sum()
+    assert len(table.query('不存在的城市')) == 0
+
+    rows = table.query(sort_by='📏 飞行距离', ascending=False)
+    distances = routes_df['distance_km'].to_numpy()[rows]
+    known = distances[~pd.isna(distances)]
+    assert (known[:-1] >= known[1:]).all()
+    assert pd.isna(distances[len(known):]).all()
+
+    rows = table.query(sort_by='🛫 始发地')
+    origins = routes_df['origin'].astype(str).to_numpy()[rows]
+    assert list(origins) == sorted(origins)
+
+    first, info = table.page(2, 25, search='浦东', sort_by='🛫 始发地')
+    again, info_again = table.page(2, 25, search='浦东', sort_by='🛫 始发地')
+    assert not info['cached'] and info_again['cached'] and again is first
+    assert table.stats == {'page_hits': 1, 'page_misses': 1}
+
+    # 超出范围的页码取最后一页
+    _, info = table.page(999, 25, search='浦东')
+    assert info['page'] == info['pages']
+
+
+if __name__ == "__main__":
+    stored_routes_df = load_sample_routes('store')
+    test_pages_match_full_table(stored_routes_df)
+    test_only_visible_rows_are_derived(stored_routes_df)
+    test_search_sort_and_cache(stored_routes_df)
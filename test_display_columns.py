@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试向量化的明细表派生列与原逐行 apply 实现结果一致
+"""
+
+import numpy as np
+import pandas as pd
+from display_columns import add_display_columns, weekly_roundtrip_labels, DISPLAY_COLUMNS
+from conftest import load_sample_routes
+
+
+def legacy_classify_route_type(row):
+    """原 classify_route_type（仅用于对比）"""
+    origin_cat = row['origin_category']
+    dest_cat = row['destination_category']
+    if origin_cat == '未知' or dest_cat == '未知':
+        return '未分类'
+    elif origin_cat == '国内' and dest_cat == '国内':
+        return '国内航线'
+    elif origin_cat == '国际' or dest_cat == '国际':
+        return '国际航线'
+    else:
+        return '未分类'
+
+
+def legacy_extract_transit_station(row):
+    """原 extract_transit_station（仅用于对比）"""
+    transit_stations = []
+    transit_separators = ['-', '—', '→', '>']
+    destination = str(row.get('destination', '')).strip()
+    for sep in transit_separators:
+        if sep in destination:
+            parts = destination.split(sep)
+            if len(parts) >= 2:
+                for i in range(len(parts) - 1):
+                    transit_part = parts[i].strip()
+                    if transit_part:
+                        transit_stations.append(transit_part)
+            break
+    origin = str(row.get('origin', '')).strip()
+    for sep in transit_separators:
+        if sep in origin:
+            parts = origin.split(sep)
+            if len(parts) >= 2:
+                for i in range(1, len(parts)):
+                    transit_part = parts[i].strip()
+                    if transit_part:
+                        transit_stations.append(transit_part)
+            break
+    unique_stations = list(dict.fromkeys(transit_stations))
+    return ', '.join(unique_stations) if unique_stations else ''
+
+
+def legacy_determine_route_type(row):
+    """原 determine_route_type（仅用于对比）"""
+    origin = str(row['origin'])
+    destination = str(row['destination'])
+    has_transit = any(sep in origin or sep in destination for sep in ['-', '—', '→', '>'])
+    return '🔄 中转' if has_transit else '✈️ 直飞'
+
+
+def legacy_format_weekly_roundtrip_frequency(count):
+    """原 format_weekly_roundtrip_frequency（仅用于对比）"""
+    roundtrip_count = count / 2
+    if roundtrip_count < 1:
+        return "每周不足1往返"
+    elif roundtrip_count == 1:
+        return "每周1往返"
+    elif roundtrip_count <= 3.5:
+        return f"每周{roundtrip_count:.1f}往返"
+    elif roundtrip_count <= 7:
+        return f"每周{roundtrip_count:.1f}往返"
+    else:
+        return f"高频({roundtrip_count:.1f}往返/周)"
+
+
+def legacy_display_columns(df):
+    """原明细表中这几列的逐行计算（仅用于对比）"""
+    display_df = df.copy()
+    display_df['航线范围'] = display_df.apply(legacy_classify_route_type, axis=1)
+    display_df['中转站'] = display_df.apply(legacy_extract_transit_station, axis=1)
+    display_df['航线类型'] = display_df.apply(legacy_determine_route_type, axis=1)
+    display_df['进出口类型'] = display_df.apply(
+        lambda row: f"{row['direction']} ({row['航线类型'].replace('🔄 ', '').replace('✈️ ', '')})",
+        axis=1
+    )
+    route_frequency = display_df.groupby(['origin', 'destination']).size().reset_index(name='route_count')
+    display_df = display_df.merge(route_frequency, on=['origin', 'destination'], how='left')
+    display_df['每周往返班次'] = display_df['route_count'].apply(legacy_format_weekly_roundtrip_frequency)
+    return display_df
+
+
+def assert_same_as_legacy(df):
+    expected = legacy_display_columns(df)
+    actual = add_display_columns(df)
+    for column in DISPLAY_COLUMNS:
+        assert list(actual[column]) == list(expected[column]), column
+    return actual
+
+
+def test_sample_data_matches_legacy(routes_df):
+    """示例工作簿：各派生列与原逐行实现一致，结果为分类列"""
+    actual = assert_same_as_legacy(routes_df.reset_index(drop=True))
+    print(actual['每周往返班次'].value_counts().head())
+    for column in ['航线类型', '中转站', '进出口类型', '每周往返班次']:
+        assert isinstance(actual[column].dtype, pd.CategoricalDtype), column
+
+
+def test_transit_names_and_categories():
+    """城市名中的各种分隔符、空白和空段；未知分类"""
+    df = pd.DataFrame({
+        'origin': ['上海-安克雷奇', '成都', ' 郑州 — 列日 ', '深圳→', '北京', '香港>阿拉木图-第比利斯', '上海-安克雷奇'],
+        'destination': ['芝加哥', '阿姆斯特丹-列日-成都', '芝加哥', '达卡', '安克雷奇-上海', '布达佩斯', '芝加哥'],
+        'direction': ['出口', '进口', '出口', '出口', np.nan, '出口', '出口'],
+        'origin_category': ['国内', '国内', '国内', '国内', '国内', '国内', '国内'],
+        'destination_category': ['国际', '国内', '未知', '国际', '国内', '国际', '国际'],
+    })
+    actual = assert_same_as_legacy(df)
+    assert list(actual['中转站'])[:3] == ['安克雷奇', '阿姆斯特丹, 列日', '列日']
+    assert actual['中转站'].iloc[4] == '安克雷奇'
+    assert actual['进出口类型'].iloc[4] == 'nan (中转)'
+    assert list(actual['route_count']) == [2, 1, 1, 1, 1, 1, 2]
+    assert list(actual['航线范围'])[:3] == ['国际航线', '国内航线', '未分类']
+
+
+def test_weekly_labels():
+    counts = np.array([1, 2, 3, 7, 14, 15, 2])
+    assert list(weekly_roundtrip_labels(counts)) == [legacy_format_weekly_roundtrip_frequency(c) for c in counts]
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_sample_data_matches_legacy(routes_df)
+    test_transit_names_and_categories()
+    test_weekly_labels()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 Excel 流式分块读取：块边界处的分组航司信息延续，分块与整表读取结果一致
+"""
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from openpyxl import Workbook
+from excel_stream import iter_excel_chunks, make_column_names
+from fix_parser import parse_excel_route_data, iter_route_records
+from parser import load_data
+
+
+def write_workbook(path, header, rows):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def test_chunks_keep_row_numbers_and_values():
+    """块的行号连续；整数单元格保持整数；重复/空表头与 pd.read_excel 命名一致"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(work_dir, 'chunks.xlsx')
+        write_workbook(path, ['航司', '机龄', None, '机龄'], [['国货航', 5, None, 1], [None, None, 'x', 2]] * 5)
+        chunks = list(iter_excel_chunks(path, chunk_rows=3))
+        assert [len(c) for c in chunks] == [3, 3, 3, 1]
+        assert list(pd.concat(chunks).index) == list(range(10))
+        assert list(chunks[0].columns) == list(pd.read_excel(path).columns)
+        assert chunks[0].iloc[0]['机龄'] == 5 and isinstance(chunks[0].iloc[0]['机龄'], int)
+        assert make_column_names(['a', 'a', '', 'a']) == ['a', 'a.1', 'Unnamed: 2', 'a.2']
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_group_state_carries_across_chunks():
+    """航司只写在每组第一行，分组跨越块边界时后续行仍归属该航司"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(work_dir, 'groups.xlsx')
+        header = ['航司', '注册号', '机型', '机龄', '出口航线', '进口航线', '备注']
+        rows = [
+            ['国货航', 'B-2001', 'B777F', 10, '上海浦东—法兰克福', '法兰克福—上海浦东', None],
+            [None, None, None, None, '上海浦东—安克雷奇—芝加哥', None, '每周3班'],
+            [None, None, None, None, '停场维修', None, None],
+            [None, None, None, None, None, '列日—郑州', None],
+            ['顺丰航空', 'B-2002', 'B757-200F', 22.5, '深圳—达卡', '达卡—深圳', None],
+            [None, None, None, None, '鄂州—大阪', None, None],
+        ]
+        write_workbook(path, header, rows)
+
+        stats = {}
+        records = list(iter_route_records(path, chunk_rows=2, stats=stats))
+        assert [r['airline'] for r in records] == ['国货航'] * 4 + ['顺丰航空'] * 3
+        assert records[2]['full_route'] == '上海浦东—安克雷奇—芝加哥' and records[2]['remarks'] == '每周3班'
+        assert records[3]['destination'] == '郑州' and records[3]['reg'] == 'B-2001'
+        assert records[-1]['age'] == '22.5' and records[-1]['origin'] == '鄂州'
+        assert stats['rows'] == 6 and stats['airlines'] == {'国货航', '顺丰航空'}
+
+        chunked = parse_excel_route_data(path, chunk_rows=2)
+        whole = parse_excel_route_data(path)
+        pd.testing.assert_frame_equal(chunked, whole)
+        assert len(whole) == len(records)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_sample_workbook_chunked_matches_whole():
+    """示例工作簿：小块读取与整表读取解析结果一致"""
+    whole = parse_excel_route_data('data/大陆航司全货机航线.xlsx')
+    chunked = parse_excel_route_data('data/大陆航司全货机航线.xlsx', chunk_rows=50)
+    print(f"解析航线 {len(whole)} 条")
+    pd.testing.assert_frame_equal(chunked, whole)
+
+    loaded = load_data(['data/大陆航司全货机航线.xlsx'])
+    loaded_chunked = load_data(['data/大陆航司全货机航线.xlsx'], chunk_rows=100)
+    pd.testing.assert_frame_equal(loaded_chunked, loaded)
+
+
+def test_load_data_fills_merged_cells_across_chunks():
+    """通用解析：合并单元格的向下填充跨块延续"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(work_dir, '航司数据.xlsx')
+        # 首块中连续相同的航司触发合并单元格检测；国货航的空白行落在第二块
+        rows = [['顺丰航空', 'B757', '深圳-达卡'], ['顺丰航空', 'B757', '深圳-大阪'],
+                ['顺丰航空', 'B757', '深圳-首尔'], ['顺丰航空', 'B757', '鄂州-曼谷'],
+                ['国货航', 'B777F', '上海-法兰克福'], [None, None, '上海-列日'], [None, None, '上海-芝加哥']]
+        write_workbook(path, ['航司', '机型', '航线'], rows)
+
+        whole = load_data([path])
+        chunked = load_data([path], chunk_rows=5)
+        pd.testing.assert_frame_equal(chunked, whole)
+        assert list(whole['airline']) == ['顺丰航空'] * 4 + ['国货航'] * 3
+        assert list(whole['aircraft']) == ['B757'] * 4 + ['B777F'] * 3
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_chunks_keep_row_numbers_and_values()
+    test_group_state_carries_across_chunks()
+    test_sample_workbook_chunked_matches_whole()
+    test_load_data_fills_merged_cells_across_chunks()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试列式筛选引擎与逐条件布尔筛选结果一致，分面计数正确
+"""
+
+import itertools
+from filter_engine import FilterIndex, format_option
+from route_pipeline import apply_filters
+from conftest import load_sample_routes
+
+
+def legacy_filter(df, selection):
+    """原 web_app 的逐条件筛选（仅用于对比）"""
+    filtered = df.copy()
+    for key in ['airline', 'origin', 'destination', 'aircraft', 'direction']:
+        value = selection.get(key, '全部')
+        if value != '全部':
+            filtered = filtered[filtered[key] == value]
+    route_type = selection.get('route_type', '全部')
+    if route_type == '国内航线':
+        filtered = filtered[(filtered['origin_category'] == '国内') & (filtered['destination_category'] == '国内')]
+    elif route_type == '国际航线':
+        filtered = filtered[(filtered['origin_category'] == '国际') | (filtered['destination_category'] == '国际')]
+    advanced = selection.get('advanced_filter', '全部')
+    if advanced == '国际出口航线':
+        filtered = filtered[(filtered['origin_category'] == '国内') & (filtered['destination_category'] == '国际') & (filtered['direction'] == '出口')]
+    elif advanced == '国际进口航线':
+        filtered = filtered[(filtered['origin_category'] == '国际') & (filtered['destination_category'] == '国内') & (filtered['direction'] == '进口')]
+    elif advanced == '国内出口航线':
+        filtered = filtered[(filtered['origin_category'] == '国内') & (filtered['destination_category'] == '国内') & (filtered['direction'] == '出口')]
+    elif advanced == '国际中转航线':
+        filtered = filtered[(filtered['origin_category'] == '国际') & (filtered['destination_category'] == '国际')]
+    return filtered
+
+
+def test_engine_matches_legacy_filters(routes_df):
+    """各种筛选组合的结果行与逐条件筛选完全一致"""
+    engine = FilterIndex(routes_df)
+    print(f"索引内存: {engine.memory_bytes() / 1024:.1f} KB")
+
+    airlines = ['全部'] + list(routes_df['airline'].value_counts().index[:2])
+    origins = ['全部'] + list(routes_df['origin'].value_counts().index[:2])
+    directions = ['全部', '出口', '进口']
+    route_types = ['全部', '国内航线', '国际航线']
+    advanced = ['全部', '国际出口航线', '国际进口航线', '国际中转航线']
+
+    checked = 0
+    for airline, origin, direction, route_type, adv in itertools.product(airlines, origins, directions, route_types, advanced):
+        selection = {'airline': airline, 'origin': origin, 'direction': direction,
+                     'route_type': route_type, 'advanced_filter': adv}
+        expected = legacy_filter(routes_df, selection)
+        actual, _ = apply_filters(routes_df, selection, '标准视图', engine)
+        assert list(actual.index) == list(expected.index), selection
+        checked += 1
+    print(f"已对比 {checked} 种筛选组合")
+
+
+def test_facet_counts(routes_df):
+    """分面计数等于排除自身条件后的逐项计数"""
+    engine = FilterIndex(routes_df)
+    top_airline = routes_df['airline'].value_counts().index[0]
+    selection = engine.normalize_selection({'airline': top_airline, 'direction': '出口',
+                                            'origin': '--- 国内城市 ---', 'route_type': '全部'})
+    assert selection['origin'] == '全部'
+
+    facets = engine.facet_counts(selection)
+    # 航司分面：只受方向条件约束
+    exports = routes_df[routes_df['direction'] == '出口']
+    assert facets['airline']['全部'] == len(exports)
+    for airline, count in exports['airline'].value_counts().items():
+        assert facets['airline'][airline] == count
+    # 始发地分面：受航司和方向约束
+    subset = exports[exports['airline'] == top_airline]
+    for origin, count in subset['origin'].value_counts().items():
+        assert facets['origin'][origin] == count
+    assert facets['route_type']['国际航线'] == len(legacy_filter(subset, {'route_type': '国际航线'}))
+
+    label = format_option(facets['airline'])
+    assert label(top_airline) == f"{top_airline} ({facets['airline'][top_airline]})"
+    assert label('--- 国内城市 ---') == '--- 国内城市 ---'
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_engine_matches_legacy_filters(routes_df)
+    test_facet_counts(routes_df)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试航线流动动画图层：高频航线的动画合并为一个画布图层，不再逐条生成 AntPath 和脉冲标记
+"""
+
+import io
+import json
+import contextlib
+import folium
+from folium.plugins import AntPath
+from route_aggregation import build_route_aggregate
+from map_builder import build_route_layer, build_geojson_route_layer
+from airport_coords import get_airport_coords
+from flow_layer import FlowAnimationLayer, FLOW_MIN_FREQUENCY, PULSE_MIN_FREQUENCY, flow_speed, pulse_radius
+from conftest import load_sample_routes
+
+
+def flow_layers(layer):
+    return [child for child in layer._children.values() if isinstance(child, FlowAnimationLayer)]
+
+
+def test_single_flow_layer(routes_df):
+    """逐条绘制模式：高频航线的动画全部在一个画布图层中，没有 AntPath 和脉冲 DivIcon"""
+    filtered = routes_df
+    routes = build_route_aggregate(filtered)
+    with contextlib.redirect_stdout(io.StringIO()):
+        layer, stats = build_route_layer(filtered, routes, animation_enabled=True, animation_speed=1500)
+
+    children = list(layer._children.values())
+    assert not any(isinstance(child, AntPath) for child in children)
+    tooltips = [c.text for child in children if isinstance(child, folium.Marker)
+                for c in child._children.values() if isinstance(c, folium.Tooltip)]
+    assert not any(text.startswith('🔥') for text in tooltips)
+
+    [flows] = flow_layers(layer)
+    payload = json.loads(flows.payload)
+    drawn = [route['count'] for (origin, destination), route in routes.routes.items()
+             if get_airport_coords(origin) and get_airport_coords(destination)]
+    print(f"流动动画 {stats['flows']} 条")
+    assert stats['flows'] == len(payload['f']) == len(flows) == sum(n >= FLOW_MIN_FREQUENCY for n in drawn) > 0
+    assert sum(flow[4] > 0 for flow in payload['f']) == sum(n >= PULSE_MIN_FREQUENCY for n in drawn)
+    assert payload['s'] == 1500
+
+    # 每条流动动画的坐标为扁平的 [纬度, 经度, ...] 数组
+    for flow in payload['f']:
+        assert all(len(coords) % 2 == 0 and len(coords) >= 4 for coords in flow[5])
+
+
+def test_animation_settings_respected(routes_df):
+    """关闭动画时不输出画布图层；矢量图层模式与逐条绘制模式输出相同的流动动画"""
+    filtered = routes_df
+    routes = build_route_aggregate(filtered)
+    with contextlib.redirect_stdout(io.StringIO()):
+        static_layer, static_stats = build_route_layer(filtered, routes, animation_enabled=False)
+        folium_layer, _ = build_route_layer(filtered, routes, animation_enabled=True, animation_speed=800)
+    assert static_stats['flows'] == 0 and not flow_layers(static_layer)
+
+    vector_layer, _ = build_geojson_route_layer(filtered, routes, animation_enabled=True, animation_speed=800)
+    [folium_flows], [vector_flows] = flow_layers(folium_layer), flow_layers(vector_layer)
+
+    def styles(flows):
+        return sorted((flows.colors[f[0]], f[1], f[2], f[3], f[4], len(f[5])) for f in flows.flows)
+
+    assert styles(folium_flows) == styles(vector_flows)
+    assert json.loads(vector_flows.payload)['s'] == 800
+    _, no_animation = build_geojson_route_layer(filtered, routes)
+    assert no_animation['flows'] == 0
+
+
+def test_flow_payload():
+    """多段路径（跨越180度经线）按段输出，颜色按索引复用，动画速度至少为1毫秒"""
+    flows = FlowAnimationLayer(animation_speed=0)
+    flows.add_flow([[31.2, 121.5], [61.2, 179.9]], '#FFC107', 5, 0.48, 9)
+    flows.add_flow([[[50.0, 170.0], [52.0, 180.0]], [[52.0, -180.0], [61.2, -150.0]]], '#FFC107', 4, 0.5, 5)
+    payload = json.loads(flows.payload)
+    assert payload['c'] == ['#FFC107'] and payload['s'] == 1
+    assert payload['f'][0][:5] == [0, 5, 0.48, flow_speed(9), pulse_radius(9)]
+    assert payload['f'][1][4] == 0 and len(payload['f'][1][5]) == 2
+    assert payload['f'][1][5][1] == [52.0, -180.0, 61.2, -150.0]
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_single_flow_layer(routes_df)
+    test_animation_settings_respected(routes_df)
+    test_flow_payload()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试矢量图层（GeoJSON）地图：航线/机场要素与逐条绘制模式一致，页面明显更小
+"""
+
+import io
+import json
+import contextlib
+import pandas as pd
+import folium
+from folium.plugins import MarkerCluster
+from route_aggregation import build_route_aggregate
+from map_builder import (build_route_map, build_route_layer, build_geojson_route_map, build_geojson_route_layer,
+                         create_base_map, diff_features, freeze_layer, thaw_layer)
+from geojson_layer import build_route_features, dump_features
+from flow_layer import FlowAnimationLayer
+from conftest import load_sample_routes
+
+
+def test_features_match_folium_map(routes_df):
+    """唯一航线数、缺失坐标记录数和各机场航班数与逐条绘制模式一致"""
+    filtered = routes_df
+    routes = build_route_aggregate(filtered)
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_layer, legacy_stats = build_route_layer(filtered, routes, animation_enabled=False)
+        collection, stats = build_route_features(routes)
+    print(stats)
+    for key in ['unique_routes_displayed', 'routes_without_coords', 'total_route_records']:
+        assert stats[key] == legacy_stats[key], key
+
+    # 原地图中机场标记的提示为 "机场 - 等级 (N班)"
+    legacy_airports = {}
+    for child in legacy_layer._children.values():
+        if isinstance(child, folium.Marker):
+            tooltip = next((c for c in child._children.values() if isinstance(c, folium.Tooltip)), None)
+            if tooltip is not None and ' - ' in tooltip.text and tooltip.text.endswith('班)'):
+                name, rest = tooltip.text.rsplit(' - ', 1)
+                legacy_airports[name] = int(rest.rsplit('(', 1)[1][:-2])
+
+    points = [f for f in collection['features'] if f['geometry']['type'] == 'Point']
+    assert {f['properties']['name']: f['properties']['n'] for f in points} == legacy_airports
+
+    endpoints = routes.endpoints()
+    assert all(f['properties']['role'] == endpoints[f['properties']['name']]['role'] for f in points)
+
+    # 起降机场标记按端点去重：每个机场一个，不再为每条航线各加两个
+    cluster = next(c for c in legacy_layer._children.values() if isinstance(c, MarkerCluster))
+    assert len(cluster._children) == len(legacy_airports) < 2 * stats['unique_routes_displayed']
+
+    lines = [f for f in collection['features'] if f['geometry']['type'] != 'Point']
+    assert sum(f['properties']['n'] for f in lines) == stats['total_route_records'] - stats['routes_without_coords']
+
+
+def test_antimeridian_and_missing_coords():
+    """跨越180度经线的航线沿大圆走较短一侧，在经线处切开；无坐标的航线不输出要素但计入缺失记录"""
+    filtered = pd.DataFrame({
+        'airline': ['国货航', '国货航', '顺丰航空'],
+        'aircraft': ['B777F', 'B777F', 'B757-200F'],
+        'origin': ['上海', '上海', '不存在的城市'],
+        'destination': ['安克雷奇', '安克雷奇', '深圳'],
+        'direction': ['出口', '出口', '进口'],
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        collection, stats = build_route_features(build_route_aggregate(filtered))
+    assert stats['unique_routes_displayed'] == 1 and stats['routes_without_coords'] == 1
+    geometry = collection['features'][0]['geometry']
+    assert geometry['type'] == 'MultiLineString'
+    west, east = geometry['coordinates']
+    assert west[0][0] > 100 and west[-1][0] == 180 and east[0][0] == -180 and east[-1][0] < -100
+    assert west[-1][1] == east[0][1]
+    assert collection['features'][0]['properties']['n'] == 2
+
+    # 嵌入页面的 JSON 不会提前结束 <script>
+    text = dump_features({'name': '</script>'})
+    assert '</' not in text and json.loads(text) == {'name': '</script>'}
+
+
+def test_payload_is_smaller(routes_df):
+    """同一筛选结果的页面大小显著小于逐条绘制"""
+    filtered = routes_df
+    routes = build_route_aggregate(filtered)
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_html = build_route_map(filtered, routes, animation_enabled=True)[0].get_root().render()
+        vector_map, _ = build_geojson_route_map(filtered, routes)
+    vector_html = vector_map.get_root().render()
+    print(f"逐条绘制 {len(legacy_html) / 1024:.0f} KB，矢量图层 {len(vector_html) / 1024:.0f} KB")
+    assert len(vector_html) * 5 < len(legacy_html)
+    assert 'L.geoJSON(' in vector_html
+
+
+def test_incremental_layer_update(routes_df):
+    """底图不变，筛选变化时只替换航线图层；要素差异按稳定的要素ID计算"""
+    filtered = routes_df
+    airlines = filtered['airline'].unique()
+    first = filtered[filtered['airline'].isin(airlines[:3])]
+    second = filtered[filtered['airline'].isin(airlines[1:4])]
+    with contextlib.redirect_stdout(io.StringIO()):
+        first_layer, first_stats = build_geojson_route_layer(first, build_route_aggregate(first))
+        second_layer, second_stats = build_geojson_route_layer(second, build_route_aggregate(second))
+        _, same_stats = build_route_layer(first, build_route_aggregate(first), animation_enabled=False)
+
+    # 两种绘制方式对同一筛选结果给出相同的要素
+    assert same_stats['features'] == first_stats['features']
+    assert diff_features(first_stats['features'], first_stats['features']) == {'added': [], 'removed': [], 'restyled': []}
+
+    diff = diff_features(first_stats['features'], second_stats['features'])
+    print({key: len(value) for key, value in diff.items()})
+    assert set(diff['added']) == set(second_stats['features']) - set(first_stats['features'])
+    assert set(diff['removed']) == set(first_stats['features']) - set(second_stats['features'])
+    assert all(first_stats['features'][k] != second_stats['features'][k] for k in diff['restyled'])
+
+    # 底图渲染结果不含航线和图例，图例作为航线图层中的一个图层
+    base_map = create_base_map()
+    base_html = base_map.get_root().render()
+    assert 'L.geoJSON(' not in base_html and 'legend-container' not in base_html
+    first_layer.add_to(base_map)
+    layer_html = base_map.get_root().render()
+    assert 'L.geoJSON(' in layer_html and 'legend-container' in layer_html
+
+
+def test_frozen_layer_is_shared_safely(routes_df):
+    """缓存的序列化图层不受页面修改影响：每次取得的图层相互独立，挂到不同底图上渲染结果相同"""
+    filtered = routes_df
+    with contextlib.redirect_stdout(io.StringIO()):
+        layer, _ = build_route_layer(filtered, build_route_aggregate(filtered), animation_enabled=True)
+    frozen = freeze_layer(layer)
+
+    first, second = thaw_layer(frozen), thaw_layer(frozen)
+    assert first is not second and first._parent is None
+    # 模拟 st_folium：重设图层ID并挂到会话的底图上
+    first._id = 'feature_group_0'
+    first.add_to(create_base_map())
+    assert second._parent is None and second.get_name() == layer.get_name()
+    assert list(second._children) == list(first._children) == list(layer._children)
+    [flows] = [child for child in second._children.values() if isinstance(child, FlowAnimationLayer)]
+    assert flows.payload == [child for child in layer._children.values()
+                             if isinstance(child, FlowAnimationLayer)][0].payload
+
+    # 导出用的完整地图同样取独立的图层对象，不影响缓存
+    export_map = create_base_map()
+    thaw_layer(frozen).add_to(export_map)
+    assert thaw_layer(frozen)._parent is None and 'L.polyline(' in export_map.get_root().render()
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_features_match_folium_map(routes_df)
+    test_antimeridian_and_missing_coords()
+    test_payload_is_smaller(routes_df)
+    test_incremental_layer_update(routes_df)
+    test_frozen_layer_is_shared_safely(routes_df)
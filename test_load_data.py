@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多文件并行加载：编码识别、合并顺序确定、加载报告记录每个文件的结果
+"""
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from parser import load_data, sniff_encoding
+
+
+def write_csv(path, rows, encoding):
+    pd.DataFrame(rows, columns=['航司', '机型', '航线']).to_csv(path, index=False, encoding=encoding)
+
+
+def make_files(work_dir):
+    """不同编码的CSV、示例工作簿、空文件和无法识别的文件"""
+    files = []
+    for name, encoding, rows in [
+        ('国货航.csv', 'utf-8', [['国货航', 'B777F', '上海-法兰克福'], ['国货航', 'B777F', '上海-安克雷奇-芝加哥']]),
+        ('顺丰航空.csv', 'gbk', [['顺丰航空', 'B757', '深圳-达卡'], ['顺丰航空', 'B767', '鄂州-大阪']]),
+        ('邮政航空.csv', 'utf-8-sig', [['邮政航空', 'B737', '南京-首尔']]),
+    ]:
+        path = os.path.join(work_dir, name)
+        write_csv(path, rows, encoding)
+        files.append(path)
+
+    excel_path = os.path.join(work_dir, '大陆航司全货机航线.xlsx')
+    shutil.copy('data/大陆航司全货机航线.xlsx', excel_path)
+    files.append(excel_path)
+
+    empty_path = os.path.join(work_dir, '空文件.csv')
+    open(empty_path, 'w').close()
+    files.append(empty_path)
+
+    binary_path = os.path.join(work_dir, '损坏.dat')
+    with open(binary_path, 'wb') as f:
+        f.write(bytes(range(128, 256)) * 10)
+    files.append(binary_path)
+    return files
+
+
+def test_sniff_encoding():
+    """BOM、UTF-8、GBK 和二进制内容"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        files = make_files(work_dir)
+        assert [sniff_encoding(f) for f in files[:3]] == ['utf-8', 'gbk', 'utf-8-sig']
+        assert sniff_encoding(files[-1]) is None
+
+        # 样本截断在多字节字符中间时仍识别为 UTF-8
+        path = os.path.join(work_dir, 'long.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('航' * 30000)
+        assert sniff_encoding(path, sample_size=1000) == 'utf-8'
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_parallel_load_matches_sequential():
+    """并行与顺序加载结果一致，按文件顺序合并，报告列出每个文件的状态"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        files = make_files(work_dir)
+        sequential = load_data(files, max_workers=1)
+        parallel = load_data(files, max_workers=3)
+        pd.testing.assert_frame_equal(parallel, sequential)
+
+        report = parallel.attrs['load_report']
+        print(f"{report['workers']} 个进程，耗时 {report['seconds']:.2f} 秒")
+        for file_report in report['files']:
+            print(f"  {file_report['file']}: {file_report['status']} {file_report['records']} 条 "
+                  f"{file_report['seconds'] * 1000:.0f} ms {file_report['error'] or ''}")
+
+        assert [r['file'] for r in report['files']] == [os.path.basename(f) for f in files]
+        assert [r['status'] for r in report['files']] == ['ok', 'ok', 'ok', 'ok', 'failed', 'failed']
+        assert [r['encoding'] for r in report['files'][:3]] == ['utf-8', 'gbk', 'utf-8-sig']
+        assert all(r['error'] for r in report['files'][4:])
+        assert report['records'] == len(parallel) == sum(r['records'] for r in report['files'])
+        assert parallel.attrs['successfully_loaded_files'] == [os.path.basename(f) for f in files[:4]]
+
+        # 合并顺序与文件顺序一致
+        assert list(parallel['airline'].iloc[:5]) == ['国货航', '国货航', '国货航', '顺丰航空', '顺丰航空']
+        assert parallel['airline'].iloc[5] == '邮政航空'
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_sniff_encoding()
+    test_parallel_load_matches_sequential()
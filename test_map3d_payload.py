@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试3D地图数据：每条有向航线一条记录、坐标与字段取自航线汇总、数据指纹
+"""
+
+import io
+import contextlib
+import pandas as pd
+from route_aggregation import build_route_aggregate
+from airport_coords import get_airport_coords
+from map3d_payload import build_map3d_payload
+from conftest import load_sample_routes
+
+
+def legacy_route_data_3d(filtered, routes):
+    """原 web_app.py 中逐行构建的3D地图数据（标准视图，仅保留对比用到的字段）"""
+    route_data_3d = []
+    for _, route in filtered.iterrows():
+        start, end = get_airport_coords(route['origin']), get_airport_coords(route['destination'])
+        if start and end:
+            route_data_3d.append({
+                'start_airport': route['origin'],
+                'end_airport': route['destination'],
+                'frequency': int(routes.count(route['origin'], route['destination']) or 1),
+                'is_bidirectional': routes.is_round_trip(route['origin'], route['destination']),
+            })
+    return route_data_3d
+
+
+def test_one_record_per_directed_route(routes_df):
+    """记录数 = 唯一有向航线数；航线、航班数、双向标记和坐标与逐行构建的数据一致；重复记录只输出一次"""
+    filtered = routes_df
+    routes = build_route_aggregate(filtered)
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = legacy_route_data_3d(filtered, routes)
+    payload = build_map3d_payload(routes)
+    routes_3d = payload['routes']
+
+    legacy_routes = {(r['start_airport'], r['end_airport']): (r['frequency'], r['is_bidirectional']) for r in legacy}
+    assert {(r['start_airport'], r['end_airport']): (r['frequency'], r['is_bidirectional']) for r in routes_3d} == legacy_routes
+    assert len(routes_3d) == len(legacy_routes) == payload['stats']['routes']
+    assert payload['stats']['skipped_records'] == len(filtered) - len(legacy)
+    assert payload['stats']['airports'] == len({r['start_airport'] for r in legacy} | {r['end_airport'] for r in legacy})
+    assert all((r['start_lat'], r['start_lng']) == tuple(get_airport_coords(r['origin'])) and
+               (r['end_lat'], r['end_lng']) == tuple(get_airport_coords(r['destination'])) for r in routes_3d)
+
+    print(f"逐行数据 {len(legacy)} 条，3D航线 {len(routes_3d)} 条")
+    assert len(routes_3d) * 2 < len(legacy)
+
+
+def test_fields_and_fingerprint():
+    """字段取自航线汇总；往返视图按城市对标记双向；数据不变指纹不变，数据变化指纹变化"""
+    filtered = pd.DataFrame({
+        'airline': ['国货航', '顺丰航空', '国货航', '东航物流'],
+        'aircraft': ['B777F', 'B757-200F', 'B747-400F', 'A330-200P2F'],
+        'origin': ['上海', '上海', '深圳', '不存在的城市'],
+        'destination': ['法兰克福', '法兰克福', '上海', '北京'],
+        'direction': ['出口', '出口', '进口', '出口'],
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        routes = build_route_aggregate(filtered)
+        payload = build_map3d_payload(routes)
+    routes_3d = payload['routes']
+    assert [(r['origin'], r['destination'], r['frequency'], r['airline'], r['aircraft_type'], r['direction'])
+            for r in routes_3d] == [('上海', '法兰克福', 2, '国货航', 'B777F', '出口'),
+                                  ('深圳', '上海', 1, '国货航', 'B747-400F', '进口')]
+    assert payload['stats']['airports'] == 3
+    assert payload['stats']['skipped_records'] == 1
+    assert not any(r['bidirectional'] for r in routes_3d)
+    assert [(r['id'], r['start_airport_name']) for r in routes_3d] == [('route_0', '上海'), ('route_1', '深圳')]
+
+    paired = build_map3d_payload(routes, bidirectional_pairs={('上海', '深圳')})['routes']
+    assert [r['bidirectional'] for r in paired] == [False, True]
+
+    assert build_map3d_payload(build_route_aggregate(filtered.copy()))['fingerprint'] == payload['fingerprint']
+    changed = filtered.assign(direction=['出口', '出口', '出口', '出口'])
+    assert build_map3d_payload(build_route_aggregate(changed))['fingerprint'] != payload['fingerprint']
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_one_record_per_directed_route(routes_df)
+    test_fields_and_fingerprint()
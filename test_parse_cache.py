@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试解析缓存：命中、文件变化失效、版本号变化失效
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import parse_cache
+from parse_cache import load_or_build
+from fix_parser import parse_excel_route_data
+from data_cleaner import clean_route_data
+
+
+def test_parse_cache_hit_and_invalidation():
+    """冷加载写入缓存，热加载命中；内容或版本变化后重新解析"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        excel_path = os.path.join(work_dir, '大陆航司全货机航线.xlsx')
+        shutil.copy('data/大陆航司全货机航线.xlsx', excel_path)
+        cache_dir = os.path.join(work_dir, 'parse_cache')
+        build_calls = []
+
+        def build():
+            build_calls.append(1)
+            df = parse_excel_route_data(excel_path)
+            df = clean_route_data(df, enable_deduplication=False)
+            df.attrs['successfully_loaded_files'] = [os.path.basename(excel_path)]
+            return df
+
+        cold_df, cold_report = load_or_build([excel_path], build, cache_dir=cache_dir)
+        warm_df, warm_report = load_or_build([excel_path], build, cache_dir=cache_dir)
+        print(f"冷加载: {cold_report['seconds'] * 1000:.1f} ms, 热加载: {warm_report['seconds'] * 1000:.1f} ms")
+
+        assert not cold_report['hit'] and warm_report['hit']
+        assert len(build_calls) == 1
+        assert len(warm_df) == len(cold_df)
+        assert list(warm_df['origin']) == list(cold_df['origin'])
+        assert warm_df.attrs['successfully_loaded_files'] == ['大陆航司全货机航线.xlsx']
+        assert warm_report['cold_seconds'] == cold_report['seconds']
+
+        # 仅修改时间变化、内容不变：仍然命中
+        future = time.time() + 10
+        os.utime(excel_path, (future, future))
+        _, touched_report = load_or_build([excel_path], build, cache_dir=cache_dir)
+        assert touched_report['hit']
+
+        # 参数不同：使用独立的缓存条目
+        _, param_report = load_or_build([excel_path], build, params={'enable_deduplication': True}, cache_dir=cache_dir)
+        assert not param_report['hit']
+
+        # 清理器版本变化：缓存失效
+        original_version = parse_cache.CLEANER_VERSION
+        parse_cache.CLEANER_VERSION = original_version + 1
+        try:
+            _, version_report = load_or_build([excel_path], build, cache_dir=cache_dir)
+        finally:
+            parse_cache.CLEANER_VERSION = original_version
+        assert not version_report['hit']
+        assert len(build_calls) == 3
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_parse_cache_hit_and_invalidation()
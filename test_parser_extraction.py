@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试通用解析器的按列批量提取与原逐行提取结果完全一致
+"""
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from parser import detect_table_structure, clean_and_normalize_data, extract_file_frame
+from benchmark_parser import legacy_extract_records, make_synthetic_workbook, prepare_chunk
+
+
+def assert_same_records(df, airline_name='示例航司'):
+    structure = detect_table_structure(df)
+    df_clean = clean_and_normalize_data(df, structure)
+    expected = legacy_extract_records(df_clean, structure, airline_name)
+    actual = extract_file_frame(df_clean, structure, airline_name)
+    pd.testing.assert_frame_equal(actual, expected)
+    return actual
+
+
+def test_synthetic_workbook_matches_legacy():
+    """合成工作簿：多段航线、IATA代码、合并单元格、未识别列中的航线"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(work_dir, 'synthetic.xlsx')
+        make_synthetic_workbook(path, 3000, seed=1)
+        df_clean, structure = prepare_chunk(path)
+        expected = legacy_extract_records(df_clean, structure, 'synthetic')
+        actual = extract_file_frame(df_clean, structure, 'synthetic')
+        print(f"3000 行 → {len(actual)} 条航线记录")
+        pd.testing.assert_frame_equal(actual, expected)
+        assert (actual['origin_iata'] == 'PVG').any() and actual['origin_iata'].isna().any()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_sample_files_match_legacy():
+    """示例工作簿和CSV数据"""
+    assert_same_records(pd.read_excel('data/大陆航司全货机航线.xlsx'))
+    for name in ['cleaned_route_data.csv', 'debug_web_data.csv']:
+        assert_same_records(pd.read_csv(os.path.join('data', name)))
+
+
+def test_explicit_columns_and_fallback():
+    """明确的起点/终点列优先，其后是航线列各航段；航司为空时使用文件名"""
+    df = pd.DataFrame({
+        '航空公司': ['国货航', None, '顺丰航空', None],
+        '始发地': ['上海', '法兰克福', None, None],
+        '目的地': ['芝加哥', '郑州', None, None],
+        '航线': ['上海(PVG)-安克雷奇(ANC)-芝加哥(ORD)', None, '深圳→达卡', None],
+        '备注': [None, '包机', None, None],
+        '其他': [None, None, None, '成都-列日'],
+    })
+    actual = assert_same_records(df)
+    assert list(actual['origin']) == ['上海', '上海', '安克雷奇', '法兰克福', '深圳', '成都']
+    assert list(actual['direction']) == ['出口', '出口', '出口', '进口', '出口', '出口']
+    assert list(actual['airline']) == ['国货航', '国货航', '国货航', '示例航司', '顺丰航空', '示例航司']
+    assert actual['special'].iloc[3] == '包机' and actual['special'].iloc[0] == '正常运营'
+    assert actual['origin_iata'].iloc[1] == 'PVG' and actual['origin_iata'].iloc[0] == ''
+
+    # 航司列和文件名都为空时跳过该行
+    assert assert_same_records(df, airline_name='')['airline'].tolist() == ['国货航'] * 3 + ['顺丰航空']
+
+
+if __name__ == "__main__":
+    test_synthetic_workbook_matches_legacy()
+    test_sample_files_match_legacy()
+    test_explicit_columns_and_fallback()
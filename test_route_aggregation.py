@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试单次分组的航线汇总与逐航线扫描的结果一致
+"""
+
+from route_aggregation import build_route_aggregate, has_transit_separator
+from conftest import load_sample_routes
+
+
+def test_aggregate_matches_per_route_scan(routes_df):
+    """航班数、航司分布、方向、邻接表与逐航线筛选结果一致"""
+    filtered = routes_df
+    routes = build_route_aggregate(filtered)
+    print(f"记录数: {len(filtered)}，唯一航线: {len(routes)}")
+
+    assert routes.total_records == len(filtered)
+    assert sum(route['count'] for route in routes.routes.values()) == len(filtered)
+
+    for (origin, destination), route in list(routes.routes.items())[:150]:
+        # 原地图代码：为每条航线重新筛选整表
+        route_flights = filtered[(filtered['origin'] == origin) & (filtered['destination'] == destination)]
+        airline_counts = route_flights['airline'].value_counts().to_dict()
+        assert route['count'] == len(route_flights)
+        assert route['airline_counts'] == airline_counts
+        assert airline_counts[route['main_airline']] == max(airline_counts.values())
+        assert set(route['directions']) == set(route_flights['direction'])
+        assert set(route['aircraft']) == set(route_flights['aircraft'].dropna())
+        assert route['is_round_trip'] == (
+            ((filtered['origin'] == destination) & (filtered['destination'] == origin)).any()
+        )
+
+        same_origin_routes = filtered[filtered['origin'] == origin]['destination'].unique()
+        same_dest_routes = filtered[filtered['destination'] == destination]['origin'].unique()
+        assert routes.outbound[origin] == list(same_origin_routes)
+        assert routes.inbound[destination] == list(same_dest_routes)
+
+
+def test_legend_stats_match_row_loop(routes_df):
+    """图例统计与原逐行循环一致"""
+    filtered = routes_df
+    stats = build_route_aggregate(filtered).legend_stats()
+
+    route_keys = set(zip(filtered['origin'], filtered['destination']))
+    import_count = export_count = transit_count = round_trip_count = 0
+    transit_hubs = {}
+    for _, route in filtered.iterrows():
+        if route.get('direction', '出口') == '进口':
+            import_count += 1
+        else:
+            export_count += 1
+        if has_transit_separator(route['origin']) or has_transit_separator(route['destination']):
+            transit_count += 1
+        if (route['destination'], route['origin']) in route_keys:
+            round_trip_count += 1
+        transit_hubs.setdefault(route['origin'], {'outbound': set(), 'inbound': set()})
+        transit_hubs.setdefault(route['destination'], {'outbound': set(), 'inbound': set()})
+        transit_hubs[route['origin']]['outbound'].add(route['destination'])
+        transit_hubs[route['destination']]['inbound'].add(route['origin'])
+
+    major_hubs = {
+        city: len(c['outbound']) + len(c['inbound'])
+        for city, c in transit_hubs.items() if len(c['outbound']) + len(c['inbound']) >= 6
+    }
+    print(f"进口 {import_count}，出口 {export_count}，往返 {round_trip_count // 2} 对，枢纽 {len(major_hubs)} 个")
+    assert stats['import_count'] == import_count
+    assert stats['export_count'] == export_count
+    assert stats['transit_count'] == transit_count
+    assert stats['round_trip_records'] == round_trip_count
+    assert {city: hub['total'] for city, hub in stats['major_hubs'].items()} == major_hubs
+    assert list(stats['major_hubs']) == list(major_hubs)
+
+
+def test_endpoints_deduplicated_with_roles(routes_df):
+    """每个端点机场只出现一次，角色与进出港计数与逐航线统计一致"""
+    filtered = routes_df
+    routes = build_route_aggregate(filtered)
+    endpoints = routes.endpoints()
+    print(f"唯一航线 {len(routes)} 条，端点机场 {len(endpoints)} 个（原实现每条航线两个标记，共 {2 * len(routes)} 个）")
+
+    assert set(endpoints) == set(filtered['origin']) | set(filtered['destination'])
+    for city, endpoint in endpoints.items():
+        outbound = filtered[filtered['origin'] == city]
+        inbound = filtered[filtered['destination'] == city]
+        assert endpoint['outbound_routes'] == outbound['destination'].nunique()
+        assert endpoint['inbound_routes'] == inbound['origin'].nunique()
+        assert endpoint['outbound_records'] == len(outbound)
+        assert endpoint['inbound_records'] == len(inbound)
+        expected_role = 'both' if len(outbound) and len(inbound) else ('origin' if len(outbound) else 'destination')
+        assert endpoint['role'] == expected_role
+
+    # 只统计指定航线
+    first = next(iter(routes.routes))
+    assert routes.endpoints({first})[first[0]]['role'] == 'origin'
+    assert routes.endpoints({first})[first[1]]['role'] == 'destination'
+
+
+def test_empty_aggregate(routes_df):
+    """空筛选结果"""
+    routes = build_route_aggregate(routes_df.iloc[0:0])
+    assert len(routes) == 0 and routes.legend_stats()['major_hubs'] == {}
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_aggregate_matches_per_route_scan(routes_df)
+    test_legend_stats_match_row_loop(routes_df)
+    test_endpoints_deduplicated_with_roles(routes_df)
+    test_empty_aggregate(routes_df)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试航线密度图层：采样点在大圆上、权重守恒，网格按墨卡托纵坐标划分，图层为单张图片且按筛选缓存
+"""
+
+import time
+import base64
+import numpy as np
+from airport_coords import AIRPORT_COORDS
+from route_aggregation import build_route_aggregate
+from route_geometry import central_angles
+from route_enrichment import EARTH_RADIUS_KM
+from route_density import (DENSITY_SAMPLE_KM, DENSITY_MAX_SAMPLES, route_samples, density_grid, density_image,
+                           density_png_url, mercator_y)
+from map_builder import build_density_route_layer, build_density_route_map, build_geojson_route_layer
+from conftest import load_sample_routes
+
+
+def test_samples_on_great_circle():
+    """采样点在大圆上（到两端的弧长之和等于航线弧长），权重之和 = 航班数 × 航程"""
+    pairs = [('北京', '法兰克福'), ('上海', '安克雷奇'), ('深圳', '郑州')]
+    lat1, lon1, lat2, lon2 = np.array([AIRPORT_COORDS[o] + AIRPORT_COORDS[d] for o, d in pairs], dtype=float).T
+    weights = np.array([3, 1, 5])
+    y, lon, w = route_samples(lat1, lon1, lat2, lon2, weights)
+
+    angles = central_angles(lat1, lon1, lat2, lon2)
+    counts = np.minimum(np.ceil(angles * EARTH_RADIUS_KM / DENSITY_SAMPLE_KM), DENSITY_MAX_SAMPLES).astype(int)
+    assert len(y) == counts.sum()
+    rows = np.repeat(np.arange(len(pairs)), counts)
+    lat = np.degrees(np.arctan(np.sinh(np.radians(y))))
+    total = central_angles(lat1[rows], lon1[rows], lat, lon) + central_angles(lat, lon, lat2[rows], lon2[rows])
+    assert np.allclose(total, angles[rows], atol=1e-5)
+    assert np.allclose(np.bincount(rows, weights=w), weights * angles * EARTH_RADIUS_KM)
+
+
+def test_grid_uses_mercator_rows():
+    """网格第 0 行为北端，纬度按墨卡托纵坐标落入对应的行"""
+    grid = density_grid([60.0], [10.0], [60.0], [10.5], [2], width=360, height=360)
+    row, column = np.unravel_index(np.argmax(grid), grid.shape)
+    assert column == 190
+    assert row == int((180 - mercator_y(np.array(60.0))) / 360 * 360)
+    assert np.isclose(grid.sum(), 2 * central_angles(60, 10, 60, 10.5) * EARTH_RADIUS_KM)
+
+    image = density_image(grid)
+    assert image.dtype == np.uint8 and image.shape == (360, 360, 4)
+    assert (image[..., 3] > 0).sum() == (grid > 0).sum()
+    png = base64.b64decode(density_png_url(image).split(',', 1)[1])
+    assert png.startswith(b'\x89PNG')
+
+
+def test_density_layer_is_single_image(routes_df):
+    """密度图层只含一张图片和图例；统计口径与矢量图层一致；10万条航线一秒内完成网格"""
+    filtered = routes_df
+    routes = build_route_aggregate(filtered)
+    layer, stats = build_density_route_layer(filtered, routes)
+    _, vector_stats = build_geojson_route_layer(filtered, routes)
+    for key in ['unique_routes_displayed', 'routes_without_coords', 'total_route_records', 'features']:
+        assert stats[key] == vector_stats[key], key
+    assert len(layer._children) == 2
+
+    html = build_density_route_map(filtered, routes)[0].get_root().render()
+    print(f"密度地图页面 {len(html) / 1024:.0f} KB")
+    assert 'L.imageOverlay(' in html and 'data:image/png;base64,' in html
+
+    cities = np.array([v for k, v in AIRPORT_COORDS.items() if not k.isascii()], dtype=float)
+    rng = np.random.default_rng(0)
+    i, j = rng.integers(0, len(cities), (2, 100000))
+    start = time.perf_counter()
+    density_grid(cities[i, 0], cities[i, 1], cities[j, 0], cities[j, 1], rng.integers(1, 7, 100000))
+    elapsed = time.perf_counter() - start
+    print(f"10万条航线密度网格 {elapsed:.2f}s")
+    assert elapsed < 3
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_samples_on_great_circle()
+    test_grid_uses_mercator_rows()
+    test_density_layer_is_single_image(routes_df)
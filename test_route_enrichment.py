@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试向量化距离/时间补全与逐行计算结果一致
+"""
+
+import numpy as np
+import pandas as pd
+from airport_coords import get_airport_coords
+from route_enrichment import (calculate_flight_distance, calculate_flight_time, enrich_routes,
+                              haversine_km, parse_flight_minutes)
+from conftest import load_sample_routes
+
+
+def test_haversine_matches_scalar():
+    """批量距离与逐点计算一致"""
+    pairs = [('北京', '纽约'), ('上海', '法兰克福'), ('深圳', '悉尼'), ('鄂州', '列日')]
+    for origin, dest in pairs:
+        o, d = get_airport_coords(origin), get_airport_coords(dest)
+        batch = haversine_km([o[0]], [o[1]], [d[0]], [d[1]])[0]
+        scalar = calculate_flight_distance(o, d)
+        print(f"{origin} -> {dest}: 批量 {batch:.0f} 公里, 逐点 {scalar:.0f} 公里")
+        # geodesic与球面公式误差在0.6%以内
+        assert abs(batch - scalar) / scalar < 0.006
+
+
+def test_enrich_routes_matches_rowwise(routes_df):
+    """批量补全的字符串结果与逐行函数一致"""
+    routes_df = routes_df.copy()
+    routes_df['flight_distance'] = ''
+    routes_df['flight_time'] = ''
+
+    enriched = enrich_routes(routes_df)
+    print(f"补全航线数: {len(enriched)}")
+    assert len(enriched) == len(routes_df)
+
+    for _, row in enriched.head(200).iterrows():
+        if row['flight_distance']:
+            expected_time = calculate_flight_time(row['distance_km'], row['aircraft'])
+            assert row['flight_time'] == (expected_time or '')
+            assert row['flight_distance'] == f"{int(row['distance_km'])}公里"
+
+    filled = enriched['distance_km'].notna().mean()
+    print(f"距离补全率: {filled:.1%}")
+    assert enriched['distance_km'].dtype == np.float64
+    assert enriched['flight_minutes'].dtype == np.float64
+
+
+def test_existing_values_are_kept():
+    """已有的距离/时间不被覆盖，速度由数值列推算"""
+    df = pd.DataFrame({
+        'origin': ['北京', '上海'],
+        'destination': ['纽约', '法兰克福'],
+        'aircraft': ['B777F', 'A330'],
+        'flight_distance': ['11000公里', ''],
+        'flight_time': ['13:30', ''],
+        'speed': ['', ''],
+    })
+    enriched = enrich_routes(df)
+    print(enriched[['flight_distance', 'flight_time', 'speed']])
+    assert enriched.loc[0, 'flight_distance'] == '11000公里'
+    assert enriched.loc[0, 'flight_time'] == '13:30'
+    assert enriched.loc[0, 'flight_minutes'] == 810
+    assert enriched.loc[0, 'speed'] == f"{int(11000 / 13.5)} km/h"
+    assert enriched.loc[1, 'flight_time'].endswith('m')
+    assert parse_flight_minutes(pd.Series(['5h07m']))[0] == 307
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_haversine_matches_scalar()
+    test_enrich_routes_matches_rowwise(routes_df)
+    test_existing_values_are_kept()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试航线几何：批量 slerp 与逐点计算一致，点数按弧长自适应，跨越180度经线时切开，按坐标对缓存；
+细节层次简化的几何误差不超过容差
+"""
+
+import math
+import numpy as np
+from airport_coords import AIRPORT_COORDS
+from route_geometry import (RouteGeometry, great_circle_paths, central_angles, segment_counts, lod_tolerance,
+                            DEFAULT_SEGMENT_KM, MAX_SEGMENTS, LOD_LEVELS)
+
+
+def legacy_great_circle_point(lat1, lon1, lat2, lon2, t):
+    """逐点计算大圆上位置 t 的点（原 generate_realistic_flight_path 中的公式）"""
+    lat1_rad, lon1_rad = math.radians(lat1), math.radians(lon1)
+    lat2_rad, lon2_rad = math.radians(lat2), math.radians(lon2)
+    d = math.acos(min(1, max(-1, math.sin(lat1_rad) * math.sin(lat2_rad) +
+                              math.cos(lat1_rad) * math.cos(lat2_rad) * math.cos(lon2_rad - lon1_rad))))
+    a = math.sin((1 - t) * d) / math.sin(d)
+    b = math.sin(t * d) / math.sin(d)
+    x = a * math.cos(lat1_rad) * math.cos(lon1_rad) + b * math.cos(lat2_rad) * math.cos(lon2_rad)
+    y = a * math.cos(lat1_rad) * math.sin(lon1_rad) + b * math.cos(lat2_rad) * math.sin(lon2_rad)
+    z = a * math.sin(lat1_rad) + b * math.sin(lat2_rad)
+    return math.degrees(math.atan2(z, math.sqrt(x ** 2 + y ** 2))), math.degrees(math.atan2(y, x))
+
+
+def test_matches_scalar_slerp():
+    """批量结果与逐点计算一致，端点为原坐标"""
+    pairs = [('北京', '法兰克福'), ('上海', '洛杉矶'), ('深圳', '郑州'), ('广州', '芝加哥')]
+    coords = np.array([AIRPORT_COORDS[o] + AIRPORT_COORDS[d] for o, d in pairs], dtype=float)
+    paths = great_circle_paths(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3])
+
+    for (lat1, lon1, lat2, lon2), path in zip(coords, paths):
+        points = np.vstack(path)
+        assert tuple(points[0]) == (lat1, lon1) and tuple(points[-1]) == (lat2, lon2)
+        if len(path) > 1:
+            continue
+        count = len(points) - 1
+        for j in range(count + 1):
+            expected = legacy_great_circle_point(lat1, lon1, lat2, lon2, j / count)
+            assert np.allclose(points[j], expected, atol=1e-6), (j, points[j], expected)
+
+
+def test_adaptive_point_counts():
+    """长航线点多、短航线点少，相邻点弧长不超过上限"""
+    lat1, lon1, lat2, lon2 = np.array([
+        [31.2, 121.5, 31.3, 121.6],     # 几公里
+        [22.5, 114.1, 34.7, 113.6],     # 约1400公里
+        [31.2, 121.5, 61.2, -150.0],    # 跨太平洋
+        [10.0, 20.0, 10.0, 20.0],       # 同一点
+    ]).T
+    counts = segment_counts(central_angles(lat1, lon1, lat2, lon2))
+    print(counts)
+    assert counts[0] == 1 and counts[0] < counts[1] < counts[2] <= MAX_SEGMENTS and counts[3] == 1
+
+    paths = great_circle_paths(lat1, lon1, lat2, lon2)
+    for path in paths[:3]:
+        points = np.vstack(path)
+        steps = central_angles(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1]) * 6371
+        assert steps.max() <= DEFAULT_SEGMENT_KM + 1e-6
+    assert len(paths[3]) == 1 and paths[3][0].shape == (2, 2)
+
+
+def test_antimeridian_split():
+    """跨越180度经线的路径在经线处切开，两段在同一纬度相接，经度不再折回"""
+    (lat1, lon1), (lat2, lon2) = AIRPORT_COORDS['上海'], AIRPORT_COORDS['安克雷奇']
+    [path] = great_circle_paths([lat1], [lon1], [lat2], [lon2])
+    assert len(path) == 2
+    west, east = path
+    assert west[-1, 1] == 180 and east[0, 1] == -180 and west[-1, 0] == east[0, 0]
+    assert (west[:, 1] > 0).all() and (east[:, 1] < 0).all()
+    assert tuple(west[0]) == (lat1, lon1) and tuple(east[-1]) == (lat2, lon2)
+    for segment in path:
+        assert (np.abs(np.diff(segment[:, 1])) < 180).all()
+
+
+def test_cache_reuses_paths():
+    """重复的坐标对只计算一次，第二次全部命中缓存"""
+    geometry = RouteGeometry()
+    lat1, lon1, lat2, lon2 = [39.9, 31.2, 39.9], [116.4, 121.5, 116.4], [50.0, 22.5, 50.0], [8.6, 114.1, 8.6]
+    first = geometry.paths(lat1, lon1, lat2, lon2)
+    assert geometry.stats == {'hits': 0, 'misses': 2}
+    assert first[0] is first[2]
+    second = geometry.paths(lat1, lon1, lat2, lon2)
+    assert geometry.stats == {'hits': 3, 'misses': 2}
+    assert all(a is b for a, b in zip(first, second))
+
+    geometry.clear()
+    geometry.paths(lat1[:1], lon1[:1], lat2[:1], lon2[:1])
+    assert geometry.stats['misses'] == 3
+
+
+def test_cache_eviction():
+    """单批坐标对多于缓存容量时，本批结果完整返回，缓存只保留最近的坐标对"""
+    geometry = RouteGeometry(memo_size=2)
+    [cached] = geometry.paths([10], [10], [20], [20])
+    batch = geometry.paths([10, 30, 40], [10, 30, 40], [20, 35, 45], [20, 35, 45])
+    assert len(batch) == 3 and batch[0] is cached
+    assert geometry.stats == {'hits': 1, 'misses': 3}
+    assert len(geometry._memo) == 2
+    assert geometry.paths([40], [40], [45], [45])[0] is batch[2]
+    assert geometry.stats['hits'] == 2
+
+
+def deviation(points, line):
+    """每个点到折线的最小平面距离（经纬度，单位度）"""
+    a, b = line[:-1], line[1:]
+    d = b - a
+    t = np.clip(((points[:, None, :] - a[None]) * d[None]).sum(axis=2) / np.maximum((d ** 2).sum(axis=1), 1e-18), 0, 1)
+    return np.sqrt(((points[:, None, :] - a[None] - t[..., None] * d[None]) ** 2).sum(axis=2)).min(axis=1)
+
+
+def joined(path):
+    """切开的路径拼回经度连续的折线"""
+    points = np.vstack(path)
+    points[:, 1] = np.degrees(np.unwrap(np.radians(points[:, 1])))
+    return points
+
+
+def test_lod_error_bounded():
+    """各级简化路径：顶点数随容差减少，完整路径上每个点到简化折线的距离不超过容差，端点和切点保留"""
+    cities = [c for c in AIRPORT_COORDS if not c.isascii()][:40]
+    coords = np.array([AIRPORT_COORDS[o] + AIRPORT_COORDS[d] for o in cities for d in cities if o != d], dtype=float)
+    full = great_circle_paths(*coords.T)
+    previous = sum(len(segment) for path in full for segment in path)
+    for _, tolerance in reversed(LOD_LEVELS):
+        simplified = great_circle_paths(*coords.T, tolerance=tolerance)
+        vertices = sum(len(segment) for path in simplified for segment in path)
+        print(f"容差 {tolerance}°：{previous} -> {vertices} 个顶点")
+        assert vertices <= previous
+        previous = vertices
+        for f, s in zip(full, simplified):
+            assert len(f) == len(s)
+            assert tuple(f[0][0]) == tuple(s[0][0]) and tuple(f[-1][-1]) == tuple(s[-1][-1])
+            if len(s) > 1:
+                assert s[0][-1, 1] in (180, -180) and s[0][-1, 0] == s[1][0, 0]
+            assert deviation(joined(f), joined(s)).max() <= tolerance + 1e-9
+    assert previous < 0.6 * sum(len(segment) for path in full for segment in path)
+
+
+def test_lod_levels_cached_separately():
+    """缩放级别对应的容差递减，高缩放级别用完整路径；不同容差的结果分别缓存"""
+    tolerances = [lod_tolerance(zoom) for zoom in range(1, 19)]
+    assert tolerances == sorted(tolerances, reverse=True) and tolerances[-1] == 0.0 and tolerances[0] > 0
+    geometry = RouteGeometry()
+    args = [31.2], [121.5], [61.2], [-150.0]
+    full = geometry.paths(*args)
+    coarse = geometry.paths(*args, tolerance=LOD_LEVELS[0][1])
+    assert geometry.stats == {'hits': 0, 'misses': 2}
+    assert sum(map(len, coarse[0])) < sum(map(len, full[0]))
+    assert geometry.paths(*args, tolerance=LOD_LEVELS[0][1])[0] is coarse[0]
+
+
+if __name__ == "__main__":
+    test_matches_scalar_slerp()
+    test_adaptive_point_counts()
+    test_antimeridian_split()
+    test_cache_reuses_paths()
+    test_cache_eviction()
+    test_lod_error_bounded()
+    test_lod_levels_cached_separately()
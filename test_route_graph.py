@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试航线网络图的 CSR 结构和最短路径、可达性、中心性、连通分量查询
+"""
+
+import itertools
+import numpy as np
+import pandas as pd
+from route_graph import RouteGraph
+from conftest import load_sample_routes
+
+
+def sample_graph():
+    """北京→安克雷奇→芝加哥、北京→芝加哥、上海→安克雷奇，另有独立的 迪拜⇄开罗"""
+    df = pd.DataFrame({
+        'origin': ['北京', '北京', '安克雷奇', '北京', '上海', '迪拜', '开罗', '安克雷奇', '安克雷奇'],
+        'destination': ['安克雷奇', '安克雷奇', '芝加哥', '芝加哥', '安克雷奇', '开罗', '迪拜', '芝加哥', '芝加哥'],
+        'distance_km': [6000, 6000, 4500, 11000, 6500, 2400, 2400, 4500, 4500],
+    })
+    return RouteGraph.from_routes(df)
+
+
+def test_csr_matches_route_table(routes_df):
+    """CSR 邻接与按航线表分组的边、频次一致"""
+    graph = RouteGraph.from_routes(routes_df)
+    counts = routes_df.groupby(['origin', 'destination']).size()
+    print(f"机场 {graph.node_count} 个，航线 {graph.edge_count} 条")
+
+    assert graph.edge_count == len(counts)
+    assert graph.indptr[-1] == graph.edge_count
+    for (origin, destination), count in counts.items():
+        e = graph.edge(origin, destination)
+        assert e is not None and graph.frequency[e] == count
+        assert graph.names[graph.indices[e]] == destination
+
+    outbound = routes_df.groupby('origin')['destination'].nunique()
+    for city, degree in outbound.items():
+        assert graph.out_degree()[graph.node_id(city)] == degree
+
+
+def test_reachable_matches_brute_force(routes_df):
+    """N 段以内可达机场与逐层筛选 DataFrame 的结果一致"""
+    graph = RouteGraph.from_routes(routes_df)
+    for origin in routes_df['origin'].value_counts().index[:5]:
+        expected = {}
+        frontier = {origin}
+        for step in range(1, 4):
+            frontier = set(routes_df[routes_df['origin'].isin(frontier)]['destination']) - set(expected) - {origin}
+            expected.update({city: step for city in frontier})
+        assert graph.reachable_within(origin, 3) == expected, origin
+
+
+def test_k_shortest_paths():
+    """按航段数、距离、频次排序的最短路径；航段数上限"""
+    graph = sample_graph()
+
+    by_legs = graph.k_shortest_paths('北京', '芝加哥', k=3)
+    assert [p['airports'] for p in by_legs] == [['北京', '芝加哥'], ['北京', '安克雷奇', '芝加哥']]
+    assert by_legs[1]['distance_km'] == 10500 and by_legs[1]['min_frequency'] == 2
+
+    by_distance = graph.k_shortest_paths('北京', '芝加哥', k=1, weight='distance')
+    assert by_distance[0]['airports'] == ['北京', '安克雷奇', '芝加哥']
+    by_frequency = graph.k_shortest_paths('北京', '芝加哥', k=1, weight='frequency')
+    assert by_frequency[0]['airports'] == ['北京', '安克雷奇', '芝加哥']
+
+    assert graph.k_shortest_paths('上海', '芝加哥', max_legs=1) == []
+    assert graph.k_shortest_paths('上海', '芝加哥', max_legs=2)[0]['legs'] == 2
+    assert graph.k_shortest_paths('北京', '迪拜') == []
+    assert graph.k_shortest_paths('北京', '未知城市') == []
+
+
+def test_k_shortest_paths_are_ordered_simple_paths(routes_df):
+    """示例数据上的 k 条路径：无环、互不相同、代价不减"""
+    graph = RouteGraph.from_routes(routes_df)
+    origins = list(routes_df['origin'].value_counts().index[:3])
+    destinations = list(routes_df['destination'].value_counts().index[:3])
+    for origin, destination in itertools.product(origins, destinations):
+        paths = graph.k_shortest_paths(origin, destination, k=4, max_legs=3)
+        seen = set()
+        for path in paths:
+            airports = path['airports']
+            assert airports[0] == origin and airports[-1] == destination
+            assert len(set(airports)) == len(airports) and 1 <= path['legs'] <= 3
+            assert all(graph.edge(a, b) is not None for a, b in zip(airports, airports[1:]))
+            seen.add(tuple(airports))
+        assert len(seen) == len(paths)
+        assert [p['cost'] for p in paths] == sorted(p['cost'] for p in paths)
+
+
+def test_centrality_and_components():
+    """度中心性、介数中心性和弱连通分量"""
+    graph = sample_graph()
+    table = graph.centrality_table().set_index('airport')
+
+    # 5 个节点中只有 上海→安克雷奇→芝加哥 经过安克雷奇中转
+    assert np.isclose(table.loc['安克雷奇', 'betweenness'], 1 / (5 * 4))
+    assert table['betweenness'].drop('安克雷奇').eq(0).all()
+    assert np.isclose(table.loc['安克雷奇', 'degree_centrality'], 3 / 5)
+
+    components = table['component']
+    assert components['北京'] == components['芝加哥'] == components['上海'] == 0
+    assert components['迪拜'] == components['开罗'] == 1
+
+    hubs = graph.hub_degrees(3)
+    assert hubs == {'安克雷奇': {'total': 3, 'outbound': 1, 'inbound': 2}}
+
+
+def test_empty_graph(routes_df):
+    """空航线表"""
+    graph = RouteGraph.from_routes(routes_df.iloc[0:0])
+    assert graph.node_count == 0 and graph.edge_count == 0
+    assert graph.reachable_within('北京', 2) == {}
+    assert graph.centrality_table().empty
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_csr_matches_route_table(routes_df)
+    test_reachable_matches_brute_force(routes_df)
+    test_k_shortest_paths()
+    test_k_shortest_paths_are_ordered_simple_paths(routes_df)
+    test_centrality_and_components()
+    test_empty_graph(routes_df)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试流水线阶段缓存：相同输入命中缓存，筛选变化只重算筛选之后的阶段
+"""
+
+import os
+import shutil
+import tempfile
+from route_pipeline import (begin_pipeline_run, clean_stage, enrich_stage, index_stage, filter_stage, aggregate_stage,
+                            get_stage_log, file_stamp, make_key, clear_pipeline_caches, load_route_table)
+from data_cleaner import categorize_city
+from conftest import load_sample_routes
+
+
+def test_stage_cache_hits(routes_df):
+    """第二次运行全部命中；修改筛选条件只重新执行 filter/aggregate"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        # 整合后的CSV数据（与 integrated_all_data_latest.csv 格式相同）
+        csv_path = os.path.join(work_dir, 'integrated_all_data_latest.csv')
+        routes_df.to_csv(csv_path, index=False, encoding='utf-8')
+        cache_dir = os.path.join(work_dir, 'parse_cache')
+        clear_pipeline_caches()
+
+        def run(selection):
+            begin_pipeline_run()
+            stamp = file_stamp([csv_path])
+            routes_df, _ = clean_stage(files=(csv_path,), stamp=stamp, enable_deduplication=False, cache_dir=cache_dir)
+            dataset_key = make_key(stamp, False)
+            routes_df = enrich_stage(_routes=routes_df, dataset_key=dataset_key)
+            index_stage(_routes=routes_df, dataset_key=dataset_key, _categorize=categorize_city)
+            filtered, _ = filter_stage(_routes=routes_df, dataset_key=dataset_key, selection=selection, view_mode='标准视图')
+            summary = aggregate_stage(_filtered=filtered, filter_key=make_key(dataset_key, selection, '标准视图'))
+            return filtered, summary, {r['stage']: r['hit'] for r in get_stage_log()}
+
+        filtered, summary, first = run({'direction': '全部'})
+        print(f"首次运行: {first}")
+        assert first == {'load': False, 'clean': False, 'enrich': False, 'index': False,
+                         'filter': False, 'aggregate': False}
+        assert len(filtered) == len(load_route_table([csv_path], False))
+        assert sum(route['count'] for route in summary['routes'].routes.values()) == len(filtered)
+
+        _, _, second = run({'direction': '全部'})
+        print(f"重复运行: {second}")
+        assert all(second.values()) and 'load' not in second
+
+        exported, _, third = run({'direction': '出口'})
+        print(f"修改筛选: {third}")
+        assert third['clean'] and third['enrich'] and third['index']
+        assert not third['filter'] and not third['aggregate']
+        assert set(exported['direction']) == {'出口'}
+    finally:
+        clear_pipeline_caches()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_stage_cache_hits(load_sample_routes())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试字典编码的航线列存储：还原结果与原表一致、底层数组不复制、显示时才转为字符串
+"""
+
+import numpy as np
+import pandas as pd
+from route_store import RouteStore, display_strings
+from filter_engine import FilterIndex
+from conftest import load_sample_routes
+
+
+def as_objects(df):
+    return df.astype(object).where(df.notna(), None)
+
+
+def test_round_trip_and_memory(enriched_routes_df):
+    """to_frame 与原表取值一致；文本列为分类类型，整体内存更小"""
+    routes_df = enriched_routes_df
+    store = RouteStore.from_frame(routes_df)
+    frame = store.to_frame()
+    assert list(frame.columns) == list(routes_df.columns)
+    assert frame.index.equals(routes_df.index)
+    pd.testing.assert_frame_equal(as_objects(frame), as_objects(routes_df))
+    assert isinstance(frame['airline'].dtype, pd.CategoricalDtype)
+    assert frame['distance_km'].dtype == float
+    assert frame.attrs == routes_df.attrs
+
+    report = store.memory_report()
+    print(report.to_string())
+    total = report.iloc[-1]
+    assert total['列'] == '合计' and total['编码存储(KB)'] < total['DataFrame(KB)'] / 2
+    assert report.set_index('列').loc['airline', '编码方式'].startswith('字典编码')
+    assert report.set_index('列').loc['distance_km', '编码方式'] == '数值数组'
+
+
+def test_zero_copy_views(enriched_routes_df):
+    """codes/values 是只读视图，to_frame 不复制编码数组"""
+    store = RouteStore.from_frame(enriched_routes_df)
+    codes = store.codes('origin')
+    assert not codes.flags.writeable
+    assert np.shares_memory(codes, store.codes('origin'))
+    assert np.shares_memory(store.values('distance_km'), store.to_frame()['distance_km'].to_numpy())
+    assert np.shares_memory(store.to_frame()['origin'].array.codes, codes)
+
+    # 筛选索引可以直接建在分类列上
+    engine = FilterIndex(store.to_frame())
+    top = store.categories('airline')[np.bincount(store.codes('airline')).argmax()]
+    assert len(engine.select({'airline': top})) == (store.column('airline') == top).sum()
+
+
+def test_display_boundary():
+    """显示时按行还原字符串，空值和 'nan' 文本显示为空字符串"""
+    df = pd.DataFrame({
+        'airline': ['国货航', None, '国货航', 'nan'],
+        'age': [12.5, '15', None, 'None'],
+        'distance_km': [100.0, np.nan, 300.0, 400.0],
+    }, index=[3, 5, 7, 9])
+    store = RouteStore.from_frame(df)
+    display = store.to_display(rows=np.array([1, 2, 3]))
+    assert list(display.index) == [5, 7, 9]
+    assert list(display['airline']) == ['', '国货航', '']
+    assert list(display['age']) == ['15', '', '']
+    assert np.isnan(display['distance_km'].iloc[0])
+    assert list(store.to_display(columns=['age'])['age']) == ['12.5', '15', '', '']
+    assert list(display_strings(['a', None, 'NaN'])) == ['a', '', '']
+
+
+if __name__ == "__main__":
+    enriched_routes_df = load_sample_routes('enrich')
+    test_round_trip_and_memory(enriched_routes_df)
+    test_zero_copy_views(enriched_routes_df)
+    test_display_boundary()
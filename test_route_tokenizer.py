@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试共用的航线分词器与两个解析器原有的拆分规则一致，并按文本缓存
+"""
+
+import re
+import pandas as pd
+import route_tokenizer
+from route_tokenizer import split_route, select_separator, tokenize_route_text, cache_stats, clear_caches
+from fix_parser import parse_route_string
+from parser import parse_route_text
+
+
+def legacy_clean_city_name(city_name):
+    """原 fix_parser.clean_city_name（仅用于对比）"""
+    if not city_name:
+        return ''
+    cleaned = city_name.strip()
+    for suffix in ['机场', '国际机场', '空港', 'Airport', 'International']:
+        if cleaned.endswith(suffix):
+            cleaned = cleaned[:-len(suffix)].strip()
+    return re.sub(r'\([^)]*\)', '', cleaned).strip()
+
+
+def legacy_parse_route_string(route_str):
+    """原 fix_parser.parse_route_string（仅用于对比）"""
+    routes = []
+    route_str = route_str.strip()
+    for sep in ['—', '-', '→', '->', '至', '到']:
+        if sep in route_str:
+            parts = route_str.split(sep)
+            if len(parts) >= 2:
+                origin = legacy_clean_city_name(parts[0].strip())
+                destination = legacy_clean_city_name(parts[-1].strip())
+                if len(parts) > 2:
+                    cleaned_parts = [legacy_clean_city_name(p.strip()) for p in parts if legacy_clean_city_name(p.strip())]
+                    if len(cleaned_parts) >= 2:
+                        routes.append((origin, destination, sep.join(cleaned_parts)))
+                else:
+                    if origin and destination:
+                        routes.append((origin, destination))
+                break
+    return routes
+
+
+def legacy_parse_route_text(text):
+    """原 parser.parse_route_text（仅用于对比）"""
+    if pd.isna(text) or not str(text).strip():
+        return []
+    parts = re.split(r'\s*[-—>→]\s*', str(text).strip())
+    results = []
+    for p in parts:
+        m = re.search(r'([A-Z]{3})', p)
+        results.append({"name": re.sub(r'\([A-Z]{3}\)', '', p).strip(), "iata": m.group(1) if m else None})
+    return [(results[i], results[i + 1]) for i in range(len(results) - 1)]
+
+
+SAMPLES = [
+    '成都双流—阿姆斯特丹', '上海浦东-安克雷奇-芝加哥', '第比利斯-贝尔格莱德—乌鲁木齐天山',
+    '郑州新郑国际机场-列日机场', '鄂州花湖(EHU)→大阪(KIX)', '北京至首尔', '深圳到达卡',
+    '上海(PVG) - 安克雷奇(ANC) > 芝加哥(ORD)', '香港--东京', '无分隔符', '', '  -  ',
+    'Frankfurt Airport-Chicago International', '南京—', '—南京', '成都-(维修)-成都',
+]
+
+
+def test_split_route_matches_fix_parser_rules():
+    """分隔符优先级、城市名清理和多段航线描述与原实现一致"""
+    routes_df = pd.read_excel('data/大陆航司全货机航线.xlsx')
+    texts = SAMPLES + list(routes_df['出口航线'].dropna().astype(str)) + list(routes_df['进口航线'].dropna().astype(str))
+    for text in texts:
+        assert parse_route_string(text) == legacy_parse_route_string(text), text
+    assert select_separator('第比利斯-贝尔格莱德—乌鲁木齐天山') == '—'
+    assert select_separator('无分隔符') == ''
+
+
+def test_arrow_separator_is_one_token():
+    """'->' 整体作为分隔符（原实现会先按 '-' 拆分，留下 '>' 前缀）"""
+    assert parse_route_string('上海->芝加哥') == [('上海', '芝加哥')]
+    assert legacy_parse_route_string('上海->芝加哥') == [('上海', '>芝加哥')]
+    assert parse_route_string('上海->安克雷奇->芝加哥') == [('上海', '芝加哥', '上海->安克雷奇->芝加哥')]
+
+
+def test_tokenize_matches_parser_rules():
+    """通用解析器：名称和 IATA 代码与原实现一致，返回的字典互不共享"""
+    for text in SAMPLES + [None, float('nan'), 'PEK-LAX-ORD']:
+        assert parse_route_text(text) == legacy_parse_route_text(text), text
+    first = parse_route_text('上海(PVG)-芝加哥(ORD)')
+    first[0][0]['name'] = '已修改'
+    assert parse_route_text('上海(PVG)-芝加哥(ORD)')[0][0]['name'] == '上海'
+
+
+def test_results_are_cached_per_text():
+    """重复的文本只解析一次"""
+    clear_caches()
+    for _ in range(100):
+        parse_route_string('成都双流—阿姆斯特丹')
+        tokenize_route_text('上海-芝加哥')
+    stats = cache_stats()
+    assert stats['split_route']['misses'] == 1 and stats['split_route']['hits'] == 99
+    assert stats['tokenize_route_text']['misses'] == 1
+    assert split_route.cache_info().maxsize == route_tokenizer.TOKEN_CACHE_SIZE
+
+
+if __name__ == "__main__":
+    test_split_route_matches_fix_parser_rules()
+    test_arrow_separator_is_one_token()
+    test_tokenize_matches_parser_rules()
+    test_results_are_cached_per_text()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试基于航线网络的中转地分析与原逐行实现给出相同标签
+"""
+
+import pandas as pd
+from transit_analysis import analyze_transit_hubs, TransitNetwork
+from conftest import load_sample_routes
+
+
+def legacy_analyze_transit_hubs(df):
+    """原 web_app 中的逐行实现（仅用于对比）"""
+    transit_info = []
+    for idx, row in df.iterrows():
+        origin = str(row['origin'])
+        destination = str(row['destination'])
+        actual_transits = []
+        transit_separators = ['-', '—', '→', '>']
+        for sep in transit_separators:
+            if sep in destination:
+                parts = destination.split(sep)
+                if len(parts) > 1:
+                    actual_transits.extend([p.strip() for p in parts[:-1] if p.strip()])
+                break
+        for sep in transit_separators:
+            if sep in origin:
+                parts = origin.split(sep)
+                if len(parts) > 1:
+                    actual_transits.extend([p.strip() for p in parts[1:] if p.strip()])
+                break
+        if actual_transits:
+            unique_transits = list(dict.fromkeys(actual_transits))
+            transit_info.append('🔄 ' + ', '.join(unique_transits[:2]))
+        else:
+            real_origin = origin.split('-')[0].strip() if '-' in origin else origin.strip()
+            real_destination = destination.split('-')[-1].strip() if '-' in destination else destination.strip()
+            origin_destinations = df[df['origin'] == real_origin]['destination'].unique()
+            dest_origins = df[df['destination'] == real_destination]['origin'].unique()
+            common_cities = set(origin_destinations) & set(dest_origins)
+            common_cities.discard(real_origin)
+            common_cities.discard(real_destination)
+            if common_cities:
+                transit_counts = {}
+                for city in common_cities:
+                    count = len(df[(df['origin'] == real_origin) & (df['destination'] == city)]) + \
+                           len(df[(df['origin'] == city) & (df['destination'] == real_destination)])
+                    transit_counts[city] = count
+                sorted_transits = sorted(transit_counts.items(), key=lambda x: x[1], reverse=True)[:2]
+                transit_info.append('🔀 潜在枢纽: ' + ', '.join(city for city, count in sorted_transits))
+            else:
+                reverse_exists = len(df[
+                    (df['origin'].str.contains(real_destination, na=False)) &
+                    (df['destination'].str.contains(real_origin, na=False))
+                ]) > 0
+                transit_info.append('✈️ 直飞往返' if reverse_exists else '✈️ 直飞')
+    return transit_info
+
+
+def assert_same_labels(df, expected, actual):
+    """标签一致；潜在枢纽并列时原实现的顺序取决于集合遍历顺序，只要求航班数相同"""
+    network = TransitNetwork(df)
+    assert len(expected) == len(actual)
+    for (_, row), old, new in zip(df.iterrows(), expected, actual):
+        if old == new:
+            continue
+        prefix = '🔀 潜在枢纽: '
+        assert old.startswith(prefix) and new.startswith(prefix), (row['origin'], row['destination'], old, new)
+        origin, destination = str(row['origin']).strip(), str(row['destination']).strip()
+
+        def weight(city):
+            return network.edge_counts.get((origin, city), 0) + network.edge_counts.get((city, destination), 0)
+        old_cities = old[len(prefix):].split(', ')
+        new_cities = new[len(prefix):].split(', ')
+        assert [weight(c) for c in old_cities] == [weight(c) for c in new_cities]
+
+
+def test_transit_labels_match_legacy(routes_df):
+    """示例数据全表及按航司筛选的子表，标签与原实现一致"""
+    subsets = [routes_df] + [routes_df[routes_df['airline'] == a] for a in routes_df['airline'].value_counts().index[:3]]
+    for df in subsets:
+        expected = legacy_analyze_transit_hubs(df)
+        actual = analyze_transit_hubs(df)
+        assert_same_labels(df, expected, actual)
+        print(f"{len(df)} 行: {pd.Series(actual).value_counts().to_dict()}")
+
+
+def test_reverse_route_substring_match():
+    """反向航线按子串匹配（与 str.contains 一致），潜在枢纽按航班数排序"""
+    df = pd.DataFrame({
+        'origin': ['北京', '纽约肯尼迪', '上海', '上海', '安克雷奇', '上海', '安克雷奇', '深圳'],
+        'destination': ['纽约', '北京首都', '安克雷奇', '芝加哥', '芝加哥', '洛杉矶', '芝加哥', '安克雷奇-芝加哥'],
+    })
+    labels = analyze_transit_hubs(df)
+    assert labels == legacy_analyze_transit_hubs(df)
+    assert labels[0] == '✈️ 直飞往返'
+    assert labels[3] == '🔀 潜在枢纽: 安克雷奇'
+    assert labels[5] == '✈️ 直飞'
+    assert labels[7] == '🔄 安克雷奇'
+    assert analyze_transit_hubs(df.iloc[0:0]) == []
+
+
+if __name__ == "__main__":
+    routes_df = load_sample_routes()
+    test_transit_labels_match_legacy(routes_df)
+    test_reverse_route_substring_match()
@@ -0,0 +1,167 @@
+# D:\flight_tool\transit_analysis.py
+"""中转地分析：按 (始发地, 目的地) 去重，在航线网络中查找中转站"""
+import re
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+import pandas as pd
+
+# 中转站分隔符（明细表提取、航线汇总和显示列共用这一份定义）
+TRANSIT_SEPARATORS = ['-', '—', '→', '>']
+
+
+def extract_actual_transits(origin: str, destination: str) -> List[str]:
+    """从城市名中提取明确的中转站"""
+    actual_transits = []
+
+    # 从destination字段提取中转站（支持多种分隔符）
+    for sep in TRANSIT_SEPARATORS:
+        if sep in destination:
+            parts = destination.split(sep)
+            if len(parts) > 1:
+                actual_transits.extend([p.strip() for p in parts[:-1] if p.strip()])
+            break
+
+    # 从origin字段提取中转站（支持多种分隔符）
+    for sep in TRANSIT_SEPARATORS:
+        if sep in origin:
+            parts = origin.split(sep)
+            if len(parts) > 1:
+                actual_transits.extend([p.strip() for p in parts[1:] if p.strip()])
+            break
+
+    return actual_transits
+
+
+class _SubstringLookup:
+    """查找“包含某文本”的取值（与 Series.str.contains 的匹配规则一致）"""
+
+    def __init__(self, values):
+        self.values = [v for v in dict.fromkeys(values) if isinstance(v, str)]
+        self._joined = '\x00'.join(self.values)
+        self._starts = []
+        offset = 0
+        for value in self.values:
+            self._starts.append(offset)
+            offset += len(value) + 1
+        self._memo: Dict[str, List[str]] = {}
+
+    def containing(self, pattern: str) -> List[str]:
+        if pattern in self._memo:
+            return self._memo[pattern]
+        if pattern == '':
+            result = list(self.values)
+        elif re.escape(pattern) != pattern:
+            # 含正则元字符时按正则匹配（str.contains 默认 regex=True）
+            try:
+                compiled = re.compile(pattern)
+                result = [v for v in self.values if compiled.search(v)]
+            except re.error:
+                result = [v for v in self.values if pattern in v]
+        else:
+            # 普通文本：在拼接串中查找所有出现位置，映射回所属取值
+            result = []
+            seen = set()
+            position = self._joined.find(pattern)
+            while position >= 0:
+                index = bisect_right(self._starts, position) - 1
+                if index not in seen:
+                    seen.add(index)
+                    result.append(self.values[index])
+                # 跳到下一个取值继续查找
+                next_start = self._starts[index + 1] if index + 1 < len(self._starts) else len(self._joined)
+                position = self._joined.find(pattern, next_start)
+        self._memo[pattern] = result
+        return result
+
+
+class TransitNetwork:
+    """航线网络：出/入邻接表、边计数和边集合"""
+
+    def __init__(self, df: pd.DataFrame):
+        pairs = pd.DataFrame({'origin': df['origin'].to_numpy(), 'destination': df['destination'].to_numpy()})
+        counts = pairs.groupby(['origin', 'destination'], sort=False, dropna=True).size()
+
+        self.edge_counts: Dict[Tuple, int] = {}
+        self.outbound: Dict[object, Dict[object, None]] = {}
+        self.inbound: Dict[object, Dict[object, None]] = {}
+        for (origin, destination), count in counts.items():
+            self.edge_counts[(origin, destination)] = int(count)
+            # 用字典保存邻居，保持首次出现顺序
+            self.outbound.setdefault(origin, {})[destination] = None
+            self.inbound.setdefault(destination, {})[origin] = None
+
+        self._origin_lookup = _SubstringLookup(self.outbound.keys())
+        self._destination_lookup = _SubstringLookup(self.inbound.keys())
+
+    def potential_transits(self, real_origin: str, real_destination: str, limit: int = 2) -> List[str]:
+        """同时连接起点和终点的城市，按两段航线的航班数降序"""
+        origin_destinations = self.outbound.get(real_origin, {})
+        dest_origins = self.inbound.get(real_destination, {})
+        common_cities = [city for city in origin_destinations if city in dest_origins
+                         and city != real_origin and city != real_destination]
+        if not common_cities:
+            return []
+        transit_counts = {
+            city: self.edge_counts.get((real_origin, city), 0) + self.edge_counts.get((city, real_destination), 0)
+            for city in common_cities
+        }
+        sorted_transits = sorted(transit_counts.items(), key=lambda x: x[1], reverse=True)[:limit]
+        return [city for city, count in sorted_transits]
+
+    def reverse_exists(self, real_origin: str, real_destination: str) -> bool:
+        """是否存在 “始发地包含终点、目的地包含起点” 的航线"""
+        # 精确的反向边（哈希查找）
+        if (real_destination, real_origin) in self.edge_counts and re.escape(real_destination) == real_destination \
+                and re.escape(real_origin) == real_origin:
+            return True
+        for origin in self._origin_lookup.containing(real_destination):
+            destinations = self.outbound[origin]
+            if real_origin == '':
+                return True
+            if re.escape(real_origin) == real_origin:
+                if any(isinstance(d, str) and real_origin in d for d in destinations):
+                    return True
+            elif any(d in self._destination_lookup.containing(real_origin) for d in destinations):
+                return True
+        return False
+
+    def label(self, origin: str, destination: str) -> str:
+        """单条航线的中转地标签"""
+        actual_transits = extract_actual_transits(origin, destination)
+        if actual_transits:
+            # 有明确的中转站信息
+            unique_transits = list(dict.fromkeys(actual_transits))  # 去重保序
+            return '🔄 ' + ', '.join(unique_transits[:2])
+
+        # 没有明确中转站，进行网络分析（仅作为补充）
+        real_origin = origin.split('-')[0].strip() if '-' in origin else origin.strip()
+        real_destination = destination.split('-')[-1].strip() if '-' in destination else destination.strip()
+
+        potential_transits = self.potential_transits(real_origin, real_destination)
+        if potential_transits:
+            return '🔀 潜在枢纽: ' + ', '.join(potential_transits)
+        if self.reverse_exists(real_origin, real_destination):
+            return '✈️ 直飞往返'
+        return '✈️ 直飞'
+
+
+def analyze_transit_hubs(df: pd.DataFrame) -> List[str]:
+    """改进的中转地分析逻辑 - 优先使用实际中转站信息
+
+    返回与 df 行顺序一致的标签列表。
+    """
+    if df.empty:
+        return []
+    network = TransitNetwork(df)
+    origins = df['origin'].astype(str).to_numpy()
+    destinations = df['destination'].astype(str).to_numpy()
+
+    labels = {}
+    transit_info = []
+    for origin, destination in zip(origins, destinations):
+        key = (origin, destination)
+        label = labels.get(key)
+        if label is None:
+            label = labels[key] = network.label(origin, destination)
+        transit_info.append(label)
+    return transit_info